@@ -0,0 +1,180 @@
+"""Test the verification of tokens with a locally generated key set.
+
+Needs the database configuration of the backend to import it, see DEVELOPMENT.md.
+"""
+
+import asyncio
+import importlib
+import time
+from types import ModuleType
+from typing import Any
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi_cloudauth.cognito import JWKS
+from jose import jwk, jwt
+
+KID = "local-key"
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+PRIVATE_PEM = private_key.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.PKCS8,
+    serialization.NoEncryption(),
+)
+PUBLIC_JWK = jwk.construct(
+    private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ),
+    "RS256",
+).to_dict()
+PUBLIC_JWK["kid"] = KID
+
+
+class LocalKeys(JWKS):
+    """Key set of the locally generated key that counts the key lookups."""
+
+    def __init__(self, keys: dict[str, Any]):
+        """Create the key set.
+
+        Args:
+            keys (dict[str, Any]): the public keys keyed by their ID.
+        """
+        super().__init__(fixed_keys={k: jwk.construct(v) for k, v in keys.items()})
+        self.lookups = 0
+
+    async def get_publickey(self, kid: str):
+        """Get a public key and count the lookup.
+
+        Args:
+            kid (str): the ID of the key.
+
+        Returns:
+            Key | None: the key or None if the set has no key with the ID.
+        """
+        self.lookups += 1
+        return await super().get_publickey(kid)
+
+
+class JWKSResponse:
+    """Response of the user pool's JWKS endpoint with the local key."""
+
+    headers: dict[str, str] = {}
+
+    def json(self) -> dict[str, Any]:
+        """Get the key set.
+
+        Returns:
+            dict[str, Any]: the key set with the local public key.
+        """
+        return {"keys": [PUBLIC_JWK]}
+
+
+@pytest.fixture
+def authentication(monkeypatch: pytest.MonkeyPatch) -> ModuleType:
+    """Import the authentication module without a user pool.
+
+    The keys of the user pool are fetched when the module is imported, so the
+    request is answered with the local key set.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): patches the environment and requests.
+
+    Returns:
+        ModuleType: the authentication module with an empty token cache.
+    """
+    monkeypatch.setenv("ZENO_USER_POOL_AUTH_REGION", "us-east-1")
+    monkeypatch.setenv("ZENO_USER_POOL_ID", "us-east-1_test")
+    monkeypatch.setenv("ZENO_USER_POOL_CLIENT_ID", "test-client")
+    monkeypatch.setattr(
+        "fastapi_cloudauth.verification.requests.get",
+        lambda *args, **kwargs: JWKSResponse(),
+    )
+    module = importlib.import_module("zeno_backend.authentication")
+    module._tokens.clear()
+    return module
+
+
+def token(authentication: ModuleType, kid: str = KID, **claims: Any) -> str:
+    """Create an access token signed with the local key.
+
+    Args:
+        authentication (ModuleType): the authentication module.
+        kid (str, optional): the key ID in the header. Defaults to the local key.
+        **claims (Any): claims that replace the defaults of a valid token.
+
+    Returns:
+        str: the signed token.
+    """
+    now = int(time.time())
+    return jwt.encode(
+        {
+            "username": "test",
+            "token_use": "access",
+            "client_id": authentication.CLIENT_ID,
+            "iss": authentication.ISSUER,
+            "iat": now,
+            "exp": now + 60,
+            **claims,
+        },
+        PRIVATE_PEM,
+        algorithm="RS256",
+        headers={"kid": kid},
+    )
+
+
+def test_verify_valid_token(authentication: ModuleType):
+    """Test that a token signed with a key of the key set is verified."""
+    keys = LocalKeys({KID: PUBLIC_JWK})
+    verified = asyncio.run(authentication.verify(token(authentication), keys))
+    assert verified is not None
+    assert verified.claims["username"] == "test"
+    assert keys.lookups == 1
+
+
+def test_verify_cache_hit(authentication: ModuleType):
+    """Test that a verified token is not verified again."""
+    keys = LocalKeys({KID: PUBLIC_JWK})
+    access_token = token(authentication)
+    first = asyncio.run(authentication.verify(access_token, keys))
+    second = asyncio.run(authentication.verify(access_token, LocalKeys({})))
+    assert first is not None
+    assert second is first
+    assert keys.lookups == 1
+
+
+def test_verify_expired_token(authentication: ModuleType):
+    """Test that expired tokens are rejected, also once they were verified."""
+    keys = LocalKeys({KID: PUBLIC_JWK})
+    expired = token(authentication, exp=int(time.time()) - 5)
+    assert asyncio.run(authentication.verify(expired, keys)) is None
+
+    expiring = token(authentication)
+    verified = asyncio.run(authentication.verify(expiring, keys))
+    assert verified is not None
+    verified.expires = time.time() - 1
+    assert asyncio.run(authentication.verify(expiring, LocalKeys({}))) is None
+
+
+def test_verify_wrong_kid(authentication: ModuleType):
+    """Test that tokens of a key that is not in the key set are rejected."""
+    keys = LocalKeys({KID: PUBLIC_JWK})
+    other = token(authentication, kid="other-key")
+    assert asyncio.run(authentication.verify(other, keys)) is None
+
+
+def test_verify_wrong_issuer(authentication: ModuleType):
+    """Test that tokens issued by another user pool are rejected."""
+    keys = LocalKeys({KID: PUBLIC_JWK})
+    other = token(
+        authentication, iss="https://cognito-idp.us-east-1.amazonaws.com/other"
+    )
+    assert asyncio.run(authentication.verify(other, keys)) is None
+
+
+def test_verify_wrong_client(authentication: ModuleType):
+    """Test that tokens issued for another client are rejected."""
+    keys = LocalKeys({KID: PUBLIC_JWK})
+    other = token(authentication, client_id="other-client")
+    assert asyncio.run(authentication.verify(other, keys)) is None
@@ -0,0 +1,131 @@
+"""Test uploading the systems of a project concurrently.
+
+Needs the database the backend is configured with, see DEVELOPMENT.md.
+"""
+
+import asyncio
+import uuid
+
+import pyarrow as pa
+from psycopg import sql
+
+from zeno_backend.classes.project import Project
+from zeno_backend.classes.user import User
+from zeno_backend.database import column_map, delete, insert
+from zeno_backend.database.database import close_pools, db_pool, open_pools
+from zeno_backend.database.migrate import migrate
+
+ROWS = 500
+SYSTEMS = 8
+
+
+def system_output(system: int) -> pa.Table:
+    """Get the output of a system that encodes the system in every value.
+
+    Args:
+        system (int): the number of the system.
+
+    Returns:
+        pa.Table: the system's output and a score for every row of the dataset.
+    """
+    return pa.table(
+        {
+            "id": [str(i) for i in range(ROWS)],
+            "output": [f"{system}-{i}" for i in range(ROWS)],
+            "score": [system * ROWS + i for i in range(ROWS)],
+        }
+    )
+
+
+async def upload_system(project_uuid: str, system: int):
+    """Upload the schema and output of a system like the Python client does.
+
+    Args:
+        project_uuid (str): the project to upload the system to.
+        system (int): the number of the system.
+    """
+    table = system_output(system)
+    column_ids = await insert.system_schema(
+        project_uuid, f"system {system}", "id", "output", table.schema
+    )
+    table = table.rename_columns(column_ids)
+    await insert.system(
+        project_uuid, f"system {system}", table.schema, iter(table.to_batches(100))
+    )
+
+
+async def upload_and_check():
+    """Upload systems concurrently and check the stored outputs of each system."""
+    await open_pools()
+    await migrate()
+    user_id = await insert.user(
+        User(id=-1, name=f"test-{uuid.uuid4()}", display_name="Test")
+    )
+    assert user_id is not None
+    project_uuid = str(uuid.uuid4())
+    try:
+        await insert.project(
+            Project(
+                uuid=project_uuid,
+                name="Concurrent systems",
+                owner_name="",
+                view="text-classification",
+            ),
+            user_id,
+        )
+        dataset = pa.table(
+            {
+                "id": [str(i) for i in range(ROWS)],
+                "text": [f"text {i}" for i in range(ROWS)],
+            }
+        )
+        column_ids = await insert.dataset_schema(
+            project_uuid, "id", "text", None, dataset.schema
+        )
+        dataset = dataset.rename_columns(column_ids)
+        await insert.dataset(
+            project_uuid, dataset.schema, iter(dataset.to_batches(100))
+        )
+
+        await asyncio.gather(*[upload_system(project_uuid, s) for s in range(SYSTEMS)])
+
+        columns = await column_map.column_map(project_uuid)
+        id_column = await column_map.id_column(project_uuid)
+        assert id_column is not None
+        async with db_pool.connection() as conn:
+            async with conn.cursor() as cur:
+                for system in range(SYSTEMS):
+                    model = f"system {system}"
+                    assert sorted(n for n, m in columns if m == model) == [
+                        "output",
+                        "score",
+                    ]
+                    await cur.execute(
+                        sql.SQL("SELECT {}, {}, {} FROM {} ORDER BY {};").format(
+                            sql.Identifier(id_column.id),
+                            sql.Identifier(columns[("output", model)].id),
+                            sql.Identifier(columns[("score", model)].id),
+                            sql.Identifier(
+                                column_map.system_table(project_uuid, model)
+                            ),
+                            sql.Identifier(columns[("score", model)].id),
+                        )
+                    )
+                    expected = system_output(system)
+                    assert await cur.fetchall() == list(
+                        zip(
+                            expected["id"].to_pylist(),
+                            expected["output"].to_pylist(),
+                            expected["score"].to_pylist(),
+                        )
+                    )
+    finally:
+        await delete.project(project_uuid)
+        async with db_pool.connection() as conn:
+            await conn.execute("DELETE FROM users WHERE id = %s;", [user_id])
+        await close_pools()
+
+
+def test_concurrent_system_uploads():
+    """Test that concurrent system uploads keep the rows of each system apart."""
+    asyncio.run(upload_and_check())
@@ -0,0 +1,76 @@
+"""Test requests that fan out to more connections than the pool has.
+
+Needs the database the backend is configured with, see DEVELOPMENT.md.
+"""
+
+import asyncio
+
+from zeno_backend.database import database
+from zeno_backend.database.database import ObservedConnectionPool
+from zeno_backend.processing.concurrency import gather_bounded
+
+POOL_SIZE = 2
+REQUESTS = 4 * POOL_SIZE
+BRANCHES = 4
+
+
+async def query(seconds: float) -> int:
+    """Run a query that takes some time on a connection of the primary.
+
+    Args:
+        seconds (float): how long the query sleeps.
+
+    Returns:
+        int: the result of the query.
+    """
+    async with database.connection() as conn:
+        cur = await conn.execute("SELECT 1 FROM pg_sleep(%s);", [seconds])
+        result = await cur.fetchone()
+    assert result is not None
+    return result[0]
+
+
+async def request() -> int:
+    """Run the database work of a chart request.
+
+    A sequential lookup is followed by an await that does not use the database,
+    like reading an upload, by concurrent lookups like those of the chart
+    computations, and by concurrent metric queries.
+
+    Returns:
+        int: the number of queries that returned a result.
+    """
+    results = [await query(0.01)]
+    await asyncio.sleep(0.05)
+    async with database.read_connection() as conn:
+        await conn.execute("SELECT 1;")
+    results += await asyncio.gather(*[query(0.02) for _ in range(BRANCHES)])
+    results += await gather_bounded([query(0.02) for _ in range(BRANCHES)])
+    return sum(results)
+
+
+async def run_requests() -> list[int]:
+    """Run more concurrent requests than the pool has connections.
+
+    Returns:
+        list[int]: the number of queries of each request that returned a result.
+    """
+    pool = ObservedConnectionPool(
+        database.db_pool.conninfo,
+        open=False,
+        min_size=1,
+        max_size=POOL_SIZE,
+        timeout=10,
+    )
+    primary, database.db_pool = database.db_pool, pool
+    await pool.open(wait=True)
+    try:
+        return await asyncio.gather(*[request() for _ in range(REQUESTS)])
+    finally:
+        database.db_pool = primary
+        await pool.close()
+
+
+def test_fan_out_beyond_pool_size():
+    """Test that concurrent requests do not wait for each other's connections."""
+    assert asyncio.run(run_requests()) == [2 * BRANCHES + 1] * REQUESTS
@@ -0,0 +1,174 @@
+"""Verification of Cognito tokens with an in-process cache.
+
+A request can check its token several times, in the `auth` dependency and in the
+access checks of `util`. A token is therefore verified once, and its claims and
+the Zeno user it belongs to are kept until the token expires, keyed by a hash of
+the token. The JSON Web Key Set (JWKS) of the user pool is fetched once and shared
+by all verifications.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any
+
+from cognitojwt.exceptions import CognitoJWTException
+from cognitojwt.token_utils import check_client_id, check_expired
+from fastapi import HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi_cloudauth.base import ScopedAuth
+from fastapi_cloudauth.cognito import JWKS
+from fastapi_cloudauth.messages import NOT_VERIFIED
+from fastapi_cloudauth.verification import ScopedJWKsVerifier
+from jose import JWTError, jwt
+from jose.utils import base64url_decode
+
+from zeno_backend.classes.user import User
+from zeno_backend.database import select
+
+REGION = os.environ["ZENO_USER_POOL_AUTH_REGION"]
+USER_POOL_ID = os.environ["ZENO_USER_POOL_ID"]
+CLIENT_ID = os.environ["ZENO_USER_POOL_CLIENT_ID"]
+ISSUER = f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}"
+# Maximum number of verified tokens kept, the least recently used are dropped.
+TOKEN_CACHE_SIZE = 10000
+
+
+class VerifiedToken:
+    """A token whose signature, expiration, client, and issuer were verified.
+
+    Attributes:
+        expires (float): the time the token expires, in seconds since the epoch.
+        claims (dict[str, Any]): the claims of the token.
+        user (User | None): the Zeno user of the token, once it was looked up.
+    """
+
+    def __init__(self, claims: dict[str, Any]):
+        """Keep the claims of a verified token.
+
+        Args:
+            claims (dict[str, Any]): the claims of the token.
+        """
+        self.expires = float(claims["exp"])
+        self.claims = claims
+        self.user: User | None = None
+
+
+# The keys of the user pool, shared by `verify` and `auth`.
+jwks = JWKS(url=f"{ISSUER}/.well-known/jwks.json")
+# Verified tokens keyed by the SHA-256 of the token.
+_tokens: OrderedDict[str, VerifiedToken] = OrderedDict()
+
+
+async def verify(token: str, keys: JWKS | None = None) -> VerifiedToken | None:
+    """Verify a token, reusing the result of earlier verifications.
+
+    The signature, expiration, client, and issuer of new tokens are checked.
+
+    Args:
+        token (str): the token, without the "Bearer" prefix.
+        keys (JWKS | None, optional): the keys to verify the signature with, e.g. a
+            locally generated key set. Defaults to the keys of the user pool.
+
+    Returns:
+        VerifiedToken | None: the verified token or None if it is not valid.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    verified = _tokens.get(key)
+    if verified is not None:
+        if verified.expires >= time.time():
+            _tokens.move_to_end(key)
+            return verified
+        del _tokens[key]
+
+    try:
+        public_key = await (keys or jwks).get_publickey(
+            jwt.get_unverified_header(token).get("kid", "")
+        )
+        message, signature = token.rsplit(".", 1)
+        if public_key is None or not public_key.verify(
+            message.encode(), base64url_decode(signature.encode())
+        ):
+            return None
+        claims = jwt.get_unverified_claims(token)
+        check_expired(claims["exp"])
+        check_client_id(claims, CLIENT_ID)
+        if claims.get("iss") != ISSUER:
+            return None
+    except (CognitoJWTException, JWTError, KeyError, ValueError):
+        return None
+
+    verified = VerifiedToken(claims)
+    _tokens[key] = verified
+    if len(_tokens) > TOKEN_CACHE_SIZE:
+        _tokens.popitem(last=False)
+    return verified
+
+
+async def user(token: str) -> User | None:
+    """Get the Zeno user of a token.
+
+    Args:
+        token (str): the token, without the "Bearer" prefix.
+
+    Returns:
+        User | None: the user or None if the token is not valid or has no user.
+    """
+    verified = await verify(token)
+    if verified is None:
+        return None
+    if verified.user is None:
+        verified.user = await select.user(verified.claims["username"])
+    return verified.user
+
+
+def forget_user(user_id: int):
+    """Drop the cached user of all tokens of a user after it was updated.
+
+    Args:
+        user_id (int): the ID of the user.
+    """
+    for verified in _tokens.values():
+        if verified.user is not None and verified.user.id == user_id:
+            verified.user = None
+
+
+class CachedJWKsVerifier(ScopedJWKsVerifier):
+    """Verifier of access tokens for fastapi_cloudauth that uses `verify`."""
+
+    async def verify_token(self, http_auth: HTTPAuthorizationCredentials) -> bool:
+        """Verify that a token is a valid access token of the user pool.
+
+        Args:
+            http_auth (HTTPAuthorizationCredentials): the credentials of a request.
+
+        Raises:
+            HTTPException: the token is not valid and errors are enabled.
+
+        Returns:
+            bool: whether the token is valid.
+        """
+        verified = await verify(http_auth.credentials)
+        if verified is not None and verified.claims.get("token_use") == "access":
+            return True
+        if self.auto_error:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail=NOT_VERIFIED
+            )
+        return False
+
+
+class CognitoAuth(ScopedAuth):
+    """Dependency that verifies Cognito access tokens through the token cache.
+
+    Behaves like `fastapi_cloudauth.Cognito`, without fetching keys of its own.
+    """
+
+    def __init__(self):
+        """Create the dependency with the shared keys of the user pool."""
+        super().__init__(jwks, audience=CLIENT_ID, issuer=ISSUER)
+        self.verifier = CachedJWKsVerifier(jwks, audience=CLIENT_ID, issuer=ISSUER)
+
+
+auth = CognitoAuth()
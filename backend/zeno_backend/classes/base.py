@@ -81,7 +81,15 @@ class ZenoColumn(CamelModel):
 
 
 class GroupMetric(CamelModel):
-    """Specification for a metric on a group of datapoints."""
+    """Specification for a metric on a group of datapoints.
+
+    Attributes:
+        metric (float | None): the value of the metric.
+        size (int): the number of datapoints in the group.
+        approximate (bool): whether the size and metric were estimated from a
+            sample of a large table. Default False.
+    """
 
     metric: float | None = None
     size: int
+    approximate: bool = False
@@ -0,0 +1,53 @@
+"""Type representations for background precomputation jobs."""
+
+from enum import Enum
+
+from zeno_backend.classes.base import CamelModel
+
+
+class JobType(str, Enum):
+    """Enumeration of the kinds of precomputation jobs.
+
+    Attributes:
+        CHARTS: compute the data of all charts without cached data.
+        HISTOGRAMS: compute the histogram buckets of all columns.
+        SORT_INDEXES: create the indexes for paging through the sorted table.
+    """
+
+    CHARTS = "CHARTS"
+    HISTOGRAMS = "HISTOGRAMS"
+    SORT_INDEXES = "SORT_INDEXES"
+
+
+class JobStatus(str, Enum):
+    """Enumeration of the states of a precomputation job.
+
+    Attributes:
+        QUEUED: the job is waiting for a worker.
+        RUNNING: the job is being executed.
+        DONE: the job finished successfully.
+        FAILED: the job raised an error.
+    """
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class Job(CamelModel):
+    """Specification of a precomputation job.
+
+    Attributes:
+        id (str): the id of the job.
+        project_uuid (str): the uuid of the project the job precomputes data for.
+        type (JobType): the kind of data the job computes.
+        status (JobStatus): the current state of the job.
+        error (str | None): the error message if the job failed.
+    """
+
+    id: str
+    project_uuid: str
+    type: JobType
+    status: JobStatus = JobStatus.QUEUED
+    error: str | None = None
@@ -1,6 +1,7 @@
 """Type representations for metric data."""
 
 from zeno_backend.classes.base import CamelModel
+from zeno_backend.classes.filter import FilterPredicateGroup
 from zeno_backend.classes.slice import Slice
 
 
@@ -52,7 +53,27 @@ class MetricRequest(CamelModel):
     Attributes:
         metric_keys (list[MetricKey]): the metric keys to be used for the metric.
         data_ids (list[str] | None): the data ids to be used for the metric.
+        approximate (bool): whether the metrics may be estimated from a sample if
+            the project is large. Default False.
     """
 
     metric_keys: list[MetricKey]
     data_ids: list[str] | None = None
+    approximate: bool = False
+
+
+class MetricCell(CamelModel):
+    """Specification of a single metric calculation on a subset of the data.
+
+    Used to evaluate a grid of metrics, slices, and models at once.
+
+    Attributes:
+        metric (Metric | None): the metric to calculate, None to only count.
+        model (str | None): the model for which to calculate the metric.
+        filter_predicates (FilterPredicateGroup | None): the filter predicates that
+            define the subset of the data.
+    """
+
+    metric: Metric | None = None
+    model: str | None = None
+    filter_predicates: FilterPredicateGroup | None = None
@@ -0,0 +1,84 @@
+"""Type representations for monitoring the backend's database usage."""
+
+from zeno_backend.classes.base import CamelModel
+from zeno_backend.classes.chart import ChartType
+from zeno_backend.database.prepared import PreparedStatementStats
+
+
+class LatencyBucket(CamelModel):
+    """Bucket of a latency histogram.
+
+    Attributes:
+        le_ms (float | None): the upper bound of the bucket in milliseconds, None
+            for the bucket of latencies above all bounds.
+        count (int): the number of observations in the bucket.
+    """
+
+    le_ms: float | None
+    count: int
+
+
+class PoolStats(CamelModel):
+    """Usage statistics of a database connection pool.
+
+    Attributes:
+        name (str): the name of the pool.
+        min_size (int): the minimum number of connections of the pool.
+        max_size (int): the maximum number of connections of the pool.
+        size (int): the number of connections currently managed by the pool.
+        available (int): the number of idle connections.
+        in_use (int): the number of connections lent out to requests.
+        waiting (int): the number of requests waiting for a connection.
+        requests (int): the number of connection requests since the pool opened.
+        requests_queued (int): the number of requests that had to wait.
+        requests_errors (int): the number of requests that timed out or failed.
+        connections_lost (int): the number of connections found broken.
+        acquisition_ms (float): total time spent acquiring connections.
+        acquisition_histogram (list[LatencyBucket]): distribution of the time it
+            took to acquire a connection.
+    """
+
+    name: str
+    min_size: int
+    max_size: int
+    size: int
+    available: int
+    in_use: int
+    waiting: int
+    requests: int
+    requests_queued: int
+    requests_errors: int
+    connections_lost: int
+    acquisition_ms: float
+    acquisition_histogram: list[LatencyBucket]
+
+
+class DatabaseStats(CamelModel):
+    """Usage statistics of the database layer.
+
+    Attributes:
+        pools (list[PoolStats]): the statistics of all connection pools.
+        prepared_statements (PreparedStatementStats): reuse of prepared statements.
+    """
+
+    pools: list[PoolStats]
+    prepared_statements: PreparedStatementStats
+
+
+class ChartStats(CamelModel):
+    """Latency and size of the chart data computations of a chart type.
+
+    Attributes:
+        type (ChartType): the type of the charts.
+        computations (int): the number of chart data computations.
+        cells (int): the total number of cells computed.
+        duration_ms (float): the total time spent computing chart data.
+        latency_histogram (list[LatencyBucket]): distribution of the time it took
+            to compute the data of a chart.
+    """
+
+    type: ChartType
+    computations: int = 0
+    cells: int = 0
+    duration_ms: float = 0.0
+    latency_histogram: list[LatencyBucket]
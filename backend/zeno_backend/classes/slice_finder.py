@@ -53,7 +53,10 @@ class SQLTable(CamelModel):
     Attributes:
         table (list[Any]): the table data.
         columns (list[str]): the column names.
+        next_page_token (str | None): the token to request the next page with, None
+            if this is the last page.
     """
 
     table: list[Any]
     columns: list[str]
+    next_page_token: str | None = None
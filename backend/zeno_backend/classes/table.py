@@ -20,6 +20,10 @@ class TableRequest(CamelModel):
             applied to the data.
         sort (tuple[ZenoColumn | None, bool]): the sort to be used for the table.
         data_ids (list[str] | None): the data ids to be used for the table.
+        exclude_embeddings (bool): whether to leave out embedding columns, even if
+            they are requested. Default False.
+        page_token (str | None): the token of the previous page to continue after,
+            used instead of the offset. Default None.
     """
 
     columns: list[ZenoColumn]
@@ -31,6 +35,8 @@ class TableRequest(CamelModel):
     filter_predicates: FilterPredicateGroup | None = None
     sort: tuple[ZenoColumn | None, bool]
     data_ids: list[str] | None = None
+    exclude_embeddings: bool = False
+    page_token: str | None = None
 
 
 class SliceTableRequest(CamelModel):
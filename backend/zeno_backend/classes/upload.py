@@ -0,0 +1,20 @@
+"""Type representations for chunked upload sessions."""
+
+from zeno_backend.classes.base import CamelModel
+
+
+class UploadSession(CamelModel):
+    """Specification of a chunked upload of a dataset or system.
+
+    Attributes:
+        id (str): the id of the upload session.
+        project_uuid (str): the uuid of the project the data is uploaded to.
+        system_name (str | None): the name of the system that is uploaded, None if
+            a dataset is uploaded.
+        chunks (list[int]): the numbers of the chunks that have been staged.
+    """
+
+    id: str
+    project_uuid: str
+    system_name: str | None = None
+    chunks: list[int] = []
@@ -0,0 +1,102 @@
+"""In-process cache of the access of users to Zeno projects.
+
+Almost every request to a private project checks whether the requesting user may
+view or edit it. The decision is made with a single query over the project's owner
+and the grants of the user and of their organizations, and is kept for
+`ACCESS_TTL` seconds. Changes to the grants of a project or to the members of an
+organization invalidate the affected decisions right away, the time limit only
+bounds how long other processes serving the same database can be out of date.
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+from psycopg import sql
+
+from zeno_backend.classes.user import User
+from zeno_backend.database.database import connection
+
+# Seconds an access decision is reused for.
+ACCESS_TTL = float(os.environ.get("ZENO_ACCESS_CACHE_TTL", 30))
+# Maximum number of access decisions kept, the least recently used are dropped.
+ACCESS_CACHE_SIZE = 10000
+
+ACCESS_QUERY = sql.SQL(
+    """
+    WITH grants AS (
+        SELECT TRUE AS editor FROM projects
+        WHERE uuid = %(project)s AND owner_id = %(user)s
+
+        UNION ALL
+
+        SELECT editor FROM user_project
+        WHERE project_uuid = %(project)s AND user_id = %(user)s
+
+        UNION ALL
+
+        SELECT op.editor FROM organization_project AS op
+        JOIN user_organization AS uo ON uo.organization_id = op.organization_id
+        WHERE op.project_uuid = %(project)s AND uo.user_id = %(user)s
+    )
+    SELECT EXISTS (SELECT 1 FROM grants), EXISTS (SELECT 1 FROM grants WHERE editor);
+    """
+)
+
+# Whether a user may view and edit a project with the time the decision expires,
+# keyed by (user ID, project UUID).
+_decisions: OrderedDict[tuple[int, str], tuple[float, bool, bool]] = OrderedDict()
+# Incremented on invalidation so that checks racing a change are not stored.
+_generation = 0
+
+
+async def project_access(project: str, user: User) -> tuple[bool, bool]:
+    """Get whether a user may view and edit a project.
+
+    Public projects can be viewed by anyone, this only considers the ownership and
+    the grants of the user and their organizations.
+
+    Args:
+        project (str): the UUID of the project.
+        user (User): the user to check for.
+
+    Returns:
+        tuple[bool, bool]: whether the user may view and whether they may edit the
+            project.
+    """
+    key = (user.id, project)
+    cached = _decisions.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        _decisions.move_to_end(key)
+        return cached[1], cached[2]
+
+    generation = _generation
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(ACCESS_QUERY, {"project": project, "user": user.id})
+            result = await cur.fetchone()
+    viewer, editor = (bool(result[0]), bool(result[1])) if result else (False, False)
+
+    if generation == _generation:
+        _decisions[key] = (time.monotonic() + ACCESS_TTL, viewer, editor)
+        _decisions.move_to_end(key)
+        if len(_decisions) > ACCESS_CACHE_SIZE:
+            _decisions.popitem(last=False)
+    return viewer, editor
+
+
+def invalidate(project: str | None = None):
+    """Drop cached access decisions after the grants changed.
+
+    Args:
+        project (str | None, optional): the project whose grants changed. Defaults
+            to None, which drops the decisions for all projects, e.g. after the
+            members of an organization changed.
+    """
+    global _generation
+    _generation += 1
+    if project is None:
+        _decisions.clear()
+        return
+    for key in [k for k in _decisions if k[1] == project]:
+        del _decisions[key]
@@ -0,0 +1,231 @@
+"""In-process cache of the column maps of Zeno projects.
+
+Every project has a `{project}_column_map` table that maps a column's name and model
+to the id of the column in the project's data table. This lookup is needed for every
+filter predicate, metric, and histogram, so the column map of a project is loaded
+in a single query and kept in memory. Schema changes increment the project's data
+version, see `data_version`, so every backend process loads the column map again
+once it reads the new version.
+
+The columns of a system are stored in a table of their own that is keyed by the
+dataset's ID column. `data_source` joins these tables to the dataset table, so
+queries can reference every column by its id as if it was stored in one table.
+Systems uploaded before this layout was introduced are stored as columns of the
+dataset table and need no join.
+"""
+
+import hashlib
+
+from psycopg import sql
+
+from zeno_backend.classes.base import ZenoColumn, ZenoColumnType
+from zeno_backend.database import data_version, prepared
+from zeno_backend.database.database import connection
+
+# Column maps of all loaded projects, keyed by (column name, model).
+_column_maps: dict[str, dict[tuple[str, str | None], ZenoColumn]] = {}
+# Tables holding the columns of systems of all loaded projects, keyed by model.
+_system_tables: dict[str, dict[str, str]] = {}
+# Data versions of the projects at which their column maps were loaded.
+_loaded_versions: dict[str, int] = {}
+# Incremented on invalidation so that loads racing a schema change are not stored.
+_generations: dict[str, int] = {}
+
+
+def system_table(project: str, model: str) -> str:
+    """Get the name of the table that holds the columns of a system.
+
+    Args:
+        project (str): the project the system belongs to.
+        model (str): the name of the system.
+
+    Returns:
+        str: the name of the system's table.
+    """
+    return f"{project}_system_{hashlib.md5(model.encode()).hexdigest()[:16]}"
+
+
+async def load(
+    project: str,
+) -> tuple[dict[tuple[str, str | None], ZenoColumn], dict[str, str]]:
+    """Get the columns and system tables of a project, loading them if needed.
+
+    Args:
+        project (str): the project the user is currently working with.
+
+    Returns:
+        tuple[dict[tuple[str, str | None], ZenoColumn], dict[str, str]]: the
+            project's columns keyed by their name and model and the tables of the
+            project's systems keyed by model.
+    """
+    version = await data_version.current(project)
+    cached = _column_maps.get(project)
+    cached_tables = _system_tables.get(project)
+    if (
+        cached is not None
+        and cached_tables is not None
+        and _loaded_versions.get(project) == version
+    ):
+        return cached, cached_tables
+
+    generation = _generations.get(project, 0)
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                sql.SQL(
+                    "SELECT column_id, name, type, model, data_type FROM {};"
+                ).format(sql.Identifier(f"{project}_column_map"))
+            )
+            column_results = await cur.fetchall()
+            candidates = {
+                system_table(project, c[3]): c[3]
+                for c in column_results
+                if c[3] is not None
+            }
+            await cur.execute(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' "
+                "AND relname = ANY(%s);",
+                [list(candidates)],
+            )
+            table_results = await cur.fetchall()
+
+    columns = {
+        (c[1], c[3]): ZenoColumn(
+            id=c[0], name=c[1], column_type=c[2], model=c[3], data_type=c[4]
+        )
+        for c in column_results
+    }
+    tables = {candidates[t[0]]: t[0] for t in table_results}
+    if _generations.get(project, 0) == generation:
+        _column_maps[project] = columns
+        _system_tables[project] = tables
+        _loaded_versions[project] = version
+    return columns, tables
+
+
+async def column_map(project: str) -> dict[tuple[str, str | None], ZenoColumn]:
+    """Get the column map of a project, loading it from the database if needed.
+
+    Args:
+        project (str): the project the user is currently working with.
+
+    Returns:
+        dict[tuple[str, str | None], ZenoColumn]: the project's columns keyed by
+            their name and model.
+    """
+    return (await load(project))[0]
+
+
+async def system_tables(project: str) -> dict[str, str]:
+    """Get the tables holding the columns of a project's systems.
+
+    Args:
+        project (str): the project the user is currently working with.
+
+    Returns:
+        dict[str, str]: the names of the system tables keyed by model. Systems
+            stored in the dataset table are not included.
+    """
+    return (await load(project))[1]
+
+
+async def column(project: str, name: str, model: str | None) -> ZenoColumn | None:
+    """Get a column by its exact name and model.
+
+    Args:
+        project (str): the project the user is currently working with.
+        name (str): the name of the column.
+        model (str | None): the model of the column, None for dataset columns.
+
+    Returns:
+        ZenoColumn | None: the column or None if it does not exist.
+    """
+    return (await column_map(project)).get((name, model))
+
+
+async def model_or_dataset_column(
+    project: str, name: str, model: str | None
+) -> ZenoColumn | None:
+    """Get a column of a model, falling back to a dataset column of the same name.
+
+    Args:
+        project (str): the project the user is currently working with.
+        name (str): the name of the column.
+        model (str | None): the model for which to look up the column.
+
+    Returns:
+        ZenoColumn | None: the column or None if it does not exist.
+    """
+    columns = await column_map(project)
+    return columns.get((name, model), columns.get((name, None)))
+
+
+async def id_column(project: str) -> ZenoColumn | None:
+    """Get the ID column of a project.
+
+    Args:
+        project (str): the project the user is currently working with.
+
+    Returns:
+        ZenoColumn | None: the ID column or None if no dataset has been uploaded.
+    """
+    return next(
+        (
+            c
+            for c in (await column_map(project)).values()
+            if c.column_type == ZenoColumnType.ID
+        ),
+        None,
+    )
+
+
+async def data_source(
+    project: str,
+    models: list[str | None] | None = None,
+    sample: float | None = None,
+) -> sql.Composable:
+    """Get the FROM clause exposing the dataset and system columns of a project.
+
+    Args:
+        project (str): the project the user is currently working with.
+        models (list[str | None] | None, optional): the models whose columns are
+            referenced, None if columns of all models may be referenced.
+            Defaults to None.
+        sample (float | None, optional): the percentage of the dataset table's
+            pages to sample, None to read all rows. The same pages are sampled by
+            every query, so that samples of different queries agree.
+            Defaults to None.
+
+    Returns:
+        sql.Composable: the dataset table joined with the needed system tables.
+    """
+    source: sql.Composable = sql.Identifier(project)
+    if sample is not None:
+        source = source + sql.SQL(" TABLESAMPLE SYSTEM ({}) REPEATABLE (0)").format(
+            prepared.Parameter(sample)
+        )
+    tables = await system_tables(project)
+    id_col = await id_column(project)
+    if id_col is None:
+        return source
+    for model, table in tables.items():
+        if models is None or model in models:
+            source = source + sql.SQL(" LEFT JOIN {} USING ({})").format(
+                sql.Identifier(table), sql.Identifier(id_col.id)
+            )
+    return source
+
+
+def invalidate(project: str):
+    """Drop the cached column map of a project after its schema changed.
+
+    Other backend processes load the column map again once the data version of
+    the project changed.
+
+    Args:
+        project (str): the project whose column map changed.
+    """
+    _generations[project] = _generations.get(project, 0) + 1
+    _column_maps.pop(project, None)
+    _system_tables.pop(project, None)
+    _loaded_versions.pop(project, None)
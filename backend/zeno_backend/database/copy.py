@@ -9,6 +9,7 @@ from psycopg import AsyncConnection, AsyncCursor, sql
 import zeno_backend.database.select as select
 from zeno_backend.classes.project import ProjectCopy
 from zeno_backend.classes.user import User
+from zeno_backend.database import column_map
 from zeno_backend.database.database import db_pool
 
 
@@ -176,7 +177,7 @@ async def copy_data(
         await cur.execute(
             sql.SQL("CREATE TABLE {} AS (SELECT ").format(sql.Identifier(new_uuid))
             + cols
-            + sql.SQL(" FROM {});").format(sql.Identifier(old_uuid))
+            + sql.SQL(" FROM {});").format(await column_map.data_source(old_uuid))
         )
         await conn.commit()
 
@@ -0,0 +1,163 @@
+"""In-process cache of the number of rows of Zeno projects matching a filter.
+
+Slices, tags, and the instance table show how many rows of a project they contain.
+Counting them scans the project table, so exact counts are kept in memory, keyed by
+the project, its data version stored in the database, the model, and the compiled
+filter.
+
+Tables with at least `APPROXIMATE_COUNT_ROWS` rows can instead be counted
+approximately. The size of the whole table is then taken from the planner's
+statistics in `pg_class.reltuples`, and the share of rows matching a filter is
+measured on a `TABLESAMPLE SYSTEM` sample of about `COUNT_SAMPLE_ROWS` rows.
+"""
+
+import os
+from collections import OrderedDict
+
+from psycopg import sql
+
+from zeno_backend.database import column_map, data_version, prepared
+from zeno_backend.database.database import read_connection
+
+# Tables with at least this many rows may be counted approximately.
+APPROXIMATE_COUNT_ROWS = int(os.environ.get("ZENO_APPROXIMATE_COUNT_ROWS", 1000000))
+# Number of rows sampled for an approximate count.
+COUNT_SAMPLE_ROWS = int(os.environ.get("ZENO_COUNT_SAMPLE_ROWS", 100000))
+# Maximum number of exact counts kept, the least recently used are dropped.
+COUNT_CACHE_SIZE = 10000
+
+# Exact counts keyed by (project, data version, model, compiled filter).
+_counts: OrderedDict[tuple[str, int, str | None, str], int] = OrderedDict()
+
+
+def _key(
+    project: str, version: int, model: str | None, filter: sql.Composable | None
+) -> tuple[str, int, str | None, str]:
+    return (project, version, model, "" if filter is None else filter.as_string(None))
+
+
+def cached(
+    project: str, version: int, model: str | None, filter: sql.Composable | None
+) -> int | None:
+    """Get the cached exact count of the rows matching a filter.
+
+    Args:
+        project (str): the project the user is currently working with.
+        version (int): the data version of the project, see `data_version.current`.
+        model (str | None): the model the filter was compiled for.
+        filter (sql.Composable | None): the compiled filter, None for all rows.
+
+    Returns:
+        int | None: the number of matching rows or None if it is not cached.
+    """
+    key = _key(project, version, model, filter)
+    count = _counts.get(key)
+    if count is not None:
+        _counts.move_to_end(key)
+    return count
+
+
+def store(
+    project: str,
+    version: int,
+    model: str | None,
+    filter: sql.Composable | None,
+    count: int,
+):
+    """Cache the exact count of the rows matching a filter.
+
+    Args:
+        project (str): the project the user is currently working with.
+        version (int): the data version of the project when counting started.
+        model (str | None): the model the filter was compiled for.
+        filter (sql.Composable | None): the compiled filter, None for all rows.
+        count (int): the number of matching rows.
+    """
+    key = _key(project, version, model, filter)
+    _counts[key] = count
+    _counts.move_to_end(key)
+    if len(_counts) > COUNT_CACHE_SIZE:
+        _counts.popitem(last=False)
+
+
+async def sample_percent(project: str) -> tuple[float, int] | None:
+    """Get how much of a project's table to sample for approximate counts.
+
+    Args:
+        project (str): the project the user is currently working with.
+
+    Returns:
+        tuple[float, int] | None: the percentage of the table's pages to sample and
+            the estimated number of rows of the table, None if the table is small
+            enough, or was never analyzed, and should be counted exactly.
+    """
+    async with read_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE relname = %s AND relkind = 'r';",
+                [project],
+            )
+            result = await cur.fetchone()
+    rows = int(result[0]) if result is not None else -1
+    if rows < max(APPROXIMATE_COUNT_ROWS, 1):
+        return None
+    return min(100.0, 100.0 * COUNT_SAMPLE_ROWS / rows), rows
+
+
+async def count(
+    project: str,
+    filter: sql.Composed | None,
+    model: str | None = None,
+    approximate: bool = False,
+) -> tuple[int, bool]:
+    """Count the rows of a project matching a filter.
+
+    Args:
+        project (str): the project the user is currently working with.
+        filter (sql.Composed | None): the compiled filter, None for all rows.
+        model (str | None, optional): the model the filter was compiled for.
+            Defaults to None.
+        approximate (bool, optional): whether the count may be estimated if the
+            project table is large. Defaults to False.
+
+    Returns:
+        tuple[int, bool]: the number of matching rows and whether it is an
+            estimate.
+    """
+    version = await data_version.current(project)
+    exact = cached(project, version, model, filter)
+    if exact is not None:
+        return exact, False
+
+    sample = await sample_percent(project) if approximate else None
+    if sample is not None:
+        percent, rows = sample
+        if filter is None:
+            return rows, True
+        source = await column_map.data_source(project, [model], sample=percent)
+        async with read_connection() as conn:
+            async with conn.cursor() as cur:
+                await prepared.execute(
+                    cur,
+                    sql.SQL(
+                        "SELECT COUNT(*) FILTER (WHERE {}), COUNT(*) FROM {};"
+                    ).format(filter, source),
+                )
+                result = await cur.fetchone()
+        if result is not None and result[1] > 0:
+            return round(rows * result[0] / result[1]), True
+
+    source = await column_map.data_source(project, [model])
+    async with read_connection() as conn:
+        async with conn.cursor() as cur:
+            await prepared.execute(
+                cur,
+                sql.SQL("SELECT COUNT(*) FROM {}").format(source)
+                if filter is None
+                else sql.SQL("SELECT COUNT(*) FROM {} WHERE ").format(source) + filter,
+            )
+            result = await cur.fetchone()
+    exact = result[0] if result is not None and isinstance(result[0], int) else 0
+    store(project, version, model, filter, exact)
+    return exact, False
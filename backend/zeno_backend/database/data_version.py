@@ -0,0 +1,68 @@
+"""Versions of the data of Zeno projects.
+
+Results computed from a project's data, such as row counts, metrics, and column
+maps, are cached in memory keyed by the project's data version. The version is
+stored in the project's row in the `projects` table and incremented in the same
+transaction as every upload and deletion of a project's dataset or systems, so all
+backend processes serving the database stop finding results computed from the
+previous data.
+
+Each process reads the version again after at most `DATA_VERSION_TTL` seconds.
+"""
+
+import os
+import time
+
+from psycopg import AsyncCursor
+
+from zeno_backend.database.database import read_connection
+
+# Seconds a data version read from the database is reused for.
+DATA_VERSION_TTL = float(os.environ.get("ZENO_DATA_VERSION_TTL", 1))
+
+# The data version of each project with the time it has to be read again.
+_versions: dict[str, tuple[float, int]] = {}
+
+
+async def current(project: str) -> int:
+    """Get the current data version of a project.
+
+    The version is read from the same database as the project's data, so that
+    results computed from a lagging replica are cached under the version they
+    were computed from.
+
+    Args:
+        project (str): the project the user is currently working with.
+
+    Returns:
+        int: the data version, 0 for projects that do not exist.
+    """
+    cached = _versions.get(project)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    async with read_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT data_version FROM projects WHERE uuid = %s;", [project]
+            )
+            result = await cur.fetchone()
+    version = int(result[0]) if result is not None else 0
+    _versions[project] = (time.monotonic() + DATA_VERSION_TTL, version)
+    return version
+
+
+async def bump(cur: AsyncCursor, project: str):
+    """Increment the data version of a project whose data is being changed.
+
+    Has to be called in the transaction that changes the data, before it commits.
+
+    Args:
+        cur (AsyncCursor): the cursor of the transaction changing the data.
+        project (str): the project whose data is uploaded or deleted.
+    """
+    await cur.execute(
+        "UPDATE projects SET data_version = data_version + 1 WHERE uuid = %s;",
+        [project],
+    )
+    _versions.pop(project, None)
@@ -1,19 +1,106 @@
 """Functionality to interact with the database."""
 
-import asyncio
+import bisect
+import logging
 import os
+import time
+from collections.abc import AsyncIterator, Iterator
 from configparser import ConfigParser
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Any
 
-from psycopg_pool import AsyncConnectionPool
+from psycopg import AsyncConnection, OperationalError
+from psycopg_pool import AsyncConnectionPool, PoolClosed, PoolTimeout
+
+from zeno_backend.classes.monitoring import DatabaseStats, LatencyBucket, PoolStats
+from zeno_backend.database import prepared
+
+# Upper bounds in milliseconds of the buckets of the acquisition latency histogram.
+ACQUISITION_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Pool settings with their defaults, configured with a `pool_` prefixed key in the
+# database.ini or a `DB_POOL_` prefixed environment variable.
+POOL_SETTINGS: dict[str, tuple[type, Any]] = {
+    "min_size": (int, 8),
+    "max_size": (int, 16),
+    "timeout": (float, 30.0),
+    "max_waiting": (int, 0),
+    "max_lifetime": (float, 3600.0),
+    "max_idle": (float, 600.0),
+    "check": (bool, False),
+}
+# Seconds to wait for a replica connection before reading from the primary instead.
+REPLICA_TIMEOUT = float(os.environ.get("DB_REPLICA_TIMEOUT", 5))
+# Seconds to read from the primary after the replica was unavailable.
+REPLICA_RETRY = 30.0
+
+
+class ObservedConnectionPool(AsyncConnectionPool):
+    """Connection pool that records how long it takes to acquire a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        """Create a connection pool, see `AsyncConnectionPool` for the arguments.
+
+        Args:
+            *args (Any): positional arguments of `AsyncConnectionPool`.
+            **kwargs (Any): keyword arguments of `AsyncConnectionPool`.
+        """
+        super().__init__(*args, **kwargs)
+        # The last bucket counts acquisitions slower than all bucket bounds.
+        self.acquisitions = [0] * (len(ACQUISITION_BUCKETS_MS) + 1)
+        self.acquisition_ms = 0.0
+
+    async def getconn(self, timeout: float | None = None) -> AsyncConnection:
+        """Acquire a connection from the pool, recording the time it took.
+
+        Args:
+            timeout (float | None, optional): seconds to wait for a connection.
+                Defaults to the pool's timeout.
+
+        Returns:
+            AsyncConnection: the acquired connection.
+        """
+        start = time.monotonic()
+        try:
+            return await super().getconn(timeout)
+        finally:
+            elapsed = (time.monotonic() - start) * 1000
+            self.acquisition_ms += elapsed
+            self.acquisitions[bisect.bisect_left(ACQUISITION_BUCKETS_MS, elapsed)] += 1
+
+
+def pool_settings(config: dict[str, Any]) -> dict[str, Any]:
+    """Get the settings of a connection pool.
+
+    Args:
+        config (dict[str, Any]): the database configuration. Its `pool_` prefixed
+            entries are removed.
+
+    Returns:
+        dict[str, Any]: keyword arguments for the connection pool.
+    """
+    settings: dict[str, Any] = {}
+    for name, (setting_type, default) in POOL_SETTINGS.items():
+        value = config.pop(
+            f"pool_{name}", os.environ.get(f"DB_POOL_{name.upper()}", default)
+        )
+        if setting_type is bool and isinstance(value, str):
+            value = value.lower() in ("1", "true", "yes")
+        settings[name] = setting_type(value)
+    if settings.pop("check"):
+        settings["check"] = AsyncConnectionPool.check_connection
+    return settings
 
 
 def get_db_pool(
     filename: str = "zeno_backend/database/database.ini",
     section: str = "postgresql",
-) -> AsyncConnectionPool:
-    """Get the configuration of the database.
+) -> ObservedConnectionPool:
+    """Create the connection pool of the database.
+
+    The pool is not opened, see `open_pools`.
 
     Args:
         filename (str, optional): the path to the database.ini.
@@ -25,7 +112,7 @@ def get_db_pool(
         Exception: reading the configuration failed.
 
     Returns:
-        dict[str, Any]: the database configuration.
+        ObservedConnectionPool: the connection pool of the database.
     """
     if Path(filename).exists():
         parser = ConfigParser()
@@ -45,14 +132,204 @@ def get_db_pool(
         db["user"] = os.environ["DB_USER"]
         db["password"] = os.environ["DB_PASSWORD"]
 
-    pool = AsyncConnectionPool(
-        " ".join([f"{k}={v}" for k, v in db.items()]), min_size=8, max_size=16
+    settings = pool_settings(db)
+    return ObservedConnectionPool(
+        " ".join([f"{k}={v}" for k, v in db.items()]),
+        open=False,
+        name=section,
+        **settings,
     )
-    loop = asyncio.get_running_loop()
 
-    asyncio.run_coroutine_threadsafe(pool.open(), loop)
 
-    return pool
+def get_replica_pool(
+    filename: str = "zeno_backend/database/database.ini",
+    section: str = "postgresql_replica",
+) -> ObservedConnectionPool | None:
+    """Create the connection pool of the read replica, if one is configured.
+
+    The replica is configured with its own section in the database.ini or with the
+    `DB_REPLICA_HOST` environment variable. `DB_REPLICA_PORT`, `DB_REPLICA_NAME`,
+    `DB_REPLICA_USER`, and `DB_REPLICA_PASSWORD` default to the primary's settings.
+
+    Args:
+        filename (str, optional): the path to the database.ini.
+            Defaults to "zeno_backend/database/database.ini".
+        section (str, optional): which section in the database.ini to read.
+            Defaults to "postgresql_replica".
+
+    Returns:
+        ObservedConnectionPool | None: the connection pool of the replica or None.
+    """
+    if Path(filename).exists():
+        parser = ConfigParser()
+        parser.read(filename)
+        if not parser.has_section(section):
+            return None
+        db: dict[str, Any] = dict(parser.items(section))
+    elif "DB_REPLICA_HOST" in os.environ:
+        db: dict[str, Any] = {}
+        db["host"] = os.environ["DB_REPLICA_HOST"]
+        for key, name in [
+            ("port", "PORT"),
+            ("dbname", "NAME"),
+            ("user", "USER"),
+            ("password", "PASSWORD"),
+        ]:
+            db[key] = os.environ.get(f"DB_REPLICA_{name}", os.environ[f"DB_{name}"])
+    else:
+        return None
+
+    settings = pool_settings(db)
+    return ObservedConnectionPool(
+        " ".join([f"{k}={v}" for k, v in db.items()]),
+        open=False,
+        name=section,
+        **settings,
+    )
 
 
 db_pool = get_db_pool()
+replica_pool = get_replica_pool()
+# Whether reads of the current request or task have to see its own writes.
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+# Monotonic time until which the replica is skipped after it was unavailable.
+_replica_retry_at = 0.0
+
+
+async def open_pools():
+    """Open the connection pools, waiting for the primary's minimum connections.
+
+    The replica is opened in the background, reads use the primary until it is up.
+    """
+    await db_pool.open(wait=True)
+    if replica_pool is not None:
+        await replica_pool.open()
+
+
+async def close_pools():
+    """Close the connection pools."""
+    await db_pool.close()
+    if replica_pool is not None:
+        await replica_pool.close()
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Send all reads inside the block to the primary.
+
+    Use this for reads that must see writes made just before, since a replica can
+    lag behind the primary, and for reads whose results are stored in the database.
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+@asynccontextmanager
+async def connection() -> AsyncIterator[AsyncConnection]:
+    """Get a connection of the primary.
+
+    The connection is returned to the pool as soon as the block exits, so a request
+    never holds an idle connection while it waits for another one. The transaction
+    is committed when the block exits, or rolled back on an error.
+
+    Yields:
+        AsyncConnection: a connection of the primary.
+    """
+    async with db_pool.connection() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def autocommit_connection() -> AsyncIterator[AsyncConnection]:
+    """Open a separate connection of the primary in autocommit mode.
+
+    For statements that cannot run inside a transaction, like
+    `CREATE INDEX CONCURRENTLY`, and that can take too long to occupy a connection
+    of the pool. The connection is closed when the block exits.
+
+    Yields:
+        AsyncConnection: a new connection of the primary.
+    """
+    async with await AsyncConnection.connect(db_pool.conninfo, autocommit=True) as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def read_connection() -> AsyncIterator[AsyncConnection]:
+    """Get a connection for reading, from the replica if one is configured.
+
+    Falls back to the primary if reads have to see preceding writes, see
+    `primary_reads`, or if no replica connection can be acquired in time. In that
+    case the replica is skipped for `REPLICA_RETRY` seconds.
+
+    Yields:
+        AsyncConnection: a connection of the replica or the primary.
+    """
+    global _replica_retry_at
+    if (
+        replica_pool is None
+        or _primary_reads.get()
+        or time.monotonic() < _replica_retry_at
+    ):
+        async with db_pool.connection() as conn:
+            yield conn
+        return
+
+    pool = replica_pool
+    try:
+        conn = await pool.getconn(REPLICA_TIMEOUT)
+    except (PoolTimeout, PoolClosed, OperationalError) as e:
+        logging.warning(f"Reading from the primary, replica unavailable: {e}")
+        _replica_retry_at = time.monotonic() + REPLICA_RETRY
+        pool = db_pool
+        conn = await pool.getconn()
+    try:
+        async with conn:
+            yield conn
+    finally:
+        await pool.putconn(conn)
+
+
+def pool_stats(pool: ObservedConnectionPool) -> PoolStats:
+    """Get the usage statistics of a connection pool.
+
+    Args:
+        pool (ObservedConnectionPool): the pool to get the statistics of.
+
+    Returns:
+        PoolStats: the statistics of the pool.
+    """
+    stats = pool.get_stats()
+    return PoolStats(
+        name=pool.name,
+        min_size=stats.get("pool_min", 0),
+        max_size=stats.get("pool_max", 0),
+        size=stats.get("pool_size", 0),
+        available=stats.get("pool_available", 0),
+        in_use=stats.get("pool_size", 0) - stats.get("pool_available", 0),
+        waiting=stats.get("requests_waiting", 0),
+        requests=stats.get("requests_num", 0),
+        requests_queued=stats.get("requests_queued", 0),
+        requests_errors=stats.get("requests_errors", 0),
+        connections_lost=stats.get("connections_lost", 0),
+        acquisition_ms=pool.acquisition_ms,
+        acquisition_histogram=[
+            LatencyBucket(le_ms=bound, count=count)
+            for bound, count in zip([*ACQUISITION_BUCKETS_MS, None], pool.acquisitions)
+        ],
+    )
+
+
+def database_stats() -> DatabaseStats:
+    """Get the usage statistics of the database layer.
+
+    Returns:
+        DatabaseStats: the statistics of the connection pools and statements.
+    """
+    return DatabaseStats(
+        pools=[pool_stats(p) for p in (db_pool, replica_pool) if p is not None],
+        prepared_statements=prepared.stats,
+    )
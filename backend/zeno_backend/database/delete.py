@@ -1,10 +1,82 @@
 """Functions to delete data from the database."""
 
-from psycopg import sql
+import os
+
+from psycopg import AsyncCursor, sql
 
 from zeno_backend.classes.user import Author, Organization, User
+from zeno_backend.database import access, column_map, data_version, update
 from zeno_backend.database.database import db_pool
 
+# Seconds after the last staged chunk when unfinished uploads are dropped.
+UPLOAD_SESSION_TTL = int(os.environ.get("ZENO_UPLOAD_SESSION_TTL", 86400))
+
+
+async def drop_system_tables(
+    cur: AsyncCursor, project_uuid: str, system_name: str | None = None
+):
+    """Drop the tables holding the outputs of the systems of a project.
+
+    Args:
+        cur (AsyncCursor): the cursor to execute the statements with.
+        project_uuid (str): id of the project to drop system tables of.
+        system_name (str | None, optional): only drop the table of this system.
+            Defaults to None.
+    """
+    if system_name is None:
+        await cur.execute(
+            sql.SQL("SELECT DISTINCT model FROM {} WHERE model IS NOT NULL;").format(
+                sql.Identifier(f"{project_uuid}_column_map")
+            )
+        )
+        models = [m[0] for m in await cur.fetchall()]
+    else:
+        models = [system_name]
+    for model in models:
+        await cur.execute(
+            sql.SQL("DROP TABLE IF EXISTS {};").format(
+                sql.Identifier(column_map.system_table(project_uuid, model))
+            )
+        )
+
+
+async def drop_system_columns(cur: AsyncCursor, project_uuid: str, columns: list[str]):
+    """Remove system columns from the column map and the project table.
+
+    Projects copied from others keep system outputs in the project table. Only the
+    columns that actually exist there are dropped, with a single ALTER TABLE.
+
+    Args:
+        cur (AsyncCursor): the cursor to execute the statements with.
+        project_uuid (str): id of the project to drop system columns of.
+        columns (list[str]): ids of the columns to drop.
+    """
+    if len(columns) == 0:
+        return
+    await cur.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s "
+        "AND column_name = ANY(%s);",
+        [project_uuid, columns],
+    )
+    legacy_columns = [c[0] for c in await cur.fetchall()]
+    if len(legacy_columns) > 0:
+        await cur.execute(
+            sql.SQL("ALTER TABLE {} ").format(sql.Identifier(project_uuid))
+            + sql.SQL(", ").join(
+                [
+                    sql.SQL("DROP COLUMN IF EXISTS {}").format(sql.Identifier(c))
+                    for c in legacy_columns
+                ]
+            )
+        )
+    await cur.execute(
+        sql.SQL("DELETE FROM {} WHERE column_id = ANY(%s);").format(
+            sql.Identifier(f"{project_uuid}_column_map")
+        ),
+        [columns],
+    )
+
 
 async def project(project: str):
     """Deletes a project with a specific id.
@@ -17,6 +89,23 @@ async def project(project: str):
     """
     async with db_pool.connection() as conn:
         async with conn.cursor() as cur:
+            # Drop the staging tables of unfinished uploads, databases that were
+            # not migrated yet have no upload sessions.
+            await cur.execute("SELECT to_regclass('upload_sessions') IS NOT NULL;")
+            result = await cur.fetchone()
+            if result is not None and result[0]:
+                await cur.execute(
+                    "SELECT id FROM upload_sessions WHERE project_uuid = %s;",
+                    [project],
+                )
+                for session in await cur.fetchall():
+                    await cur.execute(
+                        sql.SQL("DROP TABLE IF EXISTS {};").format(
+                            sql.Identifier(f"upload_{session[0]}")
+                        )
+                    )
+            # Drop the tables with system outputs.
+            await drop_system_tables(cur, project)
             # Drop the primary table with project data.
             await cur.execute(
                 sql.SQL("DROP TABLE IF EXISTS {} CASCADE;").format(
@@ -43,6 +132,49 @@ async def project(project: str):
                 ],
             )
             await conn.commit()
+    column_map.invalidate(project)
+    access.invalidate(project)
+
+
+async def upload_session(session_id: str):
+    """Abort an upload session and drop the chunks it has staged.
+
+    Args:
+        session_id (str): the id of the upload session.
+    """
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                sql.SQL("DROP TABLE IF EXISTS {};").format(
+                    sql.Identifier(f"upload_{session_id}")
+                )
+            )
+            await cur.execute(
+                "DELETE FROM upload_sessions WHERE id = %s;", [session_id]
+            )
+            await conn.commit()
+
+
+async def expired_upload_sessions():
+    """Abort upload sessions that have not staged a chunk for `UPLOAD_SESSION_TTL`.
+
+    Sessions that are staging or committing a chunk are skipped.
+    """
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "DELETE FROM upload_sessions WHERE id IN (SELECT id FROM "
+                "upload_sessions WHERE updated_at < CURRENT_TIMESTAMP - "
+                "make_interval(secs => %s) FOR UPDATE SKIP LOCKED) RETURNING id;",
+                [UPLOAD_SESSION_TTL],
+            )
+            for session in await cur.fetchall():
+                await cur.execute(
+                    sql.SQL("DROP TABLE IF EXISTS {};").format(
+                        sql.Identifier(f"upload_{session[0]}")
+                    )
+                )
+        await conn.commit()
 
 
 async def report(report_id: int):
@@ -149,6 +281,7 @@ async def organization(organization: Organization):
                 ],
             )
             await conn.commit()
+    access.invalidate()
 
 
 async def project_user(project: str, user: User):
@@ -165,6 +298,7 @@ async def project_user(project: str, user: User):
                 [user.id, project],
             )
             await conn.commit()
+    access.invalidate(project)
 
 
 async def project_org(project: str, organization: Organization):
@@ -182,6 +316,7 @@ async def project_org(project: str, organization: Organization):
                 [organization.id, project],
             )
             await conn.commit()
+    access.invalidate(project)
 
 
 async def report_element(id: int):
@@ -256,6 +391,7 @@ async def dataset(project_uuid: str):
     """
     async with db_pool.connection() as conn:
         async with conn.cursor() as cur:
+            await drop_system_tables(cur, project_uuid)
             await cur.execute(
                 sql.SQL("DELETE FROM {};").format(
                     sql.Identifier(f"{project_uuid}_column_map")
@@ -272,9 +408,13 @@ async def dataset(project_uuid: str):
                 )
             )
             await cur.execute(
-                "UPDATE charts SET data = NULL WHERE project_uuid = %s;", [project_uuid]
+                "UPDATE charts SET data = NULL, data_generation = data_generation + 1 "
+                "WHERE project_uuid = %s;",
+                [project_uuid],
             )
+            await data_version.bump(cur, project_uuid)
             await conn.commit()
+    column_map.invalidate(project_uuid)
 
 
 async def system(project_uuid: str, system_name: str):
@@ -293,23 +433,12 @@ async def system(project_uuid: str, system_name: str):
                 [system_name],
             )
             columns = await cur.fetchall()
-            for column in columns:
-                await cur.execute(
-                    sql.SQL("ALTER TABLE {} DROP COLUMN IF EXISTS {};").format(
-                        sql.Identifier(project_uuid),
-                        sql.Identifier(column[0]),
-                    )
-                )
-                await cur.execute(
-                    sql.SQL("DELETE FROM {} WHERE column_id = %s;").format(
-                        sql.Identifier(f"{project_uuid}_column_map")
-                    ),
-                    [column[0]],
-                )
-            await cur.execute(
-                "UPDATE charts SET data = NULL WHERE project_uuid = %s;", [project_uuid]
-            )
+            await drop_system_tables(cur, project_uuid, system_name)
+            await drop_system_columns(cur, project_uuid, [c[0] for c in columns])
+            await data_version.bump(cur, project_uuid)
             await conn.commit()
+    column_map.invalidate(project_uuid)
+    await update.clear_chart_data(project_uuid, models=[system_name])
 
 
 async def systems(project_uuid: str):
@@ -326,20 +455,12 @@ async def systems(project_uuid: str):
                 )
             )
             columns = await cur.fetchall()
-            for column in columns:
-                await cur.execute(
-                    sql.SQL("ALTER TABLE {} DROP COLUMN IF EXISTS {};").format(
-                        sql.Identifier(project_uuid),
-                        sql.Identifier(column[0]),
-                    )
-                )
-                await cur.execute(
-                    sql.SQL("DELETE FROM {} WHERE column_id = %s;").format(
-                        sql.Identifier(f"{project_uuid}_column_map")
-                    ),
-                    [column[0]],
-                )
+            await drop_system_tables(cur, project_uuid)
+            await drop_system_columns(cur, project_uuid, [c[0] for c in columns])
+            await data_version.bump(cur, project_uuid)
             await conn.commit()
+    column_map.invalidate(project_uuid)
+    await update.clear_chart_data(project_uuid)
 
 
 async def chart_config(project_uuid: str, chart_id: int | None = None):
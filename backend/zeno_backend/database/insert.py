@@ -1,12 +1,16 @@
 """Functions to insert new data into Zeno's database."""
 
+import asyncio
+import hashlib
 import json
 import secrets
 import uuid
+from collections.abc import Iterator
 
+import pyarrow as pa
 from fastapi import HTTPException, status
 from pgpq import ArrowToPostgresBinaryEncoder
-from psycopg import sql
+from psycopg import AsyncCopy, sql
 from pyarrow import RecordBatch, Schema
 
 import zeno_backend.database.delete as delete
@@ -24,12 +28,15 @@ from zeno_backend.classes.filter import (
     Operation,
     PredicatesEncoder,
 )
+from zeno_backend.classes.job import Job
 from zeno_backend.classes.project import Project
 from zeno_backend.classes.report import ReportElement
 from zeno_backend.classes.slice import Slice
 from zeno_backend.classes.tag import Tag
+from zeno_backend.classes.upload import UploadSession
 from zeno_backend.classes.user import Author, Organization, User
-from zeno_backend.database.database import db_pool
+from zeno_backend.database import access, column_map, data_version
+from zeno_backend.database.database import autocommit_connection, db_pool
 from zeno_backend.database.util import hash_api_key, resolve_metadata_type
 
 
@@ -120,6 +127,7 @@ async def project(project_config: Project, owner_id: int):
                 )
 
             await conn.commit()
+    access.invalidate(project_config.uuid)
 
 
 async def dataset_schema(
@@ -178,30 +186,25 @@ async def dataset_schema(
     # Create and populate column_map table.
     async with db_pool.connection() as conn:
         async with conn.cursor() as cur:
-            for column in columns:
-                await cur.execute(
-                    sql.SQL(
-                        "INSERT INTO {} (column_id, name, type, data_type) "
-                        "VALUES (%s,%s,%s,%s);"
-                    ).format(sql.Identifier(f"{project_uuid}_column_map")),
-                    [column.id, column.name, column.column_type, column.data_type],
-                )
+            await cur.executemany(
+                sql.SQL(
+                    "INSERT INTO {} (column_id, name, type, data_type) "
+                    "VALUES (%s,%s,%s,%s);"
+                ).format(sql.Identifier(f"{project_uuid}_column_map")),
+                [
+                    [column.id, column.name, column.column_type, column.data_type]
+                    for column in columns
+                ],
+            )
 
             await cur.execute(
                 sql.SQL("CREATE TABLE IF NOT EXISTS {} (").format(
                     sql.Identifier(project_uuid)
                 )
                 + cols
-                + sql.SQL(")")
-            )
-
-            # Make ID column primary key.
-            await cur.execute(
-                sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({});").format(
-                    sql.Identifier(project_uuid),
-                    sql.Identifier(id_column),
-                )
+                + sql.SQL(", PRIMARY KEY ({}))").format(sql.Identifier(id_column))
             )
+            await cur.execute(_id_index(project_uuid, id_column))
 
             # Create table to hold information about tags and associated datapoints.
             await cur.execute(
@@ -217,18 +220,118 @@ async def dataset_schema(
                     sql.Identifier(id_column),
                 )
             )
+            await data_version.bump(cur, project_uuid)
 
+    column_map.invalidate(project_uuid)
     return [c.id for c in columns]
 
 
-async def dataset(project_uuid: str, batch: RecordBatch):
+def _id_index(project: str, id_column: str) -> sql.Composed:
+    return sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({} COLLATE numeric);").format(
+        sql.Identifier(f"{project}_id_numeric"),
+        sql.Identifier(project),
+        sql.Identifier(id_column),
+    )
+
+
+async def sort_indexes(project: str, column_ids: list[str]):
+    """Create the missing indexes for paging through a project's table.
+
+    Pages of the table are sorted by the ID column in natural order, or by another
+    column with the ID as tie-breaker. Columns of systems stored in their own table
+    are not indexed.
+
+    The indexes are built concurrently, so that uploads and other writes to the
+    table are not blocked while they are built. Indexes left invalid by an
+    interrupted build are dropped and built again.
+
+    Args:
+        project (str): the project the user is currently working with.
+        column_ids (list[str]): the columns the table is sorted by.
+    """
+    id_column = await column_map.id_column(project)
+    if id_column is None:
+        return
+    system_tables = await column_map.system_tables(project)
+    columns = [
+        c
+        for c in (await column_map.column_map(project)).values()
+        if c.id in column_ids
+        and c.id != id_column.id
+        and c.data_type != MetadataType.EMBEDDING
+        and (c.model is None or c.model not in system_tables)
+    ]
+    indexes = [
+        (
+            f"{project}_id_numeric",
+            sql.SQL("{} COLLATE numeric").format(sql.Identifier(id_column.id)),
+        )
+    ] + [
+        (
+            f"{project}_sort_{hashlib.md5(column.id.encode()).hexdigest()[:16]}",
+            sql.SQL("{}, {} COLLATE numeric").format(
+                sql.Identifier(column.id), sql.Identifier(id_column.id)
+            ),
+        )
+        for column in columns
+    ]
+    async with autocommit_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = to_regclass(quote_ident(%s)) "
+                "AND NOT i.indisvalid;",
+                [project],
+            )
+            invalid = {row[0] for row in await cur.fetchall()}
+            for name, key in indexes:
+                if name in invalid:
+                    await cur.execute(
+                        sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {};").format(
+                            sql.Identifier(name)
+                        )
+                    )
+                await cur.execute(
+                    sql.SQL(
+                        "CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({});"
+                    ).format(sql.Identifier(name), sql.Identifier(project), key)
+                )
+
+
+async def copy_batches(
+    copy: AsyncCopy,
+    encoder: ArrowToPostgresBinaryEncoder,
+    batches: Iterator[RecordBatch],
+):
+    """Stream record batches into a binary COPY, encoding one batch at a time.
+
+    Batches are read in a worker thread so that reading a large upload from disk
+    does not block the event loop.
+
+    Args:
+        copy (AsyncCopy): the COPY ... FROM STDIN WITH (FORMAT BINARY) operation.
+        encoder (ArrowToPostgresBinaryEncoder): encoder for the batches' schema.
+        batches (Iterator[RecordBatch]): the record batches to copy.
+    """
+    await copy.write(encoder.write_header())
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        await copy.write(encoder.write_batch(batch))
+    await copy.write(encoder.finish())
+
+
+async def dataset(project_uuid: str, schema: Schema, batches: Iterator[RecordBatch]):
     """Adds a dataset to an existing project.
 
     Args:
         project_uuid (str): project the user is currently working with.
-        batch (RecordBatch): dataset to be added.
+        schema (Schema): the schema of the dataset's record batches.
+        batches (Iterator[RecordBatch]): dataset to be added, one batch at a time.
     """
-    encoder = ArrowToPostgresBinaryEncoder(batch.schema)
+    encoder = ArrowToPostgresBinaryEncoder(schema)
     pg_schema = encoder.schema()
     cols = sql.SQL(",").join(
         [
@@ -239,21 +342,23 @@ async def dataset(project_uuid: str, batch: RecordBatch):
 
     async with db_pool.connection() as conn:
         async with conn.cursor() as cursor:
-            await cursor.execute("DROP TABLE IF EXISTS temp_data")
+            # The staging table is private to this connection and dropped on commit,
+            # so concurrent uploads never see each other's rows.
             await cursor.execute(
-                sql.SQL("CREATE TABLE temp_data (") + cols + sql.SQL(")")
+                sql.SQL("CREATE TEMP TABLE temp_data (")
+                + cols
+                + sql.SQL(") ON COMMIT DROP")
             )
             async with cursor.copy(
                 "COPY temp_data FROM STDIN WITH (FORMAT BINARY)"
             ) as copy:
-                await copy.write(encoder.write_header())
-                await copy.write(encoder.write_batch(batch))
-                await copy.write(encoder.finish())
+                await copy_batches(copy, encoder, batches)
             await cursor.execute(
                 sql.SQL("INSERT INTO {} SELECT * FROM temp_data").format(
                     sql.Identifier(project_uuid)
                 )
             )
+            await data_version.bump(cursor, project_uuid)
         await conn.commit()
 
 
@@ -281,14 +386,8 @@ async def system_schema(
             columns: list[ZenoColumn] = []
             for col in pa_schema:
                 if col.name == id_column:
-                    # get id column id
-                    await cur.execute(
-                        sql.SQL("SELECT column_id FROM {} WHERE type = 'ID';").format(
-                            sql.Identifier(f"{project_uuid}_column_map")
-                        )
-                    )
-                    id_col = await cur.fetchall()
-                    if id_col is None or len(id_col) == 0:
+                    id_col = await column_map.id_column(project_uuid)
+                    if id_col is None:
                         raise HTTPException(
                             status_code=400,
                             detail="No ID column found. Have you uploaded a dataset?",
@@ -296,7 +395,7 @@ async def system_schema(
 
                     columns.append(
                         ZenoColumn(
-                            id=id_col[0][0],
+                            id=id_col.id,
                             name="",
                             column_type=ZenoColumnType.ID,
                             data_type=MetadataType.OTHER,
@@ -322,103 +421,292 @@ async def system_schema(
             encoder = ArrowToPostgresBinaryEncoder(pa_schema)
             pg_schema = encoder.schema()
 
-            for i, column in enumerate(columns):
-                if column.column_type == ZenoColumnType.ID:
-                    continue
-                await cur.execute(
-                    sql.SQL(
-                        "INSERT INTO {} (column_id, name, type, data_type, model) "
-                        "VALUES (%s,%s,%s,%s,%s);"
-                    ).format(sql.Identifier(f"{project_uuid}_column_map")),
+            await cur.executemany(
+                sql.SQL(
+                    "INSERT INTO {} (column_id, name, type, data_type, model) "
+                    "VALUES (%s,%s,%s,%s,%s);"
+                ).format(sql.Identifier(f"{project_uuid}_column_map")),
+                [
                     [
                         column.id,
                         column.name,
                         column.column_type,
                         column.data_type,
                         column.model,
-                    ],
+                    ]
+                    for column in columns
+                    if column.column_type != ZenoColumnType.ID
+                ],
+            )
+
+            # Create the table holding the system's columns, keyed by the data ID.
+            await cur.execute(
+                sql.SQL("CREATE TABLE {} (").format(
+                    sql.Identifier(column_map.system_table(project_uuid, system_name))
                 )
-                await cur.execute(
-                    sql.SQL("ALTER TABLE {} ADD COLUMN IF NOT EXISTS {} ").format(
-                        sql.Identifier(project_uuid),
-                        sql.Identifier(column.id),
-                    )
-                    + sql.SQL(pg_schema.columns[i][1].data_type.ddl())
+                + sql.SQL(",").join(
+                    [
+                        sql.Identifier(column.id)
+                        + sql.SQL(" ")
+                        + sql.SQL(pg_schema.columns[i][1].data_type.ddl())
+                        + sql.SQL(
+                            " PRIMARY KEY"
+                            if column.column_type == ZenoColumnType.ID
+                            else ""
+                        )
+                        for i, column in enumerate(columns)
+                    ]
                 )
-                await conn.commit()
+                + sql.SQL(");")
+            )
+            await data_version.bump(cur, project_uuid)
+            await conn.commit()
 
+    column_map.invalidate(project_uuid)
     return [c.id for c in columns]
 
 
 async def system(
     project_uuid: str,
-    batch: RecordBatch,
+    system_name: str,
+    schema: Schema,
+    batches: Iterator[RecordBatch],
 ):
     """Adds a system to an existing project.
 
+    The system output is appended to the system's table with a single COPY.
+
     Args:
         project_uuid (str): project the user is currently working with.
         system_name (str): name of the system that produced the output.
-        batch (RecordBatch): system output to be added.
-
-    Raises:
-        HTTPException: no ID column found.
+        schema (Schema): the schema of the system output's record batches.
+        batches (Iterator[RecordBatch]): system output to be added, one batch at a
+            time.
     """
-    encoder = ArrowToPostgresBinaryEncoder(batch.schema)
-    pg_schema = encoder.schema()
-    cols = sql.SQL(",").join(
-        [
-            sql.Identifier(col_name) + sql.SQL(" ") + sql.SQL(col.data_type.ddl())
-            for col_name, col in pg_schema.columns
-        ]
-    )
-
+    encoder = ArrowToPostgresBinaryEncoder(schema)
     async with db_pool.connection() as conn:
         async with conn.cursor() as cursor:
-            await cursor.execute("DROP TABLE IF EXISTS temp_data")
-            await cursor.execute(
-                sql.SQL("CREATE TABLE temp_data (") + cols + sql.SQL(")")
-            )
             async with cursor.copy(
-                "COPY temp_data FROM STDIN WITH (FORMAT BINARY)"
+                sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT BINARY)").format(
+                    sql.Identifier(column_map.system_table(project_uuid, system_name)),
+                    sql.SQL(",").join(map(sql.Identifier, schema.names)),
+                )
             ) as copy:
-                await copy.write(encoder.write_header())
-                await copy.write(encoder.write_batch(batch))
-                await copy.write(encoder.finish())
+                await copy_batches(copy, encoder, batches)
+            await data_version.bump(cursor, project_uuid)
+        await conn.commit()
 
-            await cursor.execute(
-                sql.SQL("SELECT column_id FROM {} WHERE type = 'ID';").format(
-                    sql.Identifier(f"{project_uuid}_column_map")
+
+async def upload_session(project_uuid: str, system_name: str | None) -> UploadSession:
+    """Open a chunked upload of a dataset or system.
+
+    Chunks of the upload are staged in an unlogged table with the columns of the
+    dataset or system, which has to be created with its schema beforehand.
+
+    Args:
+        project_uuid (str): project the user is currently working with.
+        system_name (str | None): name of the system to upload, None for a dataset.
+
+    Raises:
+        HTTPException: the schema of the dataset or system has not been uploaded.
+
+    Returns:
+        UploadSession: the new upload session.
+    """
+    # The schema may have been uploaded through another backend process.
+    column_map.invalidate(project_uuid)
+    columns = [
+        c.id
+        for c in (await column_map.column_map(project_uuid)).values()
+        if c.model == system_name
+        or (system_name is not None and c.column_type == ZenoColumnType.ID)
+    ]
+    if len(columns) == 0 or (system_name is not None and len(columns) == 1):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No schema found. Upload the schema before uploading data.",
+        )
+    await delete.expired_upload_sessions()
+
+    session = UploadSession(
+        id=str(uuid.uuid4()), project_uuid=project_uuid, system_name=system_name
+    )
+    staging = sql.Identifier(f"upload_{session.id}")
+    target = (
+        project_uuid
+        if system_name is None
+        else column_map.system_table(project_uuid, system_name)
+    )
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                sql.SQL(
+                    "CREATE UNLOGGED TABLE {} AS SELECT {} FROM {} WITH NO DATA;"
+                ).format(
+                    staging,
+                    sql.SQL(",").join(map(sql.Identifier, columns)),
+                    sql.Identifier(target),
                 )
             )
-            col_id = await cursor.fetchone()
-            if col_id is None:
+            # Rows are tagged with the number of the chunk they were copied with.
+            await cur.execute(
+                sql.SQL("ALTER TABLE {} ADD COLUMN chunk integer NOT NULL;").format(
+                    staging
+                )
+            )
+            await cur.execute(
+                "INSERT INTO upload_sessions (id, project_uuid, system_name) "
+                "VALUES (%s,%s,%s);",
+                [session.id, project_uuid, system_name],
+            )
+            await conn.commit()
+    return session
+
+
+async def upload_chunk(
+    session: UploadSession,
+    chunk: int,
+    schema: Schema,
+    batches: Iterator[RecordBatch],
+):
+    """Stage a numbered chunk of an upload, replacing earlier uploads of the chunk.
+
+    Uploads of the same chunk are serialized, chunks of a session are staged
+    concurrently.
+
+    Args:
+        session (UploadSession): the upload session the chunk belongs to.
+        chunk (int): the number of the chunk.
+        schema (Schema): the schema of the chunk's record batches.
+        batches (Iterator[RecordBatch]): the data of the chunk.
+
+    Raises:
+        HTTPException: the upload session was committed, aborted, or expired.
+    """
+    chunk_schema = schema.append(pa.field("chunk", pa.int32()))
+    encoder = ArrowToPostgresBinaryEncoder(chunk_schema)
+    staging = sql.Identifier(f"upload_{session.id}")
+
+    def tagged() -> Iterator[RecordBatch]:
+        for batch in batches:
+            yield RecordBatch.from_arrays(
+                [
+                    *batch.columns,
+                    pa.array([chunk] * batch.num_rows, type=pa.int32()),
+                ],
+                schema=chunk_schema,
+            )
+
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            # Keeps the session from being committed while the chunk is staged.
+            await cur.execute(
+                "SELECT 1 FROM upload_sessions WHERE id = %s FOR KEY SHARE;",
+                [session.id],
+            )
+            if await cur.fetchone() is None:
                 raise HTTPException(
-                    status_code=400,
-                    detail="No ID column found.",
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Upload session not found.",
                 )
-            col_id = col_id[0]
+            await cur.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s), %s);", [session.id, chunk]
+            )
+            await cur.execute(
+                sql.SQL("DELETE FROM {} WHERE chunk = %s;").format(staging), [chunk]
+            )
+            async with cur.copy(
+                sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT BINARY)").format(
+                    staging, sql.SQL(",").join(map(sql.Identifier, chunk_schema.names))
+                )
+            ) as copy:
+                await copy_batches(copy, encoder, tagged())
+        await conn.commit()
+        # Touched after the chunk is staged, so that chunks do not wait for each
+        # other on the session's row.
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "UPDATE upload_sessions SET updated_at = CURRENT_TIMESTAMP "
+                "WHERE id = %s;",
+                [session.id],
+            )
+        await conn.commit()
 
-            await cursor.execute(
-                sql.SQL("UPDATE {} AS e SET ").format(sql.Identifier(project_uuid))
-                + sql.SQL(",").join(
-                    [
-                        sql.SQL("{} = COALESCE({}, {})").format(
-                            sql.Identifier(col_name),
-                            sql.Identifier("t", col_name),
-                            sql.Identifier("e", col_name),
-                        )
-                        for col_name, _ in pg_schema.columns
-                    ]
+
+async def commit_upload(session: UploadSession):
+    """Append all staged chunks of an upload to the dataset or system table.
+
+    Args:
+        session (UploadSession): the upload session to commit.
+
+    Raises:
+        HTTPException: the upload session was committed, aborted, or expired.
+    """
+    staging = f"upload_{session.id}"
+    target = (
+        session.project_uuid
+        if session.system_name is None
+        else column_map.system_table(session.project_uuid, session.system_name)
+    )
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            # Waits for chunks being staged and for concurrent commits of the session.
+            await cur.execute(
+                "SELECT 1 FROM upload_sessions WHERE id = %s FOR UPDATE;",
+                [session.id],
+            )
+            if await cur.fetchone() is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Upload session not found.",
                 )
-                + sql.SQL(" FROM temp_data AS t WHERE {} = {}").format(
-                    sql.Identifier("t", col_id),
-                    sql.Identifier("e", col_id),
+            await cur.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = %s AND column_name <> 'chunk';",
+                [staging],
+            )
+            columns = [c[0] for c in await cur.fetchall()]
+            await cur.execute(
+                sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ORDER BY chunk;").format(
+                    sql.Identifier(target),
+                    sql.SQL(",").join(map(sql.Identifier, columns)),
+                    sql.SQL(",").join(map(sql.Identifier, columns)),
+                    sql.Identifier(staging),
                 )
             )
+            await cur.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(staging)))
+            await cur.execute(
+                "DELETE FROM upload_sessions WHERE id = %s;", [session.id]
+            )
+            await data_version.bump(cur, session.project_uuid)
         await conn.commit()
 
 
+async def job(job: Job, history: int):
+    """Record a submitted precomputation job.
+
+    Only the `history` most recent jobs of the job's project are kept.
+
+    Args:
+        job (Job): the job that was submitted.
+        history (int): the number of jobs to keep for the project.
+    """
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "INSERT INTO jobs (id, project_uuid, type, status) "
+                "VALUES (%s,%s,%s,%s);",
+                [job.id, job.project_uuid, job.type, job.status],
+            )
+            await cur.execute(
+                "DELETE FROM jobs WHERE project_uuid = %s AND id NOT IN "
+                "(SELECT id FROM jobs WHERE project_uuid = %s "
+                "ORDER BY created_at DESC LIMIT %s);",
+                [job.project_uuid, job.project_uuid, history],
+            )
+            await conn.commit()
+
+
 async def report(name: str, user: User) -> int:
     """Adding a report to Zeno.
 
@@ -648,7 +936,8 @@ async def all_slices_for_column(
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL("SELECT DISTINCT {} FROM {}").format(
-                    sql.Identifier(column.id), sql.Identifier(project)
+                    sql.Identifier(column.id),
+                    await column_map.data_source(project, [column.model]),
                 )
             )
             values = await cur.fetchall()
@@ -806,6 +1095,7 @@ async def organization(user: User, organization: Organization):
                 [user.id, id[0][0], True],
             )
             await conn.commit()
+    access.invalidate()
 
 
 async def project_user(project: str, user: User):
@@ -822,6 +1112,7 @@ async def project_user(project: str, user: User):
                 "VALUES (%s,%s,%s)",
                 [user.id, project, user.admin],
             )
+    access.invalidate(project)
 
 
 async def project_org(project: str, organization: Organization):
@@ -838,6 +1129,7 @@ async def project_org(project: str, organization: Organization):
                 "(organization_id, project_uuid, editor) VALUES (%s,%s,%s)",
                 [organization.id, project, organization.admin],
             )
+    access.invalidate(project)
 
 
 async def report_user(report_id: int, user: User):
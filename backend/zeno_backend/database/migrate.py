@@ -0,0 +1,54 @@
+"""Bring the schema of existing databases up to date when the backend starts.
+
+`db/init.sql` creates the schema of new databases. Tables, columns, and indexes that
+were added to it after databases were deployed are created here as well, with
+statements that do nothing if they already exist.
+"""
+
+from zeno_backend.database.database import db_pool
+
+# Key of the advisory lock held while migrating, so that backend processes that start
+# at the same time apply the statements one after the other.
+MIGRATION_LOCK = 7_365_001
+
+STATEMENTS = [
+    "ALTER TABLE projects ADD COLUMN IF NOT EXISTS "
+    "data_version bigint NOT NULL DEFAULT 0;",
+    "ALTER TABLE charts ADD COLUMN IF NOT EXISTS "
+    "data_generation bigint NOT NULL DEFAULT 0;",
+    "CREATE TABLE IF NOT EXISTS upload_sessions ("
+    "id text PRIMARY KEY, "
+    "project_uuid text NOT NULL REFERENCES projects(uuid) "
+    "ON DELETE CASCADE ON UPDATE CASCADE, "
+    "system_name text, "
+    "created_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP);",
+    "ALTER TABLE upload_sessions ADD COLUMN IF NOT EXISTS "
+    "updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP;",
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    "id text PRIMARY KEY, "
+    "project_uuid text NOT NULL REFERENCES projects(uuid) "
+    "ON DELETE CASCADE ON UPDATE CASCADE, "
+    "type text NOT NULL, "
+    "status text NOT NULL, "
+    "error text, "
+    "created_at timestamp NOT NULL DEFAULT clock_timestamp(), "
+    "updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP);",
+    "CREATE INDEX IF NOT EXISTS jobs_project_uuid_created_at_idx "
+    "ON jobs (project_uuid, created_at);",
+    "CREATE INDEX IF NOT EXISTS user_project_project_uuid_user_id_idx "
+    "ON user_project (project_uuid, user_id);",
+    "CREATE INDEX IF NOT EXISTS user_organization_user_id_organization_id_idx "
+    "ON user_organization (user_id, organization_id);",
+    "CREATE INDEX IF NOT EXISTS organization_project_project_uuid_organization_id_idx "
+    "ON organization_project (project_uuid, organization_id);",
+]
+
+
+async def migrate():
+    """Apply the schema changes that the database is missing."""
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT pg_advisory_xact_lock(%s);", [MIGRATION_LOCK])
+            for statement in STATEMENTS:
+                await cur.execute(statement)
+        await conn.commit()
@@ -0,0 +1,107 @@
+"""Execution of the recurring query shapes as prepared statements.
+
+Filters, metrics, histograms, and table pages are composed with `psycopg.sql`. Values
+that change between requests are wrapped in `Parameter` instead of `sql.Literal`.
+`execute` sends them as bind parameters, so that a query shape always has the same
+text and psycopg can prepare it once per pooled connection and reuse its plan.
+Anywhere else a `Parameter` renders as a plain literal, so composed filters can still
+be embedded in any statement.
+"""
+
+from typing import Any
+
+from psycopg import AsyncCursor, errors, sql
+from psycopg.abc import AdaptContext
+
+from zeno_backend.classes.base import CamelModel
+
+
+class Parameter(sql.Literal):
+    """A value that is sent as a bind parameter when executed with `execute`."""
+
+    def __init__(self, value: Any):
+        """Wrap a value of a query.
+
+        Args:
+            value (Any): the value, adapted by psycopg like any query parameter.
+        """
+        super().__init__(value)
+        self.value = value
+
+
+class PreparedStatementStats(CamelModel):
+    """Usage of the prepared statements of all pooled connections.
+
+    Attributes:
+        hits (int): executions that reused a statement prepared on the connection.
+        misses (int): executions that had to prepare their statement first.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+
+stats = PreparedStatementStats()
+
+
+def parameterize(
+    query: sql.Composable, context: AdaptContext | None = None
+) -> tuple[str, list[Any]]:
+    """Turn the parameters of a composed query into placeholders.
+
+    Args:
+        query (sql.Composable): the query to convert.
+        context (AdaptContext | None, optional): the connection or cursor to render
+            the query for. Defaults to None.
+
+    Returns:
+        tuple[str, list[Any]]: the query text and the values of its placeholders.
+    """
+    params: list[Any] = []
+
+    def render(node: sql.Composable) -> str:
+        if isinstance(node, Parameter):
+            params.append(node.value)
+            return "%s"
+        if isinstance(node, sql.Composed):
+            return "".join(render(n) for n in node)
+        return node.as_string(context).replace("%", "%%")
+
+    return render(query), params
+
+
+async def execute(cur: AsyncCursor, query: sql.Composable) -> AsyncCursor:
+    """Execute a read query as a prepared statement of the cursor's connection.
+
+    If a table changed its columns since the statement was prepared, postgres
+    refuses to run it. The transaction, which only ran reads, is then rolled back,
+    which also drops the prepared statements of the connection, and the query is
+    prepared again.
+
+    Whether the statement was already prepared is taken from psycopg's cache of
+    the connection, which psycopg clears on rollbacks and schema changes.
+
+    Args:
+        cur (AsyncCursor): the cursor to execute the query with.
+        query (sql.Composable): the query, with its values wrapped in `Parameter`.
+
+    Returns:
+        AsyncCursor: the cursor, ready to fetch the results.
+    """
+    statement, params = parameterize(query, cur)
+    conn = cur.connection
+    prepared_before = conn._prepared._prepared_idx
+    try:
+        await cur.execute(statement, params, prepare=True)
+    except errors.FeatureNotSupported as e:
+        if "cached plan" not in str(e):
+            raise
+        await conn.rollback()
+        prepared_before = conn._prepared._prepared_idx
+        await cur.execute(statement, params, prepare=True)
+    # psycopg numbers the statements it prepares, a new number is a miss.
+    if conn._prepared._prepared_idx > prepared_before:
+        stats.misses += 1
+    else:
+        stats.hits += 1
+    return cur
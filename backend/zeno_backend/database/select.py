@@ -1,16 +1,19 @@
 """Functions to select data from the database."""
 
-import asyncio
 import json
+from collections.abc import AsyncIterator
+from typing import Any
 
 from fastapi import HTTPException, status
 from psycopg import sql
+from pyarrow import RecordBatch
 
 from zeno_backend.classes.base import MetadataType, ZenoColumn, ZenoColumnType
 from zeno_backend.classes.chart import Chart, ChartConfig
 from zeno_backend.classes.filter import FilterPredicateGroup, Join, Operation
 from zeno_backend.classes.folder import Folder
 from zeno_backend.classes.homepage import EntrySort, HomeRequest
+from zeno_backend.classes.job import Job
 from zeno_backend.classes.metadata import HistogramBucket, StringFilterRequest
 from zeno_backend.classes.metric import Metric
 from zeno_backend.classes.project import (
@@ -34,11 +37,27 @@ from zeno_backend.classes.table import (
     TagTableRequest,
 )
 from zeno_backend.classes.tag import Tag
+from zeno_backend.classes.upload import UploadSession
 from zeno_backend.classes.user import Author, Organization, User
-from zeno_backend.database.database import db_pool
-from zeno_backend.database.util import hash_api_key, match_instance_view
+from zeno_backend.database import column_map, counts, prepared
+from zeno_backend.database.database import (
+    connection,
+    primary_reads,
+    read_connection,
+)
+from zeno_backend.database.util import (
+    arrow_batch,
+    arrow_schema,
+    decode_page_token,
+    encode_page_token,
+    hash_api_key,
+    match_instance_view,
+)
 from zeno_backend.processing.filtering import table_filter
-from zeno_backend.processing.histogram_processing import calculate_histogram_bucket
+from zeno_backend.processing.histogram_processing import calculate_histogram_buckets
+
+# Rows per record batch when streaming table data as Arrow.
+TABLE_BATCH_ROWS = 1000
 
 PROJECTS_BASE_QUERY = sql.SQL(
     """
@@ -109,7 +128,7 @@ async def models(project: str) -> list[str]:
     Returns:
         list[str]: a list of model names included in the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
@@ -174,7 +193,7 @@ async def projects(
     projects_query += sql.SQL(" OFFSET %s; ")
     params += [home_request.project_offset]
 
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(projects_query, params)
             projects_result = await cur.fetchall()
@@ -245,7 +264,7 @@ async def public_projects(home_request: HomeRequest) -> list[Project]:
         + sql.SQL(") AS main LEFT JOIN users AS u ON main.owner_id = u.id)")
     )
 
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(projects_query, params)
             projects_result = await cur.fetchall()
@@ -321,7 +340,7 @@ async def reports(
     reports_query += sql.SQL(" OFFSET %s; ")
     params += [home_request.report_offset]
 
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(reports_query, params)
             reports_result = await cur.fetchall()
@@ -397,7 +416,7 @@ async def public_reports(home_request: HomeRequest) -> list[Report]:
         + sql.SQL(") AS main LEFT JOIN users AS u ON main.owner_id = u.id")
     )
 
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(reports_query, params)
             reports_result = await cur.fetchall()
@@ -440,7 +459,7 @@ async def project_count(user: User | None = None) -> int:
     Returns:
         int: the number of projects.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             if user is None:
                 await cur.execute("SELECT COUNT(*) FROM projects WHERE public = TRUE;")
@@ -467,7 +486,7 @@ async def report_count(user: User | None = None) -> int:
     Returns:
         int: the number of reports.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             if user is None:
                 await cur.execute("SELECT COUNT(*) FROM reports WHERE public = TRUE;")
@@ -492,7 +511,7 @@ async def project_uuid(owner_name: str, project_name: str) -> str:
     Returns:
         str | None: uuid of the requested project.
     """
-    async with db_pool.connection() as conn:
+    async with connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT id FROM users WHERE name = %s;", [owner_name])
             owner_id = await cur.fetchall()
@@ -520,7 +539,7 @@ async def project_public(project_uuid: str) -> bool:
     Returns:
         bool: whether the project is public.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT public FROM projects WHERE uuid = %s;", [project_uuid]
@@ -539,7 +558,7 @@ async def report_public(report: int) -> bool:
     Returns:
         bool: whether the report is public.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT public FROM reports WHERE id = %s;", [report])
             public = await cur.fetchall()
@@ -556,7 +575,7 @@ async def api_key_exists(api_key: str) -> bool:
         bool: whether the API key exists.
     """
     api_key_hash = hash_api_key(api_key)
-    async with db_pool.connection() as conn:
+    async with connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT EXISTS(SELECT 1 FROM users WHERE api_key_hash = %s);",
@@ -584,7 +603,7 @@ async def user_by_api_key(api_key: str) -> User:
         int | None: the user ID of the user with the given API key.
     """
     api_key_hash = hash_api_key(api_key)
-    async with db_pool.connection() as conn:
+    async with connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, display_name, cognito_id FROM users "
@@ -617,7 +636,7 @@ async def user_name_by_api_key(api_key: str) -> str | None:
         str | None: the user name of the user with the given API key.
     """
     api_key_hash = hash_api_key(api_key)
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT name FROM users WHERE api_key_hash = %s;", [api_key_hash]
@@ -635,7 +654,7 @@ async def project_uuid_exists(project_uuid: str) -> bool:
     Returns:
         bool: whether the project exists.
     """
-    async with db_pool.connection() as conn:
+    async with connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT EXISTS(SELECT 1 FROM projects WHERE uuid = %s);", [project_uuid]
@@ -661,7 +680,7 @@ async def project_exists(owner_id: int, project_name: str) -> bool:
     Raises:
         Exception: something went wrong while checking whether the project exists.
     """
-    async with db_pool.connection() as conn:
+    async with connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT EXISTS(SELECT 1 FROM projects WHERE name = %s"
@@ -687,7 +706,7 @@ async def report_id(owner: str, name: str) -> int | None:
     Returns:
         int | None: the ID of the report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT id FROM users WHERE name = %s;", [owner])
             owner_id = await cur.fetchall()
@@ -711,7 +730,7 @@ async def report_response(id: int, user: User | None) -> ReportResponse:
     Returns:
         ReportResponse | None: the data for the requested report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, owner_id, public, description, created_at, "
@@ -833,7 +852,7 @@ async def charts_for_projects(project_uuids: list[str]) -> list[Chart]:
     Returns:
         list[Chart]: the list of charts.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
@@ -869,7 +888,7 @@ async def tags_for_projects(project_uuids: list[str]) -> list[Tag]:
     Returns:
         list[Tag]: the list of tags.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
@@ -906,7 +925,7 @@ async def slices_for_projects(project_uuids: list[str]) -> list[Slice]:
     Returns:
         list[Slice]: the list of slices.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
@@ -945,7 +964,7 @@ async def project_from_uuid(project_uuid: str) -> Project:
     Returns:
         Project | None: data for the requested project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT uuid, name, owner_id, view, "
@@ -996,7 +1015,7 @@ async def report_from_id(report_id: int) -> Report:
     Returns:
         Report | None: data for the requested report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, owner_id, public, description, created_at, "
@@ -1053,7 +1072,7 @@ async def report_elements(report_id: int) -> list[ReportElement] | None:
     Returns:
         list[ReportElement] | None: list of elements in the report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, type, data, position FROM report_elements "
@@ -1085,7 +1104,7 @@ async def report_authors(report_id: int) -> list[Author]:
     Returns:
         list[User]: list of authors in the report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT user_id, position FROM report_author WHERE report_id = %s;",
@@ -1112,7 +1131,7 @@ async def project_state(
     Returns:
         ProjectState | None: state variables of the requested project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, type, columns FROM metrics WHERE project_uuid = %s;",
@@ -1302,7 +1321,7 @@ async def project_stats(project_uuid: str, user_id: int | None = None) -> Projec
     Returns:
         ProjectStats | None: statistics of the specified project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT EXISTS (SELECT FROM information_schema.tables WHERE "
@@ -1371,7 +1390,7 @@ async def report_stats(report_id: int, user_id: int | None = None) -> ReportStat
     Returns:
         ReportStats | None: statistics of the specified report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT COUNT(*) FROM report_project WHERE report_id = %s;",
@@ -1418,7 +1437,7 @@ async def metrics(project_uuid: str) -> list[Metric]:
     Returns:
         list[Metric]: list of metrics used with the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, type, columns FROM metrics WHERE project_uuid = %s "
@@ -1451,7 +1470,7 @@ async def metrics_by_id(
     Returns:
         list[Metric]: list of metrics as requested by the user.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
@@ -1487,7 +1506,7 @@ async def slice(slice_id: int) -> Slice:
     Raises:
         HTTPException: slice could not be found.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, folder_id, filter, project_uuid FROM slices "
@@ -1522,7 +1541,7 @@ async def tag(tag_id: int) -> Tag:
     Returns:
         Tag | None: tag as requested by the user.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, folder_id, project_uuid FROM tags WHERE id = %s;",
@@ -1566,7 +1585,7 @@ async def folders(project: str) -> list[Folder]:
     Returns:
         list[Folder]: list of folders created in the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, project_uuid FROM folders WHERE project_uuid = %s;",
@@ -1595,7 +1614,7 @@ async def folder(id: int) -> Folder:
     Raises:
         HTTPException: folder could not be found.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, project_uuid FROM folders WHERE id = %s;",
@@ -1629,7 +1648,7 @@ async def slices(project: str, ids: list[int] | None = None) -> list[Slice]:
     if ids is not None and len(ids) == 0:
         return []
 
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             if ids is None:
                 await cur.execute(
@@ -1678,7 +1697,7 @@ async def chart(chart_id: int) -> Chart:
     Returns:
         Chart: the requested chart.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, type, parameters, data, project_uuid FROM "
@@ -1711,7 +1730,7 @@ async def chart_data(chart_id: int) -> str | None:
     Returns:
         str | None: chart data.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT data FROM charts WHERE id = %s",
@@ -1728,6 +1747,27 @@ async def chart_data(chart_id: int) -> str | None:
     return json.dumps(chart_result[0][0]) if chart_result[0][0] is not None else None
 
 
+async def chart_data_generation(chart_id: int) -> int:
+    """Get the data generation of a chart, which changes when its data is cleared.
+
+    Read from the primary before computing the chart's data, see
+    `update.chart_data`.
+
+    Args:
+        chart_id (int): ID of the chart.
+
+    Returns:
+        int: the data generation of the chart, 0 if the chart does not exist.
+    """
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT data_generation FROM charts WHERE id = %s;", [chart_id]
+            )
+            result = await cur.fetchone()
+    return result[0] if result is not None else 0
+
+
 async def charts(project_uuid: str) -> list[Chart]:
     """Get a list of all charts created in the project.
 
@@ -1737,7 +1777,7 @@ async def charts(project_uuid: str) -> list[Chart]:
     Returns:
         list[Chart]: list of all the charts in the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, type, parameters FROM charts WHERE project_uuid = %s"
@@ -1762,6 +1802,129 @@ async def charts(project_uuid: str) -> list[Chart]:
     )
 
 
+async def charts_without_data(project_uuid: str) -> list[tuple[Chart, int]]:
+    """Get all charts of a project whose data has not been computed.
+
+    Args:
+        project_uuid (str): the project the user is currently working with.
+
+    Returns:
+        list[tuple[Chart, int]]: the charts without chart data, with their data
+            generation to store the computed data with.
+    """
+    async with read_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT id, name, type, parameters, data_generation FROM charts "
+                "WHERE project_uuid = %s AND data IS NULL ORDER BY created_at;",
+                [
+                    project_uuid,
+                ],
+            )
+            chart_results = await cur.fetchall()
+
+    return list(
+        map(
+            lambda chart: (
+                Chart(
+                    id=chart[0],
+                    name=chart[1],
+                    project_uuid=project_uuid,
+                    type=chart[2],
+                    parameters=json.loads(chart[3]),
+                ),
+                chart[4],
+            ),
+            chart_results,
+        )
+    )
+
+
+async def job(job_id: str) -> Job | None:
+    """Get a precomputation job by its id.
+
+    Args:
+        job_id (str): the id of the job.
+
+    Returns:
+        Job | None: the job or None if it does not exist.
+    """
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT id, project_uuid, type, status, error FROM jobs "
+                "WHERE id = %s;",
+                [job_id],
+            )
+            job_result = await cur.fetchone()
+    if job_result is None:
+        return None
+    return Job(
+        id=job_result[0],
+        project_uuid=job_result[1],
+        type=job_result[2],
+        status=job_result[3],
+        error=job_result[4],
+    )
+
+
+async def jobs(project_uuid: str) -> list[Job]:
+    """Get the recent precomputation jobs of a project.
+
+    Args:
+        project_uuid (str): the project to get jobs for.
+
+    Returns:
+        list[Job]: the jobs of the project, oldest first.
+    """
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT id, project_uuid, type, status, error FROM jobs "
+                "WHERE project_uuid = %s ORDER BY created_at;",
+                [project_uuid],
+            )
+            job_results = await cur.fetchall()
+    return [
+        Job(id=j[0], project_uuid=j[1], type=j[2], status=j[3], error=j[4])
+        for j in job_results
+    ]
+
+
+async def upload_session(session_id: str) -> UploadSession | None:
+    """Get an open upload session and the chunks it has staged.
+
+    Args:
+        session_id (str): the id of the upload session.
+
+    Returns:
+        UploadSession | None: the upload session or None if it does not exist.
+    """
+    # Staging tables are unlogged, so they cannot be read on a replica.
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT project_uuid, system_name FROM upload_sessions WHERE id = %s;",
+                [session_id],
+            )
+            session_result = await cur.fetchone()
+            if session_result is None:
+                return None
+            await cur.execute(
+                sql.SQL("SELECT DISTINCT chunk FROM {} ORDER BY chunk;").format(
+                    sql.Identifier(f"upload_{session_id}")
+                )
+            )
+            chunk_results = await cur.fetchall()
+
+    return UploadSession(
+        id=session_id,
+        project_uuid=session_result[0],
+        system_name=session_result[1],
+        chunks=[c[0] for c in chunk_results],
+    )
+
+
 async def columns(project: str) -> list[ZenoColumn]:
     """Get a list of all columns in the project's data table.
 
@@ -1771,7 +1934,7 @@ async def columns(project: str) -> list[ZenoColumn]:
     Returns:
         list[ZenoColumn]: list of all the project's data columns.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
@@ -1798,49 +1961,245 @@ async def columns(project: str) -> list[ZenoColumn]:
 async def histogram_buckets(
     project_uuid: str, columns: list[ZenoColumn]
 ) -> dict[str, list[HistogramBucket]]:
-    """Get the histogram buckets for a column or create if they don't exist.
+    """Get the histogram buckets for columns, computing the ones that are missing.
+
+    Buckets are stored in the column map once computed. The missing ones are
+    computed together, see `calculate_histogram_buckets`.
 
     Args:
         project_uuid (str): the project the user is currently working with.
-        columns (list[ZenoColumn]): the column to get histogram buckets for.
+        columns (list[ZenoColumn]): the columns to get histogram buckets for.
 
     Returns:
         dict[str, list[HistogramBucket]]: the histogram buckets for the given columns.
     """
-    async with db_pool.connection() as conn:
+    async with connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL(
-                    "SELECT column_id, histogram FROM {} WHERE "
-                    + "column_id IN ({}) ORDER BY name;"
-                ).format(
-                    sql.Identifier(f"{project_uuid}_column_map"),
-                    sql.SQL(",").join(map(sql.Literal, [c.id for c in columns])),
-                )
+                    "SELECT column_id, histogram FROM {} WHERE column_id = ANY(%s) "
+                    "AND histogram IS NOT NULL;"
+                ).format(sql.Identifier(f"{project_uuid}_column_map")),
+                [[c.id for c in columns]],
+            )
+            histograms = {
+                hist[0]: [HistogramBucket.model_validate(b) for b in hist[1]]
+                for hist in await cur.fetchall()
+            }
+
+    missing = [c for c in columns if c.id not in histograms]
+    if len(missing) == 0:
+        return histograms
+
+    # The buckets are stored, compute them from the primary's data.
+    with primary_reads():
+        computed = await calculate_histogram_buckets(project_uuid, missing)
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.executemany(
+                sql.SQL("UPDATE {} SET histogram = %s WHERE column_id = %s;").format(
+                    sql.Identifier(f"{project_uuid}_column_map")
+                ),
+                [
+                    (json.dumps([h.model_dump(mode="json") for h in hist]), col_id)
+                    for col_id, hist in computed.items()
+                ],
             )
+    histograms.update(computed)
+    return histograms
+
+
+async def _table_columns(
+    project: str,
+    model: str | None,
+    requested: list[ZenoColumn] | None,
+    exclude_embeddings: bool = False,
+) -> sql.Composable:
+    """Get the columns to select for a page of a project's table.
+
+    These are the requested columns, the ID, DATA, and LABEL columns, and the
+    OUTPUT columns of the model, as far as they exist in the project.
+
+    Args:
+        project (str): the project the user is currently working with.
+        model (str | None): the model whose outputs are shown.
+        requested (list[ZenoColumn] | None): the columns shown in the table, None
+            to select all columns.
+        exclude_embeddings (bool, optional): whether to leave out embedding
+            columns. Defaults to False.
+
+    Returns:
+        sql.Composable: the comma separated columns.
+    """
+    if requested is None and not exclude_embeddings:
+        return sql.SQL("*")
+
+    requested_ids = None if requested is None else {c.id for c in requested}
+    columns = [
+        c
+        for c in (await column_map.column_map(project)).values()
+        if (
+            requested_ids is None
+            or c.id in requested_ids
+            or (
+                c.model is None
+                and c.column_type
+                in (ZenoColumnType.ID, ZenoColumnType.DATA, ZenoColumnType.LABEL)
+            )
+            or (c.model == model and c.column_type == ZenoColumnType.OUTPUT)
+        )
+        and not (exclude_embeddings and c.data_type == MetadataType.EMBEDDING)
+    ]
+    return sql.SQL(", ").join([sql.Identifier(c.id) for c in columns])
+
 
-            histograms = await cur.fetchall()
-            if None in [h[1] for h in histograms]:
-                histograms = await asyncio.gather(
-                    *[calculate_histogram_bucket(project_uuid, col) for col in columns]
+async def _table_page_query(
+    project: str,
+    filter_sql: sql.Composed | None,
+    req: TableRequest,
+) -> tuple[sql.Composed, list[str]]:
+    diff_expression = None
+    if req.diff_column_1 is not None and req.diff_column_2 is not None:
+        if req.diff_column_1.data_type == MetadataType.CONTINUOUS:
+            diff_expression = sql.SQL("{} - {}")
+        elif req.diff_column_1.data_type == MetadataType.BOOLEAN:
+            diff_expression = sql.SQL("{}::int - {}::int")
+        else:
+            diff_expression = sql.SQL("{} != {}")
+        diff_expression = diff_expression.format(
+            sql.Identifier(req.diff_column_1.id),
+            sql.Identifier(req.diff_column_2.id),
+        )
+    diff_sql = sql.SQL("")
+    if diff_expression is not None:
+        diff_sql = sql.SQL(", {} AS diff").format(diff_expression)
+
+    # Collate does natural sort,
+    # (https://www.postgresql.org/docs/11/collation.html#id-1.6.10.4.5.7.5)
+    # See: https://dbfiddle.uk/cptUkufH
+    id_column = await column_map.id_column(project)
+    id_sql = (
+        None
+        if id_column is None
+        else sql.SQL("{} COLLATE numeric").format(sql.Identifier(id_column.id))
+    )
+    requested = req.columns
+    sort_sql = None
+    sort_key = None
+    descending = bool(req.sort[1]) if req.sort[0] else False
+    if req.sort[0]:
+        sort_key = req.sort[0].id
+        if sort_key == "":
+            sort_key = "diff"
+            sort_sql = (
+                sql.Identifier(sort_key) if diff_expression is None else diff_expression
+            )
+        else:
+            sort_sql = sql.Identifier(sort_key)
+            requested = [*requested, req.sort[0]] if requested else requested
+
+    direction = sql.SQL("DESC" if descending else "ASC")
+    order = [
+        sql.SQL("{} {}").format(e, direction)
+        for e in (sort_sql, id_sql)
+        if e is not None
+    ]
+    order_sql = sql.SQL("")
+    if len(order) > 0:
+        order_sql = sql.SQL("ORDER BY ") + sql.SQL(", ").join(order)
+
+    conditions = [] if filter_sql is None else [filter_sql]
+    offset = req.offset
+    if req.page_token is not None and id_sql is not None:
+        key = decode_page_token(req.page_token, [sort_key, descending])
+        conditions.append(_seek_condition(sort_sql, id_sql, descending, key))
+        offset = 0
+    filter = sql.SQL("")
+    if len(conditions) > 0:
+        filter = sql.SQL("WHERE ") + sql.SQL(" AND ").join(
+            [sql.SQL("({})").format(c) for c in conditions]
+        )
+
+    query = sql.SQL(" ").join(
+        [
+            sql.SQL("SELECT {}").format(
+                await _table_columns(
+                    project,
+                    req.model,
+                    # Clients that request no columns get all of them.
+                    requested or None,
+                    req.exclude_embeddings,
                 )
-                histograms = {col.id: histograms[i] for i, col in enumerate(columns)}
-                for col_id, hist in histograms.items():
-                    await cur.execute(
-                        sql.SQL(
-                            "UPDATE {} SET histogram = %s WHERE column_id = %s"
-                        ).format(sql.Identifier(f"{project_uuid}_column_map")),
-                        (
-                            json.dumps([h.model_dump(mode="json") for h in hist]),
-                            col_id,
-                        ),
-                    )
-                return histograms
-            else:
-                return {
-                    hist[0]: [HistogramBucket.model_validate(b) for b in hist[1]]
-                    for hist in histograms
-                }
+            ),
+            diff_sql,
+            sql.SQL("FROM {}").format(await column_map.data_source(project)),
+            filter,
+            order_sql,
+            sql.SQL("LIMIT {} OFFSET {};").format(
+                prepared.Parameter(req.limit), prepared.Parameter(offset)
+            ),
+        ]
+    )
+    key_columns = []
+    if id_column is not None:
+        key_columns = [id_column.id] if sort_key is None else [sort_key, id_column.id]
+    return query, key_columns
+
+
+def _seek_condition(
+    sort_sql: sql.Composable | None,
+    id_sql: sql.Composable,
+    descending: bool,
+    key: list[Any],
+) -> sql.Composable:
+    """Get the condition selecting the rows after a key of a sorted table.
+
+    NULLs of the sort column come last in ascending and first in descending order.
+    """
+    if sort_sql is None:
+        return sql.SQL("{} > {}").format(id_sql, prepared.Parameter(key[-1]))
+
+    value, last_id = key
+    operator = sql.SQL("<" if descending else ">")
+    after_id = sql.SQL("{} {} {}").format(id_sql, operator, prepared.Parameter(last_id))
+    if value is None:
+        condition = sql.SQL("{} IS NULL AND {}").format(sort_sql, after_id)
+        if descending:
+            condition = sql.SQL("{} OR {} IS NOT NULL").format(condition, sort_sql)
+        return condition
+
+    condition = sql.SQL("({}, {}) {} ({}, {})").format(
+        sort_sql,
+        id_sql,
+        operator,
+        prepared.Parameter(value),
+        prepared.Parameter(last_id),
+    )
+    if not descending:
+        condition = sql.SQL("{} OR {} IS NULL").format(condition, sort_sql)
+    return condition
+
+
+def _next_page_token(
+    req: TableRequest,
+    columns: list[str],
+    key_columns: list[str],
+    count: int,
+    last_row: tuple | None,
+) -> str | None:
+    if count < req.limit or last_row is None or len(key_columns) == 0:
+        return None
+    sort_key = None
+    if req.sort[0]:
+        sort_key = req.sort[0].id or "diff"
+    try:
+        return encode_page_token(
+            [sort_key, bool(req.sort[1]) if req.sort[0] else False],
+            [last_row[columns.index(c)] for c in key_columns],
+        )
+    except TypeError:
+        # Tables sorted by values a token cannot hold are paged by offset.
+        return None
 
 
 async def table_data_paginated(
@@ -1850,6 +2209,9 @@ async def table_data_paginated(
 ) -> SQLTable:
     """Get a slice of the data saved in the project table.
 
+    The slice starts after the row of `req.page_token` if it is given, otherwise
+    at `req.offset`.
+
     Args:
         project (str): the project the user is currently working with.
         filter_sql (sql.Composed | None): filter to apply before fetching a slice of
@@ -1862,77 +2224,73 @@ async def table_data_paginated(
     Returns:
         SQLTable: the resulting slice of the data as requested by the user.
     """
-    filter_results = None
     columns = []
+    final_statement, key_columns = await _table_page_query(project, filter_sql, req)
+    async with read_connection() as conn:
+        async with conn.cursor() as cur:
+            await prepared.execute(cur, final_statement)
 
-    diff_sql = sql.SQL("")
-    if req.diff_column_1 is not None and req.diff_column_2 is not None:
-        if req.diff_column_1.data_type == MetadataType.CONTINUOUS:
-            diff_sql = sql.SQL(", {} - {} AS diff").format(
-                sql.Identifier(req.diff_column_1.id),
-                sql.Identifier(req.diff_column_2.id),
-            )
-        elif req.diff_column_1.data_type == MetadataType.BOOLEAN:
-            diff_sql = sql.SQL(", {}::int - {}::int AS diff").format(
-                sql.Identifier(req.diff_column_1.id),
-                sql.Identifier(req.diff_column_2.id),
-            )
-        else:
-            diff_sql = sql.SQL(", {} != {} AS diff").format(
-                sql.Identifier(req.diff_column_1.id),
-                sql.Identifier(req.diff_column_2.id),
-            )
+            if cur.description is not None:
+                columns = [desc[0] for desc in cur.description]
+            filter_results = await cur.fetchall()
+    return SQLTable(
+        table=filter_results,
+        columns=columns,
+        next_page_token=_next_page_token(
+            req,
+            columns,
+            key_columns,
+            len(filter_results),
+            filter_results[-1] if filter_results else None,
+        ),
+    )
 
-    filter = sql.SQL("")
-    if filter_sql is not None:
-        filter = sql.SQL("WHERE ") + filter_sql
 
-    order_sql = sql.SQL("")
-    async with db_pool.connection() as conn:
-        async with conn.cursor() as cur:
-            if req.sort[0]:
-                sort = req.sort[0].id
-                if sort == "":
-                    sort = "diff"
+async def table_data_arrow(
+    project: str,
+    filter_sql: sql.Composed | None,
+    req: TableRequest,
+    batch_size: int = TABLE_BATCH_ROWS,
+) -> AsyncIterator[tuple[RecordBatch, dict[str, str] | None]]:
+    """Stream a slice of the data saved in the project table as Arrow batches.
 
-                order_sql = sql.SQL("ORDER BY {} {}").format(
-                    sql.Identifier(sort),
-                    sql.SQL("DESC" if req.sort[1] else "ASC"),
-                )
-            else:
-                await cur.execute(
-                    sql.SQL("SELECT column_id FROM {} WHERE type = 'ID';").format(
-                        sql.Identifier(f"{project}_column_map")
-                    ),
-                )
-                id_column = await cur.fetchall()
-                if len(id_column) > 0:
-                    id_column = id_column[0][0]
-                    # Collate does natural sort,
-                    # (https://www.postgresql.org/docs/11/collation.html#id-1.6.10.4.5.7.5)
-                    # See: https://dbfiddle.uk/cptUkufH
-                    order_sql = sql.SQL("ORDER BY {} COLLATE numeric ASC").format(
-                        sql.Identifier(id_column)
-                    )
+    The rows are read with a server-side cursor, so that no more than `batch_size`
+    rows are held in memory at once. The slice starts after the row of
+    `req.page_token` if it is given, otherwise at `req.offset`.
 
-            final_statement = sql.SQL(" ").join(
-                [
-                    sql.SQL("SELECT *"),
-                    diff_sql,
-                    sql.SQL("FROM {}").format(sql.Identifier(project)),
-                    filter,
-                    order_sql,
-                    sql.SQL("LIMIT {} OFFSET {};").format(
-                        sql.Literal(req.limit), sql.Literal(req.offset)
-                    ),
-                ]
-            )
-            await cur.execute(final_statement)
+    Args:
+        project (str): the project the user is currently working with.
+        filter_sql (sql.Composed | None): filter to apply before fetching a slice of
+            the data.
+        req (TableRequest): the request for the given table slice.
+        batch_size (int, optional): the number of rows per batch.
+            Defaults to TABLE_BATCH_ROWS.
 
-            if cur.description is not None:
-                columns = [desc[0] for desc in cur.description]
-            filter_results = await cur.fetchall()
-            return SQLTable(table=filter_results, columns=columns)
+    Yields:
+        tuple[RecordBatch, dict[str, str] | None]: the rows of the slice, at least
+            one possibly empty batch. The metadata of the last batch holds the
+            `next_page_token` if there may be more rows.
+    """
+    final_statement, key_columns = await _table_page_query(project, filter_sql, req)
+    async with read_connection() as conn:
+        async with conn.cursor(name="table_page") as cur:
+            await cur.execute(final_statement)
+            schema = arrow_schema(cur)
+            count = 0
+            last_row = None
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                count += len(rows)
+                last_row = rows[-1] if rows else last_row
+                if len(rows) == batch_size:
+                    yield arrow_batch(schema, rows), None
+                    continue
+                token = _next_page_token(
+                    req, schema.names, key_columns, count, last_row
+                )
+                metadata = None if token is None else {"next_page_token": token}
+                yield arrow_batch(schema, rows), metadata
+                break
 
 
 async def slice_element_options(
@@ -1949,7 +2307,7 @@ async def slice_element_options(
     Returns:
         SliceElementOptions | None: options for the slice element.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT uuid, name, view, samples_per_page, public, description, "
@@ -1970,17 +2328,6 @@ async def slice_element_options(
                 ),
             )
 
-            if filter is not None:
-                await cur.execute(
-                    sql.SQL("SELECT COUNT(*) FROM {} WHERE ").format(
-                        sql.Identifier(project_uuid)
-                    )
-                    + filter
-                )
-                slice_size = await cur.fetchall()
-            else:
-                slice_size = [[0]]
-
             await cur.execute(
                 sql.SQL(
                     "SELECT column_id, type FROM {} WHERE model = %s OR model IS NULL;"
@@ -1989,6 +2336,10 @@ async def slice_element_options(
             )
             column_names = await cur.fetchall()
 
+    slice_size = 0
+    if filter is not None:
+        slice_size, _ = await counts.count(project_uuid, filter, system_name)
+
     id_column = ""
     data_column = None
     label_column = None
@@ -2005,7 +2356,7 @@ async def slice_element_options(
 
     return SliceElementOptions(
         slice_name=slice.slice_name,
-        slice_size=slice_size[0][0] if len(slice_size) > 0 else 0,
+        slice_size=slice_size,
         id_column=id_column,
         data_column=data_column,
         label_column=label_column,
@@ -2036,7 +2387,7 @@ async def tag_element_options(
     Returns:
         TagElementOptions | None: options for the tag element.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL("SELECT data_id FROM {} WHERE tag_id = %s").format(
@@ -2069,17 +2420,6 @@ async def tag_element_options(
                 data_ids=[tag_id[0] for tag_id in tag_ids],
             )
 
-            if filter is not None:
-                await cur.execute(
-                    sql.SQL("SELECT COUNT(*) FROM {} WHERE ").format(
-                        sql.Identifier(project_uuid)
-                    )
-                    + filter
-                )
-                tag_size = await cur.fetchall()
-            else:
-                tag_size = [[0]]
-
             await cur.execute(
                 sql.SQL(
                     "SELECT column_id, type FROM {} WHERE model = %s OR model IS NULL;"
@@ -2088,6 +2428,10 @@ async def tag_element_options(
             )
             column_names = await cur.fetchall()
 
+    tag_size = 0
+    if filter is not None:
+        tag_size, _ = await counts.count(project_uuid, filter, system_name)
+
     id_column = ""
     data_column = None
     label_column = None
@@ -2104,7 +2448,7 @@ async def tag_element_options(
 
     return TagElementOptions(
         tag_name=tag.tag_name,
-        tag_size=tag_size[0][0] if len(tag_size) > 0 else 0,
+        tag_size=tag_size,
         id_column=id_column,
         data_column=data_column,
         label_column=label_column,
@@ -2148,19 +2492,22 @@ async def slice_or_tag_table(
     if filter_sql is not None:
         filter = sql.SQL("WHERE ") + filter_sql
 
+    # Slices and tags are shown with their instance view only.
     final_statement = sql.SQL(" ").join(
         [
-            sql.SQL("SELECT *"),
-            sql.SQL("FROM {}").format(sql.Identifier(project_uuid)),
+            sql.SQL("SELECT {}").format(
+                await _table_columns(project_uuid, req.model, [], True)
+            ),
+            sql.SQL("FROM {}").format(await column_map.data_source(project_uuid)),
             filter,
             sql.SQL("LIMIT {} OFFSET {};").format(
-                sql.Literal(req.limit), sql.Literal(req.offset)
+                prepared.Parameter(req.limit), prepared.Parameter(req.offset)
             ),
         ]
     )
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute(final_statement)
+            await prepared.execute(cur, final_statement)
 
             if cur.description is not None:
                 columns = [desc[0] for desc in cur.description]
@@ -2188,12 +2535,13 @@ async def slice_instance_ids(
     final_statement = sql.SQL(" ").join(
         [
             sql.SQL("SELECT {} FROM {}").format(
-                sql.Identifier(id_column.id), sql.Identifier(project_uuid)
+                sql.Identifier(id_column.id),
+                await column_map.data_source(project_uuid),
             ),
             filter,
         ]
     )
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(final_statement)
             return list(map(lambda res: str(res[0]), await cur.fetchall()))
@@ -2212,7 +2560,7 @@ async def table_data(project: str, filter_sql: sql.Composed | None) -> SQLTable:
     Returns:
         SQLTable: the filtered data table for the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             filter_results = None
             columns = []
@@ -2220,7 +2568,7 @@ async def table_data(project: str, filter_sql: sql.Composed | None) -> SQLTable:
                 if cur is not None:
                     await cur.execute(
                         sql.SQL("SELECT * FROM {};").format(
-                            sql.Identifier(f"{project}")
+                            await column_map.data_source(project)
                         ),
                     )
                     if cur.description is not None:
@@ -2230,7 +2578,7 @@ async def table_data(project: str, filter_sql: sql.Composed | None) -> SQLTable:
                 if cur is not None:
                     await cur.execute(
                         sql.SQL("SELECT * FROM {} WHERE ").format(
-                            sql.Identifier(project)
+                            await column_map.data_source(project)
                         )
                         + filter_sql
                     )
@@ -2259,18 +2607,21 @@ async def column(
         list[str | int | float | bool]: the data that is stored in the requested
             column.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             if filter_sql is None:
-                await cur.execute(
+                await prepared.execute(
+                    cur,
                     sql.SQL("SELECT {} FROM {}").format(
-                        sql.Identifier(column.id), sql.Identifier(project)
+                        sql.Identifier(column.id),
+                        await column_map.data_source(project, [column.model]),
                     ),
                 )
             else:
-                await cur.execute(
+                await prepared.execute(
+                    cur,
                     sql.SQL("SELECT {} FROM {} WHERE ").format(
-                        sql.Identifier(column.id), sql.Identifier(project)
+                        sql.Identifier(column.id), await column_map.data_source(project)
                     )
                     + filter_sql,
                 )
@@ -2290,7 +2641,7 @@ async def tags(project: str) -> list[Tag]:
     Returns:
         list[Tag]: the list of tags associated with a project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, folder_id FROM tags WHERE project_uuid = %s",
@@ -2334,7 +2685,7 @@ async def user(name: str) -> User | None:
     Returns:
         User | None: the requested user.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, display_name, cognito_id FROM users WHERE name = %s",
@@ -2361,7 +2712,7 @@ async def user_by_id(id: int) -> User:
     Args:
         id (int): the id of the user to fetch.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT id, name, display_name, cognito_id FROM users WHERE id = %s",
@@ -2391,7 +2742,7 @@ async def users() -> list[User]:
     Returns:
         list[User]: all registered users.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT id, name, display_name, cognito_id FROM users;")
             users = await cur.fetchall()
@@ -2413,7 +2764,7 @@ async def organizations() -> list[Organization]:
     Returns:
         list[Organization]: all organizations in the database.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT id, name FROM organizations;")
             organizations = await cur.fetchall()
@@ -2437,7 +2788,7 @@ async def user_organizations(user: User) -> list[Organization]:
         list[Organization]: all organizations the user is a member of.
     """
     organizations: list[Organization] = []
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT o.id, o.name, uo.admin FROM organizations AS o "
@@ -2484,7 +2835,7 @@ async def project_users(project: str) -> list[User]:
     Returns:
         list[User]: the list of users who can access the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT u.id, u.name, u.display_name, up.editor FROM users as u "
@@ -2514,7 +2865,7 @@ async def report_users(report_id: int) -> list[User]:
     Returns:
         list[User]: the list of users who can access the report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT u.id, u.name, u.display_name, ur.editor FROM users as u "
@@ -2543,7 +2894,7 @@ async def report_owner(report_id: int) -> User:
     Returns:
         User: the owner of the report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT u.id, u.name, u.display_name FROM users as u "
@@ -2575,7 +2926,7 @@ async def project_orgs(project: str) -> list[Organization]:
     Returns:
         list[Organization]: the list of organizations who can access the project.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT o.id, o.name, op.editor FROM organizations as o "
@@ -2601,7 +2952,7 @@ async def report_orgs(report_id: int) -> list[Organization]:
     Returns:
         list[Organization]: the list of organizations who can access the report.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "SELECT o.id, o.name, orep.editor FROM organizations as o "
@@ -2633,12 +2984,12 @@ async def filtered_short_string_column_values(
     if req.operation == Operation.LIKE or req.operation == Operation.ILIKE:
         req.filter_string = "%" + req.filter_string + "%"
 
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL("SELECT {} from {} WHERE {} {} %s;").format(
                     sql.Identifier(req.column.id),
-                    sql.Identifier(project),
+                    await column_map.data_source(project, [req.column.model]),
                     sql.Identifier(req.column.id),
                     sql.SQL(req.operation.literal()),
                 ),
@@ -2677,7 +3028,7 @@ async def system_exists(project_uuid: str, system_name: str) -> bool:
     Raises:
         HTTPException: something went wrong while checking whether the system exists.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 sql.SQL("SELECT EXISTS(SELECT 1 FROM {} " "WHERE model = %s);").format(
@@ -2704,7 +3055,7 @@ async def chart_config(
     Returns:
         ChartConfig | None: the config if there is one, otherwise None.
     """
-    async with db_pool.connection() as conn:
+    async with read_connection() as conn:
         async with conn.cursor() as cur:
             if chart_id is None:
                 await cur.execute(
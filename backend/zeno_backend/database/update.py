@@ -12,13 +12,16 @@ from zeno_backend.classes.chart import (
 )
 from zeno_backend.classes.filter import PredicatesEncoder
 from zeno_backend.classes.folder import Folder
+from zeno_backend.classes.job import Job
 from zeno_backend.classes.metric import Metric
 from zeno_backend.classes.project import Project
 from zeno_backend.classes.report import Report, ReportElement
 from zeno_backend.classes.slice import Slice
 from zeno_backend.classes.tag import Tag
 from zeno_backend.classes.user import Author, Organization, User
-from zeno_backend.database.database import db_pool
+from zeno_backend.database import access, select
+from zeno_backend.database.database import db_pool, primary_reads
+from zeno_backend.processing.chart_dependencies import depends_on
 
 
 async def folder(folder: Folder, project: str):
@@ -69,7 +72,8 @@ async def chart(chart: Chart, project: str):
         async with conn.cursor() as cur:
             await cur.execute(
                 "UPDATE charts SET project_uuid = %s, name = %s, type = %s, "
-                "parameters = %s, data = NULL, updated_at = CURRENT_TIMESTAMP "
+                "parameters = %s, data = NULL, data_generation = data_generation + 1, "
+                "updated_at = CURRENT_TIMESTAMP "
                 "WHERE id = %s;",
                 [
                     project,
@@ -81,37 +85,98 @@ async def chart(chart: Chart, project: str):
             )
 
 
-async def chart_data(chart_id: int, data: str):
+async def chart_data(chart_id: int, data: str, generation: int):
     """Add chart data to chart entry.
 
+    The data is only stored if the chart's data was not invalidated since it was
+    computed, so that data computed from changed slices, metrics, or uploads is
+    discarded by all backend processes.
+
     Args:
         chart_id (int): the chart id.
         data (str): the chart data to use for the update.
+        generation (int): the data generation of the chart read before the data
+            was computed, see `select.chart_data_generation`.
     """
     async with db_pool.connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
-                "UPDATE charts SET data = %s WHERE id = %s;",
+                "UPDATE charts SET data = %s WHERE id = %s AND data_generation = %s;",
                 [
                     data,
                     chart_id,
+                    generation,
                 ],
             )
 
 
-async def clear_chart_data(project_uuid: str):
-    """Set chart data from all charts for a given project to NULL.
+async def clear_histograms(project_uuid: str):
+    """Set the cached histogram buckets of all columns of a project to NULL.
+
+    Args:
+        project_uuid (str): the id of the project to null histograms from.
+    """
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                sql.SQL("UPDATE {} SET histogram = NULL;").format(
+                    sql.Identifier(f"{project_uuid}_column_map")
+                )
+            )
+            await conn.commit()
+
+
+async def clear_chart_data(
+    project_uuid: str,
+    slices: list[int] | None = None,
+    metrics: list[int] | None = None,
+    models: list[str] | None = None,
+):
+    """Set chart data of a project's charts to NULL.
+
+    The data generation of the charts is incremented, so that data that is being
+    computed from their previous state is not stored.
+
+    If slices, metrics, or models are given, only the data of charts that reference
+    one of them is cleared. Otherwise, the data of all charts of the project is
+    cleared.
 
     Args:
         project_uuid (str): the id of the project to null chart data from.
+        slices (list[int] | None, optional): ids of slices that changed.
+            Defaults to None.
+        metrics (list[int] | None, optional): ids of metrics that changed.
+            Defaults to None.
+        models (list[str] | None, optional): names of models that changed.
+            Defaults to None.
     """
+    if slices is None and metrics is None and models is None:
+        async with db_pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "UPDATE charts SET data = NULL, "
+                    "data_generation = data_generation + 1 WHERE project_uuid = %s;",
+                    [
+                        project_uuid,
+                    ],
+                )
+                await conn.commit()
+        return
+
+    # A lagging replica could miss charts that were just created or edited.
+    with primary_reads():
+        charts = await select.charts(project_uuid)
+    chart_ids = [
+        chart.id for chart in charts if depends_on(chart, slices, metrics, models)
+    ]
+    if len(chart_ids) == 0:
+        return
     async with db_pool.connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
-                "UPDATE charts SET data = NULL WHERE project_uuid = %s;",
-                [
-                    project_uuid,
-                ],
+                "UPDATE charts SET data = NULL, data_generation = data_generation + 1 "
+                "WHERE id = ANY(%s);",
+                [chart_ids],
             )
             await conn.commit()
 
@@ -246,6 +311,7 @@ async def organization(organization: Organization):
                     [user.admin, user.id, organization.id],
                 )
             await conn.commit()
+    access.invalidate()
 
 
 async def project(project_config: Project):
@@ -304,6 +370,7 @@ async def project_metrics(project_config: Project):
                 )
             )
             new_metrics = project_config.metrics
+            deleted_metrics: list[int] = []
 
             for metric in metrics:
                 # check if the metric matches one to be added
@@ -324,13 +391,7 @@ async def project_metrics(project_config: Project):
                         "DELETE FROM metrics WHERE project_uuid = %s AND id = %s;",
                         [project_config.uuid, metric.id],
                     )
-                    # also reset chart data since definition changed
-                    await cur.execute(
-                        "UPDATE charts SET data = NULL WHERE project_uuid = %s;",
-                        [
-                            project_config.uuid,
-                        ],
-                    )
+                    deleted_metrics.append(metric.id)
 
                 # if there is a match, we don't have to add the metric
                 else:
@@ -344,6 +405,26 @@ async def project_metrics(project_config: Project):
                 )
             await conn.commit()
 
+    # reset chart data of charts whose metric definitions changed
+    if len(deleted_metrics) > 0:
+        await clear_chart_data(project_config.uuid, metrics=deleted_metrics)
+
+
+async def job(job: Job):
+    """Update the status of a precomputation job.
+
+    Args:
+        job (Job): the job with its new status.
+    """
+    async with db_pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "UPDATE jobs SET status = %s, error = %s, "
+                "updated_at = CURRENT_TIMESTAMP WHERE id = %s;",
+                [job.status, job.error, job.id],
+            )
+            await conn.commit()
+
 
 async def report(report: Report):
     """Update a report's configuration.
@@ -401,6 +482,7 @@ async def project_user(project: str, user: User):
                 " AND user_id = %s;",
                 [user.admin, project, user.id],
             )
+    access.invalidate(project)
 
 
 async def project_org(project: str, organization: Organization):
@@ -417,6 +499,7 @@ async def project_org(project: str, organization: Organization):
                 "AND organization_id = %s;",
                 [organization.admin, project, organization.id],
             )
+    access.invalidate(project)
 
 
 async def report_element(element: ReportElement):
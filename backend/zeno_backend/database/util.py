@@ -1,12 +1,19 @@
 """Utility functions for database operations."""
 
+import base64
+import datetime
 import hashlib
+import io
 import json
+from collections.abc import AsyncIterator, Callable, Iterator
+from decimal import Decimal
 from pathlib import Path
+from typing import Any, BinaryIO
 
 import pyarrow as pa
 from fastapi import HTTPException
-from pyarrow import DataType
+from psycopg import AsyncCursor, AsyncServerCursor
+from pyarrow import DataType, RecordBatch, Schema
 
 from zeno_backend.classes.base import MetadataType
 
@@ -35,6 +42,190 @@ def resolve_metadata_type(d: DataType) -> MetadataType:
     return MetadataType.OTHER
 
 
+def record_batches(source: BinaryIO) -> tuple[Schema, Iterator[RecordBatch]]:
+    """Read the record batches of an Arrow IPC file or stream one at a time.
+
+    Only the batch that is currently being consumed is held in memory.
+
+    Args:
+        source (BinaryIO): seekable file object containing the Arrow IPC data.
+
+    Returns:
+        tuple[Schema, Iterator[RecordBatch]]: the schema of the data and an iterator
+            over its record batches.
+    """
+    magic = source.read(6)
+    source.seek(0)
+    if magic == b"ARROW1":
+        file_reader = pa.ipc.open_file(source)
+        return file_reader.schema, (
+            file_reader.get_batch(i) for i in range(file_reader.num_record_batches)
+        )
+    stream_reader = pa.ipc.open_stream(source)
+    return stream_reader.schema, iter(stream_reader)
+
+
+# Arrow types of postgres types, columns of other types are converted to strings.
+ARROW_TYPES: dict[str, DataType] = {
+    "bool": pa.bool_(),
+    "int2": pa.int16(),
+    "int4": pa.int32(),
+    "int8": pa.int64(),
+    "float4": pa.float32(),
+    "float8": pa.float64(),
+    "text": pa.string(),
+    "varchar": pa.string(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("us"),
+    "timestamptz": pa.timestamp("us", tz="UTC"),
+}
+
+
+def arrow_schema(cur: AsyncCursor | AsyncServerCursor) -> Schema:
+    """Get the Arrow schema of the result of a query.
+
+    Arrays of supported types become lists, e.g. the embeddings of a dataset.
+
+    Args:
+        cur (AsyncCursor | AsyncServerCursor): the cursor that executed the query.
+
+    Returns:
+        Schema: the schema of the rows of the cursor.
+    """
+    fields = []
+    for column in cur.description or []:
+        info = cur.adapters.types.get(column.type_code)
+        arrow_type = ARROW_TYPES.get(info.name, pa.string()) if info else pa.string()
+        if info is not None and info.array_oid == column.type_code:
+            arrow_type = (
+                pa.list_(arrow_type) if info.name in ARROW_TYPES else pa.string()
+            )
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _arrow_value(value: Any) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, dict | list):
+        return json.dumps(value)
+    return str(value)
+
+
+def arrow_batch(schema: Schema, rows: list[tuple]) -> RecordBatch:
+    """Convert rows of a query result to an Arrow record batch.
+
+    Args:
+        schema (Schema): the schema of the rows, see `arrow_schema`.
+        rows (list[tuple]): the rows to convert.
+
+    Returns:
+        RecordBatch: the rows as a record batch.
+    """
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_string(field.type):
+            values = [_arrow_value(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def arrow_stream(
+    batches: AsyncIterator[tuple[RecordBatch, dict[str, str] | None]],
+) -> AsyncIterator[bytes]:
+    """Encode record batches as an Arrow IPC stream.
+
+    Args:
+        batches (AsyncIterator[tuple[RecordBatch, dict[str, str] | None]]): the
+            batches to encode, all with the same schema, and their custom metadata.
+
+    Yields:
+        bytes: the encoded stream, one chunk per batch.
+    """
+    sink = io.BytesIO()
+    writer = None
+    async for batch, metadata in batches:
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch, custom_metadata=metadata)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+# Types of sort values that JSON cannot represent, with their decoders. Checked in
+# order, since a datetime is also a date.
+PAGE_TOKEN_TYPES: list[tuple[str, type, Callable[[str], Any]]] = [
+    ("datetime", datetime.datetime, datetime.datetime.fromisoformat),
+    ("date", datetime.date, datetime.date.fromisoformat),
+    ("time", datetime.time, datetime.time.fromisoformat),
+    ("decimal", Decimal, Decimal),
+]
+
+
+def _encode_token_value(value: Any) -> dict[str, str]:
+    for name, value_type, _ in PAGE_TOKEN_TYPES:
+        if isinstance(value, value_type):
+            return {"$type": name, "value": str(value)}
+    raise TypeError(f"Cannot encode a {type(value).__name__} in a page token.")
+
+
+def _decode_token_value(value: dict[str, Any]) -> Any:
+    for name, _, decode in PAGE_TOKEN_TYPES:
+        if value.get("$type") == name:
+            return decode(value["value"])
+    return value
+
+
+def encode_page_token(sort: list[Any], key: list[Any]) -> str:
+    """Encode the position after a page of a sorted table as an opaque token.
+
+    Values that JSON cannot represent, like timestamps and decimals, are encoded
+    with their type, so that they are compared as the type of their column again.
+
+    Args:
+        sort (list[Any]): the sort column and whether it is descending.
+        key (list[Any]): the sort value and the ID of the last row of the page.
+
+    Returns:
+        str: the token for the next page.
+    """
+    token = json.dumps({"sort": sort, "key": key}, default=_encode_token_value)
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+
+def decode_page_token(token: str, sort: list[Any]) -> list[Any]:
+    """Decode a token of `encode_page_token`.
+
+    Args:
+        token (str): the token of the previous page.
+        sort (list[Any]): the sort column and whether it is descending, which must
+            be the sort of the previous page.
+
+    Raises:
+        HTTPException: the token is malformed or belongs to a different sort.
+
+    Returns:
+        list[Any]: the sort value and the ID of the last row of the previous page.
+    """
+    try:
+        decoded = json.loads(
+            base64.urlsafe_b64decode(token.encode()),
+            object_hook=_decode_token_value,
+        )
+        if decoded["sort"] == sort and isinstance(decoded["key"], list):
+            return decoded["key"]
+    except (ValueError, TypeError, KeyError):
+        pass
+    raise HTTPException(
+        status_code=400, detail="Page token does not match the requested table."
+    )
+
+
 def hash_api_key(api_key: str) -> str:
     """Hash an API key.
 
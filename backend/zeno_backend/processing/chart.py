@@ -1,6 +1,11 @@
 """Functions for extracting chart data from SQL."""
 
+import asyncio
+import bisect
 import json
+import logging
+import time
+from itertools import product
 from typing import Any
 
 from zeno_backend.classes.chart import (
@@ -15,11 +20,43 @@ from zeno_backend.classes.chart import (
     XCParameters,
 )
 from zeno_backend.classes.filter import FilterPredicateGroup, Join
-from zeno_backend.classes.metric import Metric
+from zeno_backend.classes.metric import Metric, MetricCell
+from zeno_backend.classes.monitoring import ChartStats, LatencyBucket
 from zeno_backend.classes.slice import Slice
+from zeno_backend.database import select, update
 from zeno_backend.database.select import metrics, models, slices
-from zeno_backend.processing.filtering import table_filter
-from zeno_backend.processing.metrics.map import metric_map
+from zeno_backend.processing.metrics.batch import metric_batch
+
+# Upper bounds in milliseconds of the buckets of the chart latency histogram.
+CHART_LATENCY_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# Chart data computations of this process, keyed by chart type.
+stats: dict[ChartType, ChartStats] = {}
+
+
+def record_chart(chart_type: ChartType, cells: int, elapsed_ms: float):
+    """Record the latency and number of cells of a chart data computation.
+
+    Args:
+        chart_type (ChartType): the type of the chart.
+        cells (int): the number of cells computed.
+        elapsed_ms (float): the time the computation took in milliseconds.
+    """
+    chart_stats = stats.get(chart_type)
+    if chart_stats is None:
+        chart_stats = ChartStats(
+            type=chart_type,
+            latency_histogram=[
+                LatencyBucket(le_ms=bound, count=0)
+                for bound in [*CHART_LATENCY_BUCKETS_MS, None]
+            ],
+        )
+        stats[chart_type] = chart_stats
+    chart_stats.computations += 1
+    chart_stats.cells += cells
+    chart_stats.duration_ms += elapsed_ms
+    bucket = bisect.bisect_left(CHART_LATENCY_BUCKETS_MS, elapsed_ms)
+    chart_stats.latency_histogram[bucket].count += 1
 
 
 async def get_selected_slices(chart_slices: list[int], project: str) -> list[Slice]:
@@ -86,7 +123,7 @@ async def get_selected_models(chart_models: list[str], project: str) -> list[str
     return chart_models
 
 
-async def xyc_data(chart: Chart, project: str) -> str:
+async def xyc_data(chart: Chart, project: str) -> list[dict[str, Any]]:
     """Generate data for a chart that is based on x, y, and color values.
 
     Args:
@@ -94,42 +131,51 @@ async def xyc_data(chart: Chart, project: str) -> str:
         project (str): the project the user is currently working with
 
     Returns:
-        str: the chart data in JSON representation.
+        list[dict[str, Any]]: the elements of the chart data.
     """
     elements: list[dict[str, Any]] = []
     if not (isinstance(chart.parameters, XCParameters)):
-        return json.dumps({"table": elements})
+        return elements
 
-    all_metrics = await metrics(project)
+    all_metrics, selected_slices, selected_models = await asyncio.gather(
+        metrics(project),
+        get_selected_slices(chart.parameters.slices, project),
+        get_selected_models(chart.parameters.models, project),
+    )
     selected_metric = next(
         (x for x in all_metrics if x.id == chart.parameters.metric),
         Metric(id=-1, name="count", type="count", columns=[]),
     )
-    selected_slices = await get_selected_slices(chart.parameters.slices, project)
-    selected_models = await get_selected_models(chart.parameters.models, project)
-    for current_slice in selected_slices:
-        for model in selected_models:
-            filter_sql = await table_filter(
-                project, model, current_slice.filter_predicates
-            )
-            metric = await metric_map(selected_metric, project, model, filter_sql)
-            elements.append(
-                {
-                    "x_value": current_slice.slice_name
-                    if chart.parameters.x_channel == SlicesOrModels.SLICES
-                    else model,
-                    "color_value": model
-                    if chart.parameters.color_channel == SlicesOrModels.MODELS
-                    else current_slice.slice_name,
-                    "y_value": metric.metric,
-                    "size": metric.size,
-                }
+    grid = list(product(selected_slices, selected_models))
+    results = await metric_batch(
+        project,
+        [
+            MetricCell(
+                metric=selected_metric,
+                model=model,
+                filter_predicates=current_slice.filter_predicates,
             )
+            for current_slice, model in grid
+        ],
+    )
+    for (current_slice, model), metric in zip(grid, results):
+        elements.append(
+            {
+                "x_value": current_slice.slice_name
+                if chart.parameters.x_channel == SlicesOrModels.SLICES
+                else model,
+                "color_value": model
+                if chart.parameters.color_channel == SlicesOrModels.MODELS
+                else current_slice.slice_name,
+                "y_value": metric.metric,
+                "size": metric.size,
+            }
+        )
 
-    return json.dumps({"table": elements})
+    return elements
 
 
-async def table_data(chart: Chart, project: str) -> str:
+async def table_data(chart: Chart, project: str) -> list[dict[str, Any]]:
     """Generate data for a tabular visualization.
 
     Args:
@@ -137,41 +183,49 @@ async def table_data(chart: Chart, project: str) -> str:
         project (str): the project the user is currently working with
 
     Returns:
-        str: the chart data in JSON representation.
+        list[dict[str, Any]]: the elements of the chart data.
     """
     elements: list[dict[str, Any]] = []
     params = chart.parameters
     if not isinstance(params, TableParameters):
-        return json.dumps({"table": elements})
-    selected_metrics = await get_selected_metrics(params.metrics, project)
-    selected_slices = await get_selected_slices(params.slices, project)
-    selected_models = await get_selected_models(params.models, project)
-
-    for current_metric in selected_metrics:
-        for current_slice in selected_slices:
-            for model in selected_models:
-                filter_sql = await table_filter(
-                    project, model, current_slice.filter_predicates
-                )
-                metric = await metric_map(current_metric, project, model, filter_sql)
-                elements.append(
-                    {
-                        "x_value": current_slice.id
-                        if params.x_channel == SlicesMetricsOrModels.SLICES
-                        else model
-                        if params.x_channel == SlicesMetricsOrModels.MODELS
-                        else current_metric.id,
-                        "fixed_value": metric.metric,
-                        "y_value": current_slice.id
-                        if params.y_channel == SlicesOrModels.SLICES
-                        else model,
-                        "size": metric.size,
-                    }
-                )
-    return json.dumps({"table": elements})
+        return elements
+    selected_metrics, selected_slices, selected_models = await asyncio.gather(
+        get_selected_metrics(params.metrics, project),
+        get_selected_slices(params.slices, project),
+        get_selected_models(params.models, project),
+    )
 
+    grid = list(product(selected_metrics, selected_slices, selected_models))
+    results = await metric_batch(
+        project,
+        [
+            MetricCell(
+                metric=current_metric,
+                model=model,
+                filter_predicates=current_slice.filter_predicates,
+            )
+            for current_metric, current_slice, model in grid
+        ],
+    )
+    for (current_metric, current_slice, model), metric in zip(grid, results):
+        elements.append(
+            {
+                "x_value": current_slice.id
+                if params.x_channel == SlicesMetricsOrModels.SLICES
+                else model
+                if params.x_channel == SlicesMetricsOrModels.MODELS
+                else current_metric.id,
+                "fixed_value": metric.metric,
+                "y_value": current_slice.id
+                if params.y_channel == SlicesOrModels.SLICES
+                else model,
+                "size": metric.size,
+            }
+        )
+    return elements
 
-async def beeswarm_data(chart: Chart, project: str) -> str:
+
+async def beeswarm_data(chart: Chart, project: str) -> list[dict[str, Any]]:
     """Generate data for a beeswarm visualization.
 
     Args:
@@ -179,40 +233,48 @@ async def beeswarm_data(chart: Chart, project: str) -> str:
         project (str): the project the user is currently working with
 
     Returns:
-        str: the chart data in JSON representation.
+        list[dict[str, Any]]: the elements of the chart data.
     """
     elements: list[dict[str, Any]] = []
     params = chart.parameters
     if not (isinstance(params, BeeswarmParameters)):
-        return json.dumps({"table": elements})
-    selected_metrics = await get_selected_metrics(params.metrics, project)
-    selected_slices = await get_selected_slices(params.slices, project)
-    selected_models = await get_selected_models(params.models, project)
-
-    for current_metric in selected_metrics:
-        for current_slice in selected_slices:
-            for model in selected_models:
-                filter_sql = await table_filter(
-                    project, model, current_slice.filter_predicates
-                )
-                metric = await metric_map(current_metric, project, model, filter_sql)
-                elements.append(
-                    {
-                        "color_value": current_slice.slice_name
-                        if params.color_channel == SlicesOrModels.SLICES
-                        else model,
-                        "x_value": metric.metric,
-                        "y_value": current_slice.slice_name
-                        if params.y_channel == SlicesOrModels.SLICES
-                        else model,
-                        "size": metric.size,
-                        "metric": current_metric.name,
-                    }
-                )
-    return json.dumps({"table": elements})
+        return elements
+    selected_metrics, selected_slices, selected_models = await asyncio.gather(
+        get_selected_metrics(params.metrics, project),
+        get_selected_slices(params.slices, project),
+        get_selected_models(params.models, project),
+    )
 
+    grid = list(product(selected_metrics, selected_slices, selected_models))
+    results = await metric_batch(
+        project,
+        [
+            MetricCell(
+                metric=current_metric,
+                model=model,
+                filter_predicates=current_slice.filter_predicates,
+            )
+            for current_metric, current_slice, model in grid
+        ],
+    )
+    for (current_metric, current_slice, model), metric in zip(grid, results):
+        elements.append(
+            {
+                "color_value": current_slice.slice_name
+                if params.color_channel == SlicesOrModels.SLICES
+                else model,
+                "x_value": metric.metric,
+                "y_value": current_slice.slice_name
+                if params.y_channel == SlicesOrModels.SLICES
+                else model,
+                "size": metric.size,
+                "metric": current_metric.name,
+            }
+        )
+    return elements
 
-async def radar_data(chart: Chart, project: str) -> str:
+
+async def radar_data(chart: Chart, project: str) -> list[dict[str, Any]]:
     """Generate data for a radar chart.
 
     Args:
@@ -220,41 +282,49 @@ async def radar_data(chart: Chart, project: str) -> str:
         project (str): the project the user is currently working with
 
     Returns:
-        str: the chart data in JSON representation.
+        list[dict[str, Any]]: the elements of the chart data.
     """
     elements: list[dict[str, Any]] = []
     params = chart.parameters
     if not (isinstance(params, RadarParameters)):
-        return json.dumps({"table": elements})
-    selected_metrics = await get_selected_metrics(params.metrics, project)
-    selected_slices = await get_selected_slices(params.slices, project)
-    selected_models = await get_selected_models(params.models, project)
-
-    for current_metric in selected_metrics:
-        for current_slice in selected_slices:
-            for model in selected_models:
-                filter_sql = await table_filter(
-                    project, model, current_slice.filter_predicates
-                )
-                metric = await metric_map(current_metric, project, model, filter_sql)
-                elements.append(
-                    {
-                        "axis_value": current_slice.slice_name
-                        if params.axis_channel == SlicesMetricsOrModels.SLICES
-                        else model
-                        if params.axis_channel == SlicesMetricsOrModels.MODELS
-                        else current_metric.name,
-                        "fixed_value": metric.metric,
-                        "layer_value": current_slice.slice_name
-                        if params.layer_channel == SlicesOrModels.SLICES
-                        else model,
-                        "size": metric.size,
-                    }
-                )
-    return json.dumps({"table": elements})
+        return elements
+    selected_metrics, selected_slices, selected_models = await asyncio.gather(
+        get_selected_metrics(params.metrics, project),
+        get_selected_slices(params.slices, project),
+        get_selected_models(params.models, project),
+    )
+
+    grid = list(product(selected_metrics, selected_slices, selected_models))
+    results = await metric_batch(
+        project,
+        [
+            MetricCell(
+                metric=current_metric,
+                model=model,
+                filter_predicates=current_slice.filter_predicates,
+            )
+            for current_metric, current_slice, model in grid
+        ],
+    )
+    for (current_metric, current_slice, model), metric in zip(grid, results):
+        elements.append(
+            {
+                "axis_value": current_slice.slice_name
+                if params.axis_channel == SlicesMetricsOrModels.SLICES
+                else model
+                if params.axis_channel == SlicesMetricsOrModels.MODELS
+                else current_metric.name,
+                "fixed_value": metric.metric,
+                "layer_value": current_slice.slice_name
+                if params.layer_channel == SlicesOrModels.SLICES
+                else model,
+                "size": metric.size,
+            }
+        )
+    return elements
 
 
-async def heatmap_data(chart: Chart, project: str) -> str:
+async def heatmap_data(chart: Chart, project: str) -> list[dict[str, Any]]:
     """Generate data for a heatmap visualization.
 
     Args:
@@ -262,22 +332,26 @@ async def heatmap_data(chart: Chart, project: str) -> str:
         project (str): the project the user is currently working with
 
     Returns:
-        str: the chart data in JSON representation.
+        list[dict[str, Any]]: the elements of the chart data.
     """
     elements: list[dict[str, Any]] = []
     params = chart.parameters
     if not (isinstance(params, HeatmapParameters)):
-        return json.dumps({"table": elements})
-    selected_metric = next(
-        (x for x in await metrics(project) if x.id == params.metric),
-        Metric(id=-1, name="count", type="count", columns=[]),
-    )
+        return elements
     x_slice = params.x_channel == SlicesOrModels.SLICES
     y_slice = params.y_channel == SlicesOrModels.SLICES
-    selected_x = (
-        await get_selected_slices(params.x_values, project)  # type: ignore
+    all_metrics, selected_x, selected_y = await asyncio.gather(
+        metrics(project),
+        get_selected_slices(params.x_values, project)  # type: ignore
         if x_slice
-        else await get_selected_models(params.x_values, project)  # type: ignore
+        else get_selected_models(params.x_values, project),  # type: ignore
+        get_selected_slices(params.y_values, project)  # type: ignore
+        if y_slice
+        else get_selected_models(params.y_values, project),  # type: ignore
+    )
+    selected_metric = next(
+        (x for x in all_metrics if x.id == params.metric),
+        Metric(id=-1, name="count", type="count", columns=[]),
     )
     if x_slice and -1 in params.x_values:
         selected_x = selected_x + [
@@ -290,77 +364,73 @@ async def heatmap_data(chart: Chart, project: str) -> str:
             )
         ]
 
-    selected_y = (
-        await get_selected_slices(params.y_values, project)  # type: ignore
-        if y_slice
-        else await get_selected_models(params.y_values, project)  # type: ignore
-    )
-
-    for current_x in selected_x:
-        for current_y in selected_y:
-            metric = {"metric": None, "size": 0}
-            if x_slice and y_slice:
-                if len(current_x.filter_predicates.predicates) != 0:  # type: ignore
-                    current_y.filter_predicates.join = Join.AND  # type: ignore
-                if (
-                    len(current_y.filter_predicates.predicates) == 0  # type: ignore
-                    and len(current_x.filter_predicates.predicates) == 0  # type: ignore
-                ):
-                    pred_group = None
-                else:
-                    pred_group = FilterPredicateGroup(
-                        predicates=[
-                            current_x.filter_predicates,  # type: ignore
-                            current_y.filter_predicates,  # type: ignore
-                        ],
-                        join=Join.OMITTED,
-                    )
-                filter_sql = await table_filter(project, params.model, pred_group)
-                metric = await metric_map(
-                    selected_metric, project, params.model, filter_sql
-                )
+    grid = list(product(selected_x, selected_y))
+    cells: list[MetricCell] = []
+    for current_x, current_y in grid:
+        if x_slice and y_slice:
+            if len(current_x.filter_predicates.predicates) != 0:  # type: ignore
+                current_y.filter_predicates.join = Join.AND  # type: ignore
+            if (
+                len(current_y.filter_predicates.predicates) == 0  # type: ignore
+                and len(current_x.filter_predicates.predicates) == 0  # type: ignore
+            ):
+                pred_group = None
             else:
-                filter_sql = await table_filter(
-                    project,
-                    (
-                        current_x
+                # Copy the y predicates since their join differs between cells.
+                pred_group = FilterPredicateGroup(
+                    predicates=[
+                        current_x.filter_predicates,  # type: ignore
+                        current_y.filter_predicates.model_copy(),  # type: ignore
+                    ],
+                    join=Join.OMITTED,
+                )
+            cells.append(
+                MetricCell(
+                    metric=selected_metric,
+                    model=params.model,
+                    filter_predicates=pred_group,
+                )
+            )
+        else:
+            cells.append(
+                MetricCell(
+                    metric=selected_metric,
+                    model=(
+                        current_x  # type: ignore
                         if params.x_channel == SlicesOrModels.MODELS
                         else current_y
                     ),
-                    (
+                    filter_predicates=(
                         current_x.filter_predicates  # type: ignore
                         if x_slice
                         else current_y.filter_predicates  # type: ignore
                     ),
                 )
-                metric = await metric_map(
-                    selected_metric,
-                    project,
-                    (
-                        current_x
-                        if params.x_channel == SlicesOrModels.MODELS
-                        else current_y
-                    ),
-                    filter_sql,
-                )
-            elements.append(
-                {
-                    "x_value": current_x.slice_name  # type: ignore
-                    if x_slice
-                    else current_x,
-                    "fixed_value": metric.metric,
-                    "y_value": current_y.slice_name  # type: ignore
-                    if y_slice
-                    else current_y,
-                    "size": metric.size,
-                }
             )
-    return json.dumps({"table": elements})
+
+    results = await metric_batch(project, cells)
+    for (current_x, current_y), metric in zip(grid, results):
+        elements.append(
+            {
+                "x_value": current_x.slice_name  # type: ignore
+                if x_slice
+                else current_x,
+                "fixed_value": metric.metric,
+                "y_value": current_y.slice_name  # type: ignore
+                if y_slice
+                else current_y,
+                "size": metric.size,
+            }
+        )
+    return elements
 
 
 async def calculate_chart_data(chart: Chart, project: str) -> str:
     """Extract the chart data for a specific chart that the user created.
 
+    Records the latency and the number of cells of every chart computation in
+    `stats`.
+
     Args:
         chart (Chart): the chart for which to generate data.
         project (str): the project the user is currently working with
@@ -368,15 +438,40 @@ async def calculate_chart_data(chart: Chart, project: str) -> str:
     Returns:
         str: JSON representation of the chart data the user requested.
     """
+    start_time = time.perf_counter()
     if chart.type == ChartType.BAR or chart.type == ChartType.LINE:
-        return await xyc_data(chart, project)
+        elements = await xyc_data(chart, project)
     elif chart.type == ChartType.TABLE:
-        return await table_data(chart, project)
+        elements = await table_data(chart, project)
     elif chart.type == ChartType.BEESWARM:
-        return await beeswarm_data(chart, project)
+        elements = await beeswarm_data(chart, project)
     elif chart.type == ChartType.RADAR:
-        return await radar_data(chart, project)
+        elements = await radar_data(chart, project)
     elif chart.type == ChartType.HEATMAP:
-        return await heatmap_data(chart, project)
+        elements = await heatmap_data(chart, project)
     else:
-        return json.dumps({"table": []})
+        elements = []
+    elapsed = time.perf_counter() - start_time
+    record_chart(chart.type, len(elements), elapsed * 1000)
+    logging.info(
+        f"chart {chart.id} ({chart.type.value}): {len(elements)} cells "
+        f"in {elapsed:.3f}s"
+    )
+    return json.dumps({"table": elements})
+
+
+async def refresh_chart_data(project: str):
+    """Compute and store the data of all charts of a project that have none.
+
+    Data of charts that are invalidated again while it is computed is discarded.
+
+    Args:
+        project (str): the project for which to refresh chart data.
+    """
+    for chart, generation in await select.charts_without_data(project):
+        try:
+            data = await calculate_chart_data(chart, project)
+        except Exception as e:
+            logging.warning(f"Failed to compute data of chart {chart.id}: {e}")
+            continue
+        await update.chart_data(chart.id, data, generation)
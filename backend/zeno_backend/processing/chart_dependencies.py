@@ -0,0 +1,102 @@
+"""Dependencies of charts on the slices, metrics, and models of a project.
+
+Chart data is cached in the database. When a slice, metric, or model changes, only
+the charts that reference it have to be recomputed. The references are derived from
+the chart parameters, so they can never get out of sync with the chart definition.
+"""
+
+from zeno_backend.classes.chart import (
+    Chart,
+    HeatmapParameters,
+    SlicesOrModels,
+    XCParameters,
+)
+
+
+def slice_ids(chart: Chart) -> list[int]:
+    """Get the slice ids a chart references.
+
+    Args:
+        chart (Chart): the chart to get the slices of.
+
+    Returns:
+        list[int]: the referenced slice ids, -2 if the chart uses all slices.
+    """
+    params = chart.parameters
+    if isinstance(params, HeatmapParameters):
+        ids: list[int | str] = []
+        if params.x_channel == SlicesOrModels.SLICES:
+            ids += params.x_values
+        if params.y_channel == SlicesOrModels.SLICES:
+            ids += params.y_values
+        return [i for i in ids if isinstance(i, int)]
+    return params.slices
+
+
+def metric_ids(chart: Chart) -> list[int]:
+    """Get the metric ids a chart references.
+
+    Args:
+        chart (Chart): the chart to get the metrics of.
+
+    Returns:
+        list[int]: the referenced metric ids, -2 if the chart uses all metrics.
+    """
+    params = chart.parameters
+    if isinstance(params, XCParameters | HeatmapParameters):
+        return [params.metric]
+    return params.metrics
+
+
+def model_names(chart: Chart) -> list[str]:
+    """Get the models a chart references.
+
+    Args:
+        chart (Chart): the chart to get the models of.
+
+    Returns:
+        list[str]: the referenced models, "" if the chart uses all models.
+    """
+    params = chart.parameters
+    if isinstance(params, HeatmapParameters):
+        names = [params.model]
+        if params.x_channel == SlicesOrModels.MODELS:
+            names += [str(m) for m in params.x_values]
+        if params.y_channel == SlicesOrModels.MODELS:
+            names += [str(m) for m in params.y_values]
+        return names
+    return params.models
+
+
+def depends_on(
+    chart: Chart,
+    slices: list[int] | None = None,
+    metrics: list[int] | None = None,
+    models: list[str] | None = None,
+) -> bool:
+    """Check whether a chart references any of the given slices, metrics, or models.
+
+    Args:
+        chart (Chart): the chart to check.
+        slices (list[int] | None, optional): ids of changed slices. Defaults to None.
+        metrics (list[int] | None, optional): ids of changed metrics.
+            Defaults to None.
+        models (list[str] | None, optional): names of changed models.
+            Defaults to None.
+
+    Returns:
+        bool: whether the chart's data has to be recomputed.
+    """
+    if slices:
+        ids = slice_ids(chart)
+        if -2 in ids or any(s in ids for s in slices):
+            return True
+    if metrics:
+        ids = metric_ids(chart)
+        if -2 in ids or any(m in ids for m in metrics):
+            return True
+    if models:
+        names = model_names(chart)
+        if "" in names or any(m in names for m in models):
+            return True
+    return False
@@ -0,0 +1,44 @@
+"""Bounded concurrent execution of independent database work."""
+
+import asyncio
+import os
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Maximum number of pool connections a single computation may use at once.
+MAX_CONCURRENCY = int(os.environ.get("ZENO_QUERY_CONCURRENCY", 4))
+
+
+def query_limit() -> asyncio.Semaphore:
+    """Create the limit of the concurrent queries of one computation.
+
+    Returns:
+        asyncio.Semaphore: a semaphore that admits MAX_CONCURRENCY queries.
+    """
+    return asyncio.Semaphore(max(MAX_CONCURRENCY, 1))
+
+
+async def gather_bounded(
+    coroutines: list[Coroutine[Any, Any, T]],
+    limit: asyncio.Semaphore | None = None,
+) -> list[T]:
+    """Run coroutines concurrently while limiting how many run at the same time.
+
+    Args:
+        coroutines (list[Coroutine[Any, Any, T]]): the coroutines to run.
+        limit (asyncio.Semaphore | None, optional): the limit of the computation
+            the coroutines belong to, see `query_limit`. Defaults to a new limit
+            for just these coroutines.
+
+    Returns:
+        list[T]: the results of the coroutines in the order they were passed.
+    """
+    semaphore = limit if limit is not None else query_limit()
+
+    async def run(coroutine: Coroutine[Any, Any, T]) -> T:
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*[run(c) for c in coroutines])
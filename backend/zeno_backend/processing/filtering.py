@@ -1,12 +1,17 @@
 """Functions for parsing filter predicates and filtering data."""
 
+import hashlib
+import json
+from typing import Any
+
 from fastapi import HTTPException, status
 from psycopg import sql
 
 from zeno_backend.classes.base import MetadataType, ZenoColumn
-from zeno_backend.classes.filter import FilterPredicateGroup, Operation
+from zeno_backend.classes.filter import FilterPredicateGroup, Join, Operation
 from zeno_backend.classes.metadata import HistogramBucket
-from zeno_backend.database.database import db_pool
+from zeno_backend.database import column_map
+from zeno_backend.database.prepared import Parameter
 
 
 async def column_id_from_name_and_model(
@@ -22,24 +27,8 @@ async def column_id_from_name_and_model(
     Returns:
         str: column id retreived by name and model.
     """
-    async with db_pool.connection() as db:
-        async with db.cursor() as cur:
-            if model is None:
-                await cur.execute(
-                    sql.SQL(
-                        "SELECT column_id FROM {} WHERE name = %s AND model IS NULL;"
-                    ).format(sql.Identifier(f"{project}_column_map")),
-                    [column_name],
-                )
-            else:
-                await cur.execute(
-                    sql.SQL(
-                        "SELECT column_id FROM {} WHERE name = %s AND model = %s;"
-                    ).format(sql.Identifier(f"{project}_column_map")),
-                    [column_name, model],
-                )
-            column_result = await cur.fetchall()
-            return str(column_result[0][0]) if len(column_result) > 0 else ""
+    column = await column_map.column(project, column_name, model)
+    return column.id if column is not None else ""
 
 
 async def filter_to_sql(
@@ -97,7 +86,7 @@ async def filter_to_sql(
                     sql.Identifier(column_id),
                 )
                 + sql.SQL(f.operation.literal())
-                + sql.SQL(" {})").format(sql.Literal(val))
+                + sql.SQL(" {})").format(Parameter(val))
             )
     return filt
 
@@ -126,19 +115,12 @@ async def table_filter(
         filter_result = await filter_to_sql(filter_predicates, project, model)
 
     if data_ids is not None and len(data_ids) > 0:
-        async with db_pool.connection() as db:
-            async with db.cursor() as cur:
-                await cur.execute(
-                    sql.SQL("SELECT column_id FROM {} WHERE type = 'ID';").format(
-                        sql.Identifier(f"{project}_column_map")
-                    ),
-                )
-                id_column = await cur.fetchall()
-        if len(id_column) == 0:
+        id_column = await column_map.id_column(project)
+        if id_column is None:
             return None
-        datapoint_filter = sql.SQL("{} IN ({})").format(
-            sql.Identifier(id_column[0][0]),
-            sql.SQL(",").join(map(sql.Literal, data_ids)),
+        # A single array parameter, the number of bind parameters is limited.
+        datapoint_filter = sql.SQL("{} = ANY({})").format(
+            sql.Identifier(id_column.id), Parameter(list(data_ids))
         )
         if filter_result is not None:
             filter_result += sql.SQL(" AND ") + datapoint_filter
@@ -146,6 +128,80 @@ async def table_filter(
     return filter_result
 
 
+def _sort_key(term: Any) -> str:
+    return json.dumps(term, separators=(",", ":"))
+
+
+def _combine(operator: str, terms: list[Any]) -> Any:
+    flat: dict[str, Any] = {}
+    for term in terms:
+        nested = isinstance(term, list) and term[0] == operator
+        for t in term[1] if nested else [term]:
+            flat[_sort_key(t)] = t
+    if len(flat) == 1:
+        return next(iter(flat.values()))
+    return [operator, [flat[k] for k in sorted(flat)]]
+
+
+def _canonical_group(group: FilterPredicateGroup) -> Any:
+    terms = [
+        p
+        for p in group.predicates
+        if not isinstance(p, FilterPredicateGroup) or len(p.predicates) > 0
+    ]
+    if len(terms) == 0:
+        return None
+    if terms[0].join != Join.OMITTED or any(t.join == Join.OMITTED for t in terms[1:]):
+        # Not a valid filter, fingerprint it exactly as it is.
+        return ["raw", group.model_dump(mode="json")]
+
+    # AND binds stronger than OR, as in the compiled filter.
+    disjuncts: list[list[Any]] = []
+    for term in terms:
+        if term.join != Join.AND:
+            disjuncts.append([])
+        if isinstance(term, FilterPredicateGroup):
+            disjuncts[-1].append(_canonical_group(term))
+        else:
+            disjuncts[-1].append(
+                [
+                    "predicate",
+                    term.column.name,
+                    term.column.model is None,
+                    term.operation.value,
+                    term.value,
+                ]
+            )
+    return _combine("or", [_combine("and", d) for d in disjuncts])
+
+
+def filter_fingerprint(
+    filter_predicates: FilterPredicateGroup | None = None,
+    data_ids: list[str] | None = None,
+) -> str:
+    """Get a stable hash of the filter that `table_filter` compiles.
+
+    Filters that only differ in the order of predicates joined by the same operator,
+    in redundant or empty groups, or in the join of the outermost group get the same
+    fingerprint. The fingerprint does not depend on the model, which determines the
+    columns of model predicates.
+
+    Args:
+        filter_predicates (FilterPredicateGroup | None, optional): the filter
+            predicates to apply to the table. Default None.
+        data_ids (list[str] | None, optional): a list of datapoints to limit the
+            table output to. Default None.
+
+    Returns:
+        str: the hex digest of the canonical form of the filter.
+    """
+    canonical = [
+        None if filter_predicates is None else _canonical_group(filter_predicates),
+        sorted(set(data_ids)) if data_ids else None,
+    ]
+    return hashlib.sha256(_sort_key(canonical).encode()).hexdigest()
+
+
 def bucket_filter(col: ZenoColumn, bucket: HistogramBucket) -> sql.Composed | None:
     """Generate a filter string for a specific histogram bucket.
 
@@ -162,13 +218,13 @@ def bucket_filter(col: ZenoColumn, bucket: HistogramBucket) -> sql.Composed | No
         )
     elif col.data_type == MetadataType.NOMINAL:
         return sql.SQL("{} = {}").format(
-            sql.Identifier(col.id), sql.Literal(bucket.bucket)
+            sql.Identifier(col.id), Parameter(bucket.bucket)
         )
     elif col.data_type == MetadataType.CONTINUOUS:
         return sql.SQL("{} > {} AND {} < {}").format(
             sql.Identifier(col.id),
-            sql.Literal(bucket.bucket),
+            Parameter(bucket.bucket),
             sql.Identifier(col.id),
-            sql.Literal(bucket.bucket_end),
+            Parameter(bucket.bucket_end),
         )
     return None
@@ -9,337 +9,288 @@ from zeno_backend.classes.metadata import (
     HistogramBucket,
     HistogramRequest,
 )
-from zeno_backend.database.database import db_pool
+from zeno_backend.database import column_map, prepared
+from zeno_backend.database.database import read_connection
 
+# Nominal columns with more distinct values than this are not shown as histograms.
+MAX_NOMINAL_BUCKETS = 30
 
-async def calculate_histogram_bucket(
-    project_uuid: str, col: ZenoColumn
-) -> list[HistogramBucket]:
-    """Calculate the histogram buckets for a single column.
+
+async def calculate_histogram_buckets(
+    project_uuid: str, columns: list[ZenoColumn]
+) -> dict[str, list[HistogramBucket]]:
+    """Calculate the histogram buckets for a list of columns.
+
+    The statistics of all columns are computed with a single scan of the project
+    table. Nominal columns with few enough distinct values take one more scan that
+    collects their values.
 
     Args:
         project_uuid (str): the project the user is currently working with.
-        col (ZenoColumn): the column to compute buckets for.
+        columns (list[ZenoColumn]): the columns to compute buckets for.
 
     Returns:
-        List[HistogramBucket]: the buckets for the column histogram.
+        dict[str, list[HistogramBucket]]: the buckets keyed by the ids of the
+            requested columns.
     """
-    async with db_pool.connection() as conn:
-        async with conn.cursor() as db:
-            await db.execute(
-                sql.SQL(
-                    "SELECT column_id FROM {} WHERE name = %s AND"
-                    " (model = %s OR model IS NULL);"
-                ).format(sql.Identifier(f"{project_uuid}_column_map")),
-                [col.name, col.model],
+    histograms: dict[str, list[HistogramBucket]] = {c.id: [] for c in columns}
+    resolved: list[tuple[ZenoColumn, str]] = []
+    for col in columns:
+        if col.data_type == MetadataType.BOOLEAN:
+            histograms[col.id] = [
+                HistogramBucket(bucket=True),
+                HistogramBucket(bucket=False),
+            ]
+        elif col.data_type in (MetadataType.NOMINAL, MetadataType.CONTINUOUS):
+            column = await column_map.model_or_dataset_column(
+                project_uuid, col.name, col.model
             )
-            id_col = await db.fetchone()
-            if id_col is None:
-                return []
-            else:
-                id_col = id_col[0]
-
-            if col.data_type == MetadataType.NOMINAL:
-                await db.execute(
-                    sql.SQL(
-                        "SELECT COUNT(*) FROM (SELECT DISTINCT {} FROM {}) AS temp;"
-                    ).format(
-                        sql.Identifier(id_col),
-                        sql.Identifier(project_uuid),
-                    )
-                )
-                res = await db.fetchall()
-                if res[0][0] > 30:
-                    return []
-                else:
-                    await db.execute(
-                        sql.SQL("SELECT DISTINCT {} FROM {}").format(
-                            sql.Identifier(id_col),
-                            sql.Identifier(project_uuid),
-                        )
-                    )
-                    res = await db.fetchall()
-                    return [HistogramBucket(bucket=r[0]) for r in res]
-
-            elif col.data_type == MetadataType.CONTINUOUS:
-                await db.execute(
-                    sql.SQL(
-                        "SELECT MIN({}), MAX({}),"
-                        "PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY {})"
-                        "- PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY {})"
-                        ",COUNT(*) FROM {}"
-                    ).format(
-                        sql.Identifier(id_col),
-                        sql.Identifier(id_col),
-                        sql.Identifier(id_col),
-                        sql.Identifier(id_col),
-                        sql.Identifier(project_uuid),
-                    )
+            if column is not None:
+                resolved.append((col, column.id))
+    if len(resolved) == 0:
+        return histograms
+
+    source = await column_map.data_source(
+        project_uuid, list({col.model for col, _ in resolved})
+    )
+    statistics: list[sql.Composable] = [sql.SQL("COUNT(*)")]
+    for col, col_id in resolved:
+        if col.data_type == MetadataType.NOMINAL:
+            statistics.append(
+                sql.SQL("COUNT(DISTINCT {})").format(sql.Identifier(col_id))
+            )
+        else:
+            statistics.append(
+                sql.SQL("MIN({}), MAX({})").format(
+                    sql.Identifier(col_id), sql.Identifier(col_id)
                 )
-                res = await db.fetchone()
-                if res is None:
-                    return []
+            )
 
-                # Sturges estimator
-                buckets = int(math.ceil(math.log2(res[3] + 1)))
-                bin_width = (res[1] - res[0]) / buckets
+    async with read_connection() as conn:
+        async with conn.cursor() as db:
+            await prepared.execute(
+                db,
+                sql.SQL("SELECT {} FROM {};").format(
+                    sql.SQL(", ").join(statistics), source
+                ),
+            )
+            res = await db.fetchone()
+            if res is None:
+                return histograms
 
-                return [
+            count = res[0]
+            nominal: list[tuple[ZenoColumn, str]] = []
+            i = 1
+            for col, col_id in resolved:
+                if col.data_type == MetadataType.NOMINAL:
+                    if res[i] <= MAX_NOMINAL_BUCKETS:
+                        nominal.append((col, col_id))
+                    i += 1
+                    continue
+
+                minimum, maximum = res[i], res[i + 1]
+                i += 2
+                if minimum is None or maximum is None:
+                    continue
+                # Sturges estimator
+                buckets = int(math.ceil(math.log2(count + 1)))
+                bin_width = (maximum - minimum) / buckets
+                histograms[col.id] = [
                     HistogramBucket(
-                        bucket=res[0] + i * bin_width,
-                        bucket_end=res[0] + (i + 1) * bin_width,
+                        bucket=minimum + b * bin_width,
+                        bucket_end=minimum + (b + 1) * bin_width,
                     )
-                    for i in range(0, buckets)
+                    for b in range(0, buckets)
                 ]
-            elif col.data_type == MetadataType.BOOLEAN:
-                return [
-                    HistogramBucket(bucket=True),
-                    HistogramBucket(bucket=False),
-                ]
-            else:
-                return []
+
+            if len(nominal) > 0:
+                await prepared.execute(
+                    db,
+                    sql.SQL("SELECT {} FROM {};").format(
+                        sql.SQL(", ").join(
+                            [
+                                sql.SQL("ARRAY_AGG(DISTINCT {})").format(
+                                    sql.Identifier(col_id)
+                                )
+                                for _, col_id in nominal
+                            ]
+                        ),
+                        source,
+                    ),
+                )
+                values = await db.fetchone()
+                if values is not None:
+                    for (col, _), col_values in zip(nominal, values):
+                        histograms[col.id] = [
+                            HistogramBucket(bucket=v) for v in col_values or []
+                        ]
+
+    return histograms
+
+
+def bucket_expression(
+    col: ZenoColumn, col_id: str, buckets: list[HistogramBucket]
+) -> sql.Composable:
+    """Get the SQL expression assigning a row to a histogram bucket.
+
+    Args:
+        col (ZenoColumn): the column the histogram is computed for.
+        col_id (str): the id of the column in the project table.
+        buckets (list[HistogramBucket]): the buckets of the histogram.
+
+    Returns:
+        sql.Composable: the value of a nominal column, or the index of the bucket of
+            a continuous or boolean column.
+    """
+    if col.data_type == MetadataType.CONTINUOUS:
+        # width_bucket counts the bucket starts at or below a value with a binary
+        # search. The last bucket also contains its end.
+        return sql.SQL(
+            "CASE WHEN {col} <= {end} THEN width_bucket({col}, {starts}) - 1 END"
+        ).format(
+            col=sql.Identifier(col_id) + sql.SQL("::double precision"),
+            end=prepared.Parameter(float(buckets[-1].bucket_end)),
+            starts=sql.SQL("{}::double precision[]").format(
+                prepared.Parameter([float(b.bucket) for b in buckets])
+            ),
+        )
+    if col.data_type == MetadataType.BOOLEAN:
+        return sql.SQL("CASE WHEN {} = TRUE THEN 0 WHEN {} = FALSE THEN 1 END").format(
+            sql.Identifier(col_id), sql.Identifier(col_id)
+        )
+    return sql.Identifier(col_id)
+
+
+def fill_buckets(
+    buckets: list[HistogramBucket],
+    results: dict,
+    col: ZenoColumn,
+    with_metric: bool,
+) -> list[HistogramBucket]:
+    """Fill the buckets of a histogram with the grouped counts and metrics.
+
+    Args:
+        buckets (list[HistogramBucket]): the buckets of the histogram.
+        results (dict): the size and metric of each group, keyed by the value of
+            the bucket expression.
+        col (ZenoColumn): the column the histogram is computed for.
+        with_metric (bool): whether the metric was computed.
+
+    Returns:
+        list[HistogramBucket]: the buckets with their size and metric.
+    """
+    filled = []
+    for i, b in enumerate(buckets):
+        key = b.bucket if col.data_type == MetadataType.NOMINAL else i
+        size, metric = results.get(key, (0, 0))
+        filled.append(
+            HistogramBucket(
+                bucket=b.bucket,
+                bucket_end=b.bucket_end,
+                size=size,
+                metric=(metric if metric is not None else 0) if with_metric else None,
+            )
+        )
+    return filled
 
 
 async def histogram_metric_and_count(
     request: HistogramRequest,
-    col: ZenoColumn,
-    buckets: list[HistogramBucket] | None,
+    buckets: dict[str, list[HistogramBucket]],
     project_uuid: str,
     filter_sql: sql.Composed | None,
-) -> list[HistogramBucket]:
-    """Calculate the metric and count for a column.
+) -> list[list[HistogramBucket]]:
+    """Calculate the metric and count for the buckets of all requested columns.
+
+    Every column is assigned to its buckets in a subquery over the filtered table,
+    which is then grouped by each column with GROUPING SETS, so all histograms are
+    computed with a single scan.
 
     Args:
         request (HistogramRequest): the request object.
-        col (ZenoColumn): the column request object.
-        buckets (list[HistogramBucket]): the buckets to calculate the metric for.
+        buckets (dict[str, list[HistogramBucket]]): the buckets of each column,
+            keyed by column id.
         project_uuid (str): the project the user is currently working with.
-        filter_sql (sql.Composed): the filter to apply to the query.
+        filter_sql (sql.Composed | None): the filter to apply to the query.
 
     Returns:
-        HistogramBucket: the bucket with the metric added.
+        list[list[HistogramBucket]]: the buckets with their counts and metrics, in
+            the order of the requested columns.
     """
+    metric_col = None
     if request.metric is not None and request.model is not None:
-        calculate_histograms = True
-    else:
-        calculate_histograms = False
+        metric_col = await column_map.model_or_dataset_column(
+            project_uuid, request.metric.columns[0], request.model
+        )
+    with_metric = metric_col is not None
 
-    # if end == start, can't show a bar, remove bucket (only happens if singular value)
-    if col.data_type == MetadataType.CONTINUOUS:
-        buckets = list(filter(lambda x: x.bucket != x.bucket_end, buckets))
+    # Columns that have a histogram, with their id and buckets.
+    histograms: list[tuple[int, ZenoColumn, list[HistogramBucket]]] = []
+    expressions: list[sql.Composable] = []
+    for i, col in enumerate(request.columns):
+        if col.data_type not in (
+            MetadataType.NOMINAL,
+            MetadataType.CONTINUOUS,
+            MetadataType.BOOLEAN,
+        ):
+            continue
+        col_buckets = buckets.get(col.id)
+        # if end == start, can't show a bar, remove bucket (only happens if singular
+        # value)
+        if col_buckets is not None and col.data_type == MetadataType.CONTINUOUS:
+            col_buckets = [b for b in col_buckets if b.bucket != b.bucket_end]
+        if col_buckets is None or len(col_buckets) == 0:
+            continue
+        column = await column_map.model_or_dataset_column(
+            project_uuid, col.name, request.model
+        )
+        if column is None:
+            continue
+        expressions.append(
+            sql.SQL("{} AS {}").format(
+                bucket_expression(col, column.id, col_buckets),
+                sql.Identifier(f"b{len(histograms)}"),
+            )
+        )
+        histograms.append((i, col, col_buckets))
 
-    if buckets is None or len(buckets) == 0:
-        return []
+    results: list[list[HistogramBucket]] = [[] for _ in request.columns]
+    if len(histograms) == 0:
+        return results
 
-    async with db_pool.connection() as conn:
-        async with conn.cursor() as db:
-            await db.execute(
-                sql.SQL(
-                    "SELECT column_id FROM {} "
-                    "WHERE name = %s AND (model = %s OR model IS NULL);"
-                ).format(sql.Identifier(f"{project_uuid}_column_map")),
-                [col.name, request.model],
+    if metric_col is not None:
+        expressions.append(
+            sql.SQL("{} AS metric").format(
+                sql.Identifier(metric_col.id) + sql.SQL("::int")
+                if metric_col.data_type == MetadataType.BOOLEAN
+                else sql.Identifier(metric_col.id)
             )
-            col_id = await db.fetchone()
-            if col_id is None:
-                return []
-            col_id = col_id[0]
-
-            metric_col_id = None
-            metric_col_type = None
-            if calculate_histograms and request.metric is not None:
-                await db.execute(
-                    sql.SQL(
-                        "SELECT column_id, data_type FROM {} "
-                        "WHERE name = %s AND (model = %s OR model IS NULL);"
-                    ).format(sql.Identifier(f"{project_uuid}_column_map")),
-                    [request.metric.columns[0], request.model],
-                )
-                metric_col_id = await db.fetchone()
-                if metric_col_id is not None:
-                    metric_col_type = metric_col_id[1]
-                    metric_col_id = metric_col_id[0]
-
-            if col.data_type == MetadataType.NOMINAL:
-                if calculate_histograms and metric_col_id is not None:
-                    statement = sql.SQL("SELECT {}, COUNT(*), AVG({}) FROM {}").format(
-                        sql.Identifier(col_id),
-                        sql.Identifier(metric_col_id)
-                        if metric_col_type != MetadataType.BOOLEAN
-                        else sql.Identifier(metric_col_id) + sql.SQL("::int"),
-                        sql.Identifier(project_uuid),
-                    )
-                else:
-                    statement = sql.SQL("SELECT {}, COUNT(*) FROM {}").format(
-                        sql.Identifier(col_id),
-                        sql.Identifier(project_uuid),
-                    )
+        )
+    keys = [sql.Identifier(f"b{j}") for j in range(len(histograms))]
+    statement = sql.SQL(
+        "SELECT {}, {}, COUNT(*){} FROM (SELECT {} FROM {}{}) AS buckets "
+        "GROUP BY GROUPING SETS ({});"
+    ).format(
+        sql.SQL(", ").join(keys),
+        sql.SQL(", ").join([sql.SQL("GROUPING({})").format(k) for k in keys]),
+        sql.SQL(", AVG(metric)" if with_metric else ""),
+        sql.SQL(", ").join(expressions),
+        await column_map.data_source(project_uuid, [request.model]),
+        sql.SQL("") if filter_sql is None else sql.SQL(" WHERE ") + filter_sql,
+        sql.SQL(", ").join([sql.SQL("({})").format(k) for k in keys]),
+    )
 
-                if filter_sql:
-                    statement = sql.SQL("{} WHERE {} GROUP BY {}").format(
-                        statement, filter_sql, sql.Identifier(col_id)
-                    )
-                else:
-                    statement = sql.SQL("{} GROUP BY {}").format(
-                        statement, sql.Identifier(col_id)
-                    )
+    async with read_connection() as conn:
+        async with conn.cursor() as db:
+            await prepared.execute(db, statement)
+            rows = await db.fetchall()
 
-                await db.execute(statement)
-                db_res = await db.fetchall()
-                if calculate_histograms and metric_col_id is not None:
-                    results_map = {r[0]: (r[1], r[2]) for r in db_res}
-                    return [
-                        HistogramBucket(
-                            bucket=b.bucket,
-                            size=results_map[b.bucket][0]
-                            if b.bucket in results_map
-                            else 0,
-                            metric=results_map[b.bucket][1]
-                            if b.bucket in results_map
-                            else 0,
-                        )
-                        for b in buckets
-                    ]
-                else:
-                    results_map = {r[0]: r[1] for r in db_res}
-                    return [
-                        HistogramBucket(
-                            bucket=b.bucket,
-                            size=results_map[b.bucket]
-                            if b.bucket in results_map
-                            else 0,
-                        )
-                        for b in buckets
-                    ]
-
-            elif col.data_type == MetadataType.CONTINUOUS:
-                case_statement = sql.SQL("CASE ")
-                for i, b in enumerate(buckets):
-                    if i == len(buckets) - 1:
-                        case_statement += sql.SQL(
-                            "WHEN {} >= {} AND {} <= {} THEN {} "
-                        ).format(
-                            sql.Identifier(col_id),
-                            sql.Literal(b.bucket),
-                            sql.Identifier(col_id),
-                            sql.Literal(b.bucket_end),
-                            sql.Literal(i),
-                        )
-                    else:
-                        case_statement += sql.SQL(
-                            "WHEN {} >= {} AND {} < {} THEN {} "
-                        ).format(
-                            sql.Identifier(col_id),
-                            sql.Literal(b.bucket),
-                            sql.Identifier(col_id),
-                            sql.Literal(b.bucket_end),
-                            sql.Literal(i),
-                        )
-                case_statement += sql.SQL("END AS bucket")
-                if calculate_histograms and metric_col_id is not None:
-                    statement = sql.SQL("SELECT {}, COUNT(*), AVG({}) FROM {}").format(
-                        case_statement,
-                        sql.Identifier(metric_col_id)
-                        if metric_col_type != MetadataType.BOOLEAN
-                        else sql.Identifier(metric_col_id) + sql.SQL("::int"),
-                        sql.Identifier(project_uuid),
-                    )
-                else:
-                    statement = sql.SQL("SELECT {}, COUNT(*) FROM {}").format(
-                        case_statement,
-                        sql.Identifier(project_uuid),
-                    )
+    grouped: list[dict] = [{} for _ in histograms]
+    n = len(histograms)
+    for row in rows:
+        j = next(j for j in range(n) if row[n + j] == 0)
+        grouped[j][row[j]] = (row[2 * n], row[2 * n + 1] if with_metric else None)
 
-                if filter_sql:
-                    statement = sql.SQL("{} WHERE {} GROUP BY bucket").format(
-                        statement, filter_sql
-                    )
-                else:
-                    statement = sql.SQL("{} GROUP BY bucket").format(statement)
-                await db.execute(statement)
-                db_res = await db.fetchall()
-
-                if calculate_histograms and metric_col_id is not None:
-                    results_map = {
-                        int(r[0]): (r[1], r[2]) for r in db_res if r[0] is not None
-                    }
-                    return [
-                        HistogramBucket(
-                            bucket=b.bucket,
-                            bucket_end=b.bucket_end,
-                            size=results_map[i][0] if i in results_map else 0,
-                            metric=results_map[i][1] if i in results_map else 0,
-                        )
-                        for i, b in enumerate(buckets)
-                    ]
-                else:
-                    results_map = {int(r[0]): r[1] for r in db_res if r[0] is not None}
-                    return [
-                        HistogramBucket(
-                            bucket=b.bucket,
-                            bucket_end=b.bucket_end,
-                            size=results_map[i] if i in results_map else 0,
-                        )
-                        for i, b in enumerate(buckets)
-                    ]
-
-            elif col.data_type == MetadataType.BOOLEAN:
-                if calculate_histograms and metric_col_id is not None:
-                    statement = sql.SQL(
-                        "SELECT CASE WHEN {} = TRUE THEN 0 WHEN {} = FALSE"
-                        " THEN 1 END AS bucket, COUNT(*), AVG({}) FROM {}"
-                    ).format(
-                        sql.Identifier(col_id),
-                        sql.Identifier(col_id),
-                        sql.Identifier(metric_col_id)
-                        if metric_col_type != MetadataType.BOOLEAN
-                        else sql.Identifier(metric_col_id) + sql.SQL("::int"),
-                        sql.Identifier(project_uuid),
-                    )
-                else:
-                    statement = sql.SQL(
-                        "SELECT CASE WHEN {} = TRUE THEN 0 WHEN {} = FALSE"
-                        " THEN 1 END AS bucket, COUNT(*) FROM {}"
-                    ).format(
-                        sql.Identifier(col_id),
-                        sql.Identifier(col_id),
-                        sql.Identifier(project_uuid),
-                    )
-
-                if filter_sql:
-                    statement = sql.SQL("{} WHERE {} GROUP BY bucket").format(
-                        statement, filter_sql
-                    )
-                else:
-                    statement = sql.SQL("{} GROUP BY bucket").format(statement)
-                await db.execute(statement)
-                res = await db.fetchall()
-
-                true_res = [r for r in res if r[0] == 0]
-                false_res = [r for r in res if r[0] == 1]
-                if calculate_histograms and metric_col_id is not None:
-                    return [
-                        HistogramBucket(
-                            bucket=True,
-                            size=true_res[0][1] if len(true_res) > 0 else 0,
-                            metric=true_res[0][2] if len(true_res) > 0 else 0,
-                        ),
-                        HistogramBucket(
-                            bucket=False,
-                            size=false_res[0][1] if len(false_res) > 0 else 0,
-                            metric=false_res[0][2] if len(false_res) > 0 else 0,
-                        ),
-                    ]
-                else:
-                    return [
-                        HistogramBucket(
-                            bucket=True,
-                            size=true_res[0][1] if len(true_res) > 0 else 0,
-                        ),
-                        HistogramBucket(
-                            bucket=False,
-                            size=false_res[0][1] if len(false_res) > 0 else 0,
-                        ),
-                    ]
-            else:
-                return []
+    for j, (i, col, col_buckets) in enumerate(histograms):
+        results[i] = fill_buckets(col_buckets, grouped[j], col, with_metric)
+    return results
@@ -0,0 +1,191 @@
+"""Job queues that execute precomputation jobs in the background."""
+
+import abc
+import asyncio
+import contextvars
+import logging
+import os
+import uuid
+from collections.abc import Awaitable, Callable
+
+from zeno_backend.classes.job import Job, JobStatus, JobType
+from zeno_backend.database import insert, select, update
+
+# Number of workers of the default job queue.
+JOB_WORKERS = int(os.environ.get("ZENO_JOB_WORKERS", 1))
+# Number of jobs of each project whose status is kept after they were submitted.
+JOB_HISTORY = 1000
+
+
+class JobQueue(abc.ABC):
+    """Interface of a job queue backend.
+
+    A backend receives jobs through `submit` and executes them with the runner it was
+    created with. Jobs must be identifiable by their id through `job` until they
+    are dropped from the backend's history, by every process serving the database.
+    """
+
+    def __init__(self, runner: Callable[[Job], Awaitable[None]]):
+        """Create a job queue.
+
+        Args:
+            runner (Callable[[Job], Awaitable[None]]): function executing a job.
+        """
+        self.runner = runner
+
+    @abc.abstractmethod
+    async def submit(self, project_uuid: str, job_type: JobType) -> Job:
+        """Submit a job for execution.
+
+        Args:
+            project_uuid (str): the project to run the job for.
+            job_type (JobType): the kind of job to run.
+
+        Returns:
+            Job: the submitted job.
+        """
+
+    @abc.abstractmethod
+    async def job(self, job_id: str) -> Job | None:
+        """Get a job by its id.
+
+        Args:
+            job_id (str): the id of the job.
+
+        Returns:
+            Job | None: the job or None if it is unknown.
+        """
+
+    @abc.abstractmethod
+    async def jobs(self, project_uuid: str) -> list[Job]:
+        """Get the known jobs of a project.
+
+        Args:
+            project_uuid (str): the project to get jobs for.
+
+        Returns:
+            list[Job]: the jobs of the project, oldest first.
+        """
+
+    @abc.abstractmethod
+    async def stop(self):
+        """Stop executing jobs, marking the jobs that did not finish as failed."""
+
+
+class AsyncioJobQueue(JobQueue):
+    """Job queue executing jobs with asyncio worker tasks in the server process.
+
+    A job that is submitted while an identical job is still queued is merged with
+    the queued job, since the queued job will see the latest state once it runs.
+    The status of jobs is stored in the `jobs` table, so that it can be read by
+    every backend process.
+    """
+
+    def __init__(
+        self, runner: Callable[[Job], Awaitable[None]], workers: int = JOB_WORKERS
+    ):
+        """Create an asyncio job queue.
+
+        Args:
+            runner (Callable[[Job], Awaitable[None]]): function executing a job.
+            workers (int, optional): number of jobs to execute at the same time.
+                Defaults to JOB_WORKERS.
+        """
+        super().__init__(runner)
+        self.workers = max(workers, 1)
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._queued: dict[tuple[str, JobType], Job] = {}
+        self._stopped = False
+
+    async def submit(self, project_uuid: str, job_type: JobType) -> Job:
+        """Submit a job for execution.
+
+        Args:
+            project_uuid (str): the project to run the job for.
+            job_type (JobType): the kind of job to run.
+
+        Returns:
+            Job: the submitted job or the queued job it was merged with.
+        """
+        queued = self._queued.get((project_uuid, job_type))
+        if queued is not None:
+            return queued
+
+        job = Job(id=str(uuid.uuid4()), project_uuid=project_uuid, type=job_type)
+        await insert.job(job, JOB_HISTORY)
+        if self._stopped:
+            await self._fail(job, "The server is shutting down.")
+            return job
+        self._queued[(project_uuid, job_type)] = job
+        self._queue.put_nowait(job)
+        self._start_workers()
+        return job
+
+    async def job(self, job_id: str) -> Job | None:
+        """Get a job by its id.
+
+        Args:
+            job_id (str): the id of the job.
+
+        Returns:
+            Job | None: the job or None if it is unknown.
+        """
+        return await select.job(job_id)
+
+    async def jobs(self, project_uuid: str) -> list[Job]:
+        """Get the known jobs of a project.
+
+        Args:
+            project_uuid (str): the project to get jobs for.
+
+        Returns:
+            list[Job]: the jobs of the project, oldest first.
+        """
+        return await select.jobs(project_uuid)
+
+    async def stop(self):
+        """Stop the workers, marking the running and queued jobs as failed."""
+        self._stopped = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            await self._fail(self._queue.get_nowait(), "The server shut down.")
+
+    def _start_workers(self):
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            # Workers outlive the request that started them, so they must not
+            # inherit its context, e.g. whether its reads go to the primary.
+            self._tasks.append(
+                asyncio.create_task(self._work(), context=contextvars.Context())
+            )
+
+    async def _fail(self, job: Job, error: str):
+        self._queued.pop((job.project_uuid, job.type), None)
+        job.status = JobStatus.FAILED
+        job.error = error
+        await update.job(job)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            self._queued.pop((job.project_uuid, job.type), None)
+            try:
+                job.status = JobStatus.RUNNING
+                await update.job(job)
+                await self.runner(job)
+                job.status = JobStatus.DONE
+                await update.job(job)
+            except asyncio.CancelledError:
+                await self._fail(job, "The server shut down.")
+                raise
+            except Exception as e:
+                logging.warning(
+                    f"Job {job.type.value} of {job.project_uuid} failed: {e}"
+                )
+                await self._fail(job, str(e))
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,254 @@
+"""Evaluate many metric cells with filtered aggregates, one table scan per model."""
+
+import asyncio
+
+from psycopg import sql
+
+from zeno_backend.classes.base import GroupMetric, MetadataType
+from zeno_backend.classes.metric import MetricCell
+from zeno_backend.database import column_map, counts, data_version, prepared
+from zeno_backend.database.database import read_connection
+from zeno_backend.processing.concurrency import gather_bounded, query_limit
+from zeno_backend.processing.filtering import filter_fingerprint, table_filter
+from zeno_backend.processing.metrics import cache
+
+# Postgres allows at most 1664 entries in a target list, stay well below it.
+MAX_AGGREGATES_PER_STATEMENT = 512
+
+
+async def cell_aggregates(
+    project: str, cell: MetricCell, filter_sql: sql.Composed | None
+) -> tuple[sql.Composable, sql.Composable | None]:
+    """Compile a metric cell to filtered SQL aggregates.
+
+    Args:
+        project (str): the project the user is currently working with.
+        cell (MetricCell): the metric cell to compile.
+        filter_sql (sql.Composed | None): the compiled filter of the cell.
+
+    Returns:
+        tuple[sql.Composable, sql.Composable | None]: the aggregate for the size of
+            the subset and the aggregate for the metric, if the metric is a mean.
+    """
+    filter_clause = (
+        sql.SQL("")
+        if filter_sql is None
+        else sql.SQL(" FILTER (WHERE {})").format(filter_sql)
+    )
+    count_sql = sql.SQL("COUNT(*)") + filter_clause
+
+    if cell.metric is None or cell.metric.type != "mean":
+        return count_sql, None
+
+    column = await column_map.model_or_dataset_column(
+        project, cell.metric.columns[0], cell.model
+    )
+    if column is None:
+        return count_sql, None
+    column_sql = (
+        sql.Identifier(column.id) + sql.SQL("::int")
+        if column.data_type == MetadataType.BOOLEAN
+        else sql.Identifier(column.id)
+    )
+    return count_sql, sql.SQL("AVG({})").format(column_sql) + filter_clause
+
+
+async def evaluate_aggregates(
+    project: str,
+    model: str | None,
+    aggregates: list[sql.Composable],
+    sample: float | None = None,
+) -> list:
+    """Evaluate a list of aggregates with a single scan of the project table.
+
+    Args:
+        project (str): the project the user is currently working with.
+        model (str | None): the model whose columns the aggregates reference.
+        aggregates (list[sql.Composable]): the aggregates to evaluate.
+        sample (float | None, optional): the percentage of the table's pages to
+            evaluate the aggregates on, None for all rows. Defaults to None.
+
+    Returns:
+        list: the values of the aggregates.
+    """
+    source = await column_map.data_source(project, [model], sample)
+    async with read_connection() as conn:
+        async with conn.cursor() as cur:
+            await prepared.execute(
+                cur,
+                sql.SQL("SELECT {} FROM {};").format(
+                    sql.SQL(", ").join(aggregates), source
+                ),
+            )
+            row = await cur.fetchone()
+    return list(row) if row is not None else []
+
+
+async def metric_batch(
+    project: str,
+    cells: list[MetricCell],
+    data_ids: list[str] | None = None,
+    approximate: bool = False,
+) -> list[GroupMetric]:
+    """Calculate the metrics for a list of cells.
+
+    Results of earlier calculations are taken from the metric cache. The other
+    cells are compiled to filtered aggregates over the project table. Filters
+    are compiled once per slice and model and identical aggregates are only
+    computed once. The aggregates are grouped by model, so that every model's
+    cells are evaluated with a single statement that scans the project table once.
+    The statements of different models run concurrently, at most
+    `ZENO_QUERY_CONCURRENCY` of them at once for each call. Sizes of cells that
+    only count rows are taken from the count cache where possible.
+
+    Args:
+        project (str): the project the user is currently working with.
+        cells (list[MetricCell]): the cells for which to calculate metrics.
+        data_ids (list[str] | None, optional): data ids to limit all cells to.
+            Defaults to None.
+        approximate (bool, optional): whether to estimate the metrics from a sample
+            if the project table is large. Defaults to False.
+
+    Returns:
+        list[GroupMetric]: the metric results in the order of the cells.
+    """
+    version = await data_version.current(project)
+    fingerprints: dict[str, str] = {}
+    keys: list[cache.MetricCacheKey] = []
+    for cell in cells:
+        predicates = (
+            ""
+            if cell.filter_predicates is None
+            else cell.filter_predicates.model_dump_json()
+        )
+        if predicates not in fingerprints:
+            fingerprints[predicates] = filter_fingerprint(
+                cell.filter_predicates, data_ids
+            )
+        keys.append(
+            cache.key(
+                project, version, cell.model, cell.metric, fingerprints[predicates]
+            )
+        )
+
+    results = [cache.get(k) for k in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if len(missing) == 0:
+        return [r for r in results if r is not None]
+
+    computed = await _evaluate_cells(
+        project, [cells[i] for i in missing], query_limit(), data_ids, approximate
+    )
+    for i, result in zip(missing, computed):
+        results[i] = result
+        if not result.approximate:
+            cache.put(keys[i], result)
+    return [r for r in results if r is not None]
+
+
+async def _evaluate_cells(
+    project: str,
+    cells: list[MetricCell],
+    limit: asyncio.Semaphore,
+    data_ids: list[str] | None = None,
+    approximate: bool = False,
+) -> list[GroupMetric]:
+    if len(cells) == 0:
+        return []
+
+    filters: dict[tuple[str | None, str], sql.Composed | None] = {}
+    cell_filters: list[sql.Composed | None] = []
+    compiled: list[tuple[sql.Composable, sql.Composable | None]] = []
+    for cell in cells:
+        filter_key = (
+            cell.model,
+            ""
+            if cell.filter_predicates is None
+            else cell.filter_predicates.model_dump_json(),
+        )
+        if filter_key not in filters:
+            filters[filter_key] = await table_filter(
+                project, cell.model, cell.filter_predicates, data_ids
+            )
+        cell_filters.append(filters[filter_key])
+        compiled.append(await cell_aggregates(project, cell, filters[filter_key]))
+
+    sample = await counts.sample_percent(project) if approximate else None
+    version = await data_version.current(project)
+    groups: dict[str | None, list[sql.Composable]] = {}
+    positions: dict[str, tuple[str | None, int]] = {}
+
+    def position(
+        model: str | None, aggregate: sql.Composable
+    ) -> tuple[str | None, int]:
+        key = aggregate.as_string(None)
+        if key not in positions:
+            group = groups.setdefault(model, [])
+            positions[key] = (model, len(group))
+            group.append(aggregate)
+        return positions[key]
+
+    sizes: list[int | None] = [
+        counts.cached(project, version, cell.model, filter_sql)
+        if sample is None and avg_sql is None
+        else None
+        for cell, filter_sql, (_, avg_sql) in zip(cells, cell_filters, compiled)
+    ]
+    cell_positions = [
+        (
+            None if size is not None else position(cell.model, count_sql),
+            None if avg_sql is None else position(cell.model, avg_sql),
+        )
+        for cell, size, (count_sql, avg_sql) in zip(cells, sizes, compiled)
+    ]
+    sampled_position = None
+    if sample is not None:
+        # The size of the sample, to scale the counts to the whole table.
+        sampled_position = position(cells[0].model, sql.SQL("COUNT(*)"))
+
+    statements = [
+        (model, aggregates[i : i + MAX_AGGREGATES_PER_STATEMENT])
+        for model, aggregates in groups.items()
+        for i in range(0, len(aggregates), MAX_AGGREGATES_PER_STATEMENT)
+    ]
+    rows = await gather_bounded(
+        [
+            evaluate_aggregates(
+                project, model, aggregates, None if sample is None else sample[0]
+            )
+            for model, aggregates in statements
+        ],
+        limit,
+    )
+    values: dict[str | None, list] = {model: [] for model in groups}
+    for (model, _), row in zip(statements, rows):
+        values[model].extend(row)
+    sampled = 0
+    if sampled_position is not None:
+        sampled = values[sampled_position[0]][sampled_position[1]]
+        if sampled == 0:
+            # The sample missed all rows, e.g. of a table with few pages.
+            return await _evaluate_cells(project, cells, limit, data_ids)
+
+    results: list[GroupMetric] = []
+    for cell, filter_sql, size, (size_position, metric_position) in zip(
+        cells, cell_filters, sizes, cell_positions
+    ):
+        if size_position is not None:
+            size = values[size_position[0]][size_position[1]]
+            size = size if isinstance(size, int) else 0
+            if sample is None:
+                counts.store(project, version, cell.model, filter_sql, size)
+            else:
+                size = round(sample[1] * size / sampled)
+        if metric_position is not None:
+            metric = values[metric_position[0]][metric_position[1]]
+            metric = float(metric) if metric is not None else None
+        elif cell.metric is not None and cell.metric.type == "count":
+            metric = size
+        else:
+            metric = None
+        results.append(
+            GroupMetric(metric=metric, size=size or 0, approximate=sample is not None)
+        )
+    return results
@@ -0,0 +1,77 @@
+"""In-process cache of metric results.
+
+Slice metrics, chart data, and reports evaluate the same metrics on the same slices
+over and over. Their results are kept in memory, keyed by the project, its data
+version, the model, the metric, and the fingerprint of the filter, so that repeated
+evaluations do not query the database. Uploads and deletions change the data
+version, changed slices and metrics change the fingerprint and metric of the key.
+"""
+
+import os
+from collections import OrderedDict
+
+from zeno_backend.classes.base import GroupMetric
+from zeno_backend.classes.metric import Metric
+
+# Maximum number of metric results kept, the least recently used are dropped.
+METRIC_CACHE_SIZE = int(os.environ.get("ZENO_METRIC_CACHE_SIZE", 10000))
+
+MetricCacheKey = tuple[str, int, str | None, tuple[str, tuple[str, ...]] | None, str]
+
+# Metric results keyed by (project, data version, model, metric, filter).
+_results: OrderedDict[MetricCacheKey, GroupMetric] = OrderedDict()
+
+
+def key(
+    project: str,
+    version: int,
+    model: str | None,
+    metric: Metric | None,
+    fingerprint: str,
+) -> MetricCacheKey:
+    """Get the key of a metric result.
+
+    Metrics are identified by their definition, so that a changed metric does not
+    find the results of its previous definition.
+
+    Args:
+        project (str): the project the user is currently working with.
+        version (int): the data version of the project.
+        model (str | None): the model the metric is calculated for.
+        metric (Metric | None): the metric, None to only count.
+        fingerprint (str): the fingerprint of the filter.
+
+    Returns:
+        MetricCacheKey: the key of the result.
+    """
+    definition = None if metric is None else (metric.type, tuple(metric.columns))
+    return (project, version, model, definition, fingerprint)
+
+
+def get(result_key: MetricCacheKey) -> GroupMetric | None:
+    """Get a cached metric result.
+
+    Args:
+        result_key (MetricCacheKey): the key of the result.
+
+    Returns:
+        GroupMetric | None: a copy of the result or None if it is not cached.
+    """
+    result = _results.get(result_key)
+    if result is None:
+        return None
+    _results.move_to_end(result_key)
+    return result.model_copy()
+
+
+def put(result_key: MetricCacheKey, result: GroupMetric):
+    """Cache a metric result.
+
+    Args:
+        result_key (MetricCacheKey): the key of the result.
+        result (GroupMetric): the result to cache.
+    """
+    _results[result_key] = result.model_copy()
+    _results.move_to_end(result_key)
+    if len(_results) > METRIC_CACHE_SIZE:
+        _results.popitem(last=False)
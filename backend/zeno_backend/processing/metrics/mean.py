@@ -4,7 +4,8 @@ from psycopg import sql
 
 from zeno_backend.classes.base import GroupMetric, MetadataType
 from zeno_backend.classes.metric import Metric
-from zeno_backend.database.database import db_pool
+from zeno_backend.database import column_map, counts, data_version, prepared
+from zeno_backend.database.database import read_connection
 
 
 async def mean(
@@ -24,59 +25,37 @@ async def mean(
     Returns:
         GroupMetric: mean of the metric for the given project.
     """
-    async with db_pool.connection() as db:
-        async with db.cursor() as cur:
-            # Get column name from project column map
-            await cur.execute(
-                sql.SQL(
-                    "SELECT column_id, data_type FROM {} WHERE name = {} AND"
-                    " (model IS NULL OR model = {})"
-                ).format(
-                    sql.Identifier(f"{project_uuid}_column_map"),
-                    sql.Literal(metric.columns[0]),
-                    sql.Literal(model),
-                )
-            )
-            column_output = await cur.fetchall()
+    column = await column_map.model_or_dataset_column(
+        project_uuid, metric.columns[0], model
+    )
 
-            if len(column_output) == 0:
-                if filter is not None:
-                    await cur.execute(
-                        sql.SQL("SELECT COUNT(*) AS n FROM {} WHERE ").format(
-                            sql.Identifier(project_uuid),
-                        )
-                        + filter
-                    )
-                else:
-                    await cur.execute(
-                        sql.SQL("SELECT COUNT(*) AS n FROM {}").format(
-                            sql.Identifier(project_uuid),
-                        )
-                    )
-                row_count = await cur.fetchall()
-                if len(row_count) > 0:
-                    return GroupMetric(metric=None, size=row_count[0][0])
-                else:
-                    return GroupMetric(metric=None, size=0)
+    if column is None:
+        size, _ = await counts.count(project_uuid, filter, model)
+        return GroupMetric(metric=None, size=size)
 
-            column_id = column_output[0][0]
-            if column_output[0][1] == MetadataType.BOOLEAN:
-                column_id = sql.Identifier(column_id) + sql.SQL("::int")
+    version = await data_version.current(project_uuid)
+    source = await column_map.data_source(project_uuid, [model])
+    async with read_connection() as db:
+        async with db.cursor() as cur:
+            if column.data_type == MetadataType.BOOLEAN:
+                column_id = sql.Identifier(column.id) + sql.SQL("::int")
             else:
-                column_id = sql.Identifier(column_id)
+                column_id = sql.Identifier(column.id)
 
             if filter is None:
-                await cur.execute(
+                await prepared.execute(
+                    cur,
                     sql.SQL("SELECT COUNT(*) AS n, AVG({}) FROM {}").format(
-                        column_id, sql.Identifier(project_uuid)
-                    )
+                        column_id, source
+                    ),
                 )
             else:
-                await cur.execute(
+                await prepared.execute(
+                    cur,
                     sql.SQL("SELECT COUNT(*) AS n, AVG({}) FROM {} WHERE ").format(
-                        column_id, sql.Identifier(project_uuid)
+                        column_id, source
                     )
-                    + filter
+                    + filter,
                 )
 
             if cur.rowcount == 0:
@@ -85,6 +64,7 @@ async def mean(
                 res = await cur.fetchone()
 
             if res is not None:
+                counts.store(project_uuid, version, model, filter, res[0])
                 return GroupMetric(
                     metric=float(res[1]) if res[1] is not None else None, size=res[0]
                 )
@@ -0,0 +1,102 @@
+"""Background precomputation of chart data, histograms, and indexes.
+
+Uploads and changes to slices, metrics, and charts submit jobs that recompute the
+cached data of a project, so that reads find it already computed. Jobs are executed
+by an in-process asyncio queue unless another backend is installed with
+`set_job_queue`.
+"""
+
+from zeno_backend.classes.base import MetadataType
+from zeno_backend.classes.job import Job, JobType
+from zeno_backend.database import insert, select
+from zeno_backend.database.database import primary_reads
+from zeno_backend.processing.chart import refresh_chart_data
+from zeno_backend.processing.jobs import AsyncioJobQueue, JobQueue
+
+# The columns each project's table was sorted by, which get an index.
+_sort_columns: dict[str, set[str]] = {}
+
+
+async def run_job(job: Job):
+    """Execute a precomputation job.
+
+    Args:
+        job (Job): the job to execute.
+    """
+    project = job.project_uuid
+    # Jobs store their results and follow writes, so they read from the primary.
+    with primary_reads():
+        if job.type == JobType.CHARTS:
+            await refresh_chart_data(project)
+        elif job.type == JobType.HISTOGRAMS:
+            columns = [
+                c
+                for c in await select.columns(project)
+                if c.data_type != MetadataType.EMBEDDING
+            ]
+            if len(columns) > 0:
+                await select.histogram_buckets(project, columns)
+        elif job.type == JobType.SORT_INDEXES:
+            await insert.sort_indexes(project, list(_sort_columns.get(project, ())))
+
+
+job_queue: JobQueue = AsyncioJobQueue(run_job)
+
+
+def set_job_queue(queue: JobQueue):
+    """Replace the backend that executes precomputation jobs.
+
+    Args:
+        queue (JobQueue): the new job queue backend.
+    """
+    global job_queue
+    job_queue = queue
+
+
+async def refresh_charts(project_uuid: str) -> Job:
+    """Recompute the invalidated chart data of a project in the background.
+
+    Args:
+        project_uuid (str): the project whose chart data was invalidated.
+
+    Returns:
+        Job: the job recomputing the chart data.
+    """
+    return await job_queue.submit(project_uuid, JobType.CHARTS)
+
+
+async def refresh_histograms(project_uuid: str) -> Job:
+    """Compute the missing histogram buckets of a project in the background.
+
+    Args:
+        project_uuid (str): the project whose columns changed.
+
+    Returns:
+        Job: the job computing the histogram buckets.
+    """
+    return await job_queue.submit(project_uuid, JobType.HISTOGRAMS)
+
+
+async def index_sort_column(project_uuid: str, column_id: str):
+    """Create the index for paging through a table sorted by a column, once.
+
+    Args:
+        project_uuid (str): the project whose table is sorted.
+        column_id (str): the column the table is sorted by.
+    """
+    columns = _sort_columns.setdefault(project_uuid, set())
+    if column_id not in columns:
+        columns.add(column_id)
+        await job_queue.submit(project_uuid, JobType.SORT_INDEXES)
+
+
+async def refresh_sort_indexes(project_uuid: str) -> Job:
+    """Create the indexes of the sorted columns of a project in the background.
+
+    Args:
+        project_uuid (str): the project whose dataset table was replaced.
+
+    Returns:
+        Job: the job creating the indexes.
+    """
+    return await job_queue.submit(project_uuid, JobType.SORT_INDEXES)
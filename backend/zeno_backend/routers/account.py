@@ -13,8 +13,10 @@ import zeno_backend.database.insert as insert
 import zeno_backend.database.select as select
 import zeno_backend.database.update as update
 import zeno_backend.util as util
+from zeno_backend import authentication
 from zeno_backend.classes.amplitude import AmplitudeHandler
 from zeno_backend.classes.user import Organization, User
+from zeno_backend.database.database import primary_reads
 
 router = APIRouter(tags=["zeno"])
 
@@ -62,7 +64,8 @@ async def login(name: str, current_user=Depends(util.auth.claim())):
                     user_id=user.cognito_id,
                 )
             )
-            return await select.user(name)
+            with primary_reads():
+                return await select.user(name)
         except Exception as exc:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -79,6 +82,7 @@ async def login(name: str, current_user=Depends(util.auth.claim())):
                     cognito_id=current_user["sub"],
                 )
             )
+            authentication.forget_user(fetched_user.id)
         except Exception as exc:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -185,6 +189,7 @@ async def update_user(user: User):
         user (User): updated user profile.
     """
     await update.user(user)
+    authentication.forget_user(user.id)
 
 
 @router.patch("/organization/", tags=["zeno"], dependencies=[Depends(util.auth)])
@@ -13,9 +13,11 @@ import zeno_backend.database.delete as delete
 import zeno_backend.database.insert as insert
 import zeno_backend.database.select as select
 import zeno_backend.database.update as update
+import zeno_backend.processing.precompute as precompute
 import zeno_backend.util as util
 from zeno_backend.classes.amplitude import AmplitudeHandler
 from zeno_backend.classes.chart import Chart, ChartConfig
+from zeno_backend.database.database import primary_reads
 from zeno_backend.processing.chart import calculate_chart_data
 
 router = APIRouter(tags=["zeno"])
@@ -81,9 +83,12 @@ async def get_chart_data(project_uuid, chart_id: int, request: Request):
     await util.project_access_valid(project_uuid, request)
     data = await select.chart_data(chart_id)
     if data is None:
-        chart = await select.chart(chart_id)
-        data = await calculate_chart_data(chart, project_uuid)
-        await update.chart_data(chart_id, data)
+        # The data is stored, compute it from the primary's data.
+        with primary_reads():
+            generation = await select.chart_data_generation(chart_id)
+            chart = await select.chart(chart_id)
+            data = await calculate_chart_data(chart, project_uuid)
+        await update.chart_data(chart_id, data, generation)
     return data
 
 
@@ -167,6 +172,7 @@ async def add_chart(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to insert chart",
         )
+    await precompute.refresh_charts(project_uuid)
     AmplitudeHandler().track(
         BaseEvent(
             event_type="Chart Created",
@@ -194,6 +200,7 @@ async def update_chart(project_uuid: str, chart: Chart, request: Request):
     selected_chart = await select.chart(chart.id)
     if selected_chart.project_uuid == project_uuid:
         await update.chart(chart, project_uuid)
+        await precompute.refresh_charts(project_uuid)
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
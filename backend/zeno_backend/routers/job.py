@@ -0,0 +1,49 @@
+"""FastAPI server endpoints for background precomputation jobs."""
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+import zeno_backend.util as util
+from zeno_backend.classes.job import Job
+from zeno_backend.processing import precompute
+
+router = APIRouter(tags=["zeno"])
+
+
+@router.get("/jobs/{project_uuid}", response_model=list[Job], tags=["zeno"])
+async def get_jobs(project_uuid: str, request: Request):
+    """Get the recent precomputation jobs of a project.
+
+    Args:
+        project_uuid (str): UUID of the project to get jobs for.
+        request (Request): http request to get user information from.
+
+    Returns:
+        list[Job]: the recent jobs of the project, oldest first.
+    """
+    await util.project_access_valid(project_uuid, request)
+    return await precompute.job_queue.jobs(project_uuid)
+
+
+@router.get("/job/{project_uuid}/{job_id}", response_model=Job, tags=["zeno"])
+async def get_job(project_uuid: str, job_id: str, request: Request):
+    """Get the status of a precomputation job.
+
+    Args:
+        project_uuid (str): UUID of the project the job belongs to.
+        job_id (str): id of the job.
+        request (Request): http request to get user information from.
+
+    Raises:
+        HTTPException: error if the job does not exist.
+
+    Returns:
+        Job: the job and its status.
+    """
+    await util.project_access_valid(project_uuid, request)
+    job = await precompute.job_queue.job(job_id)
+    if job is None or job.project_uuid != project_uuid:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job could not be found.",
+        )
+    return job
@@ -1,6 +1,5 @@
 """FastAPI server endpoints for metadata-related queries."""
 
-import asyncio
 import datetime
 
 from fastapi import (
@@ -162,19 +161,7 @@ async def calculate_histograms(
     if histograms is None:
         return []
 
-    res = await asyncio.gather(
-        *[
-            histogram_metric_and_count(
-                req,
-                col,
-                histograms[col.id],
-                project_uuid,
-                filter_sql,
-            )
-            for col in req.columns
-        ]
-    )
-    return res
+    return await histogram_metric_and_count(req, histograms, project_uuid, filter_sql)
 
 
 @router.post(
@@ -10,9 +10,10 @@ import zeno_backend.util as util
 from zeno_backend.classes.base import (
     GroupMetric,
 )
-from zeno_backend.classes.metric import Metric, MetricRequest
+from zeno_backend.classes.metric import Metric, MetricCell, MetricRequest
 from zeno_backend.classes.tag import TagMetricKey
 from zeno_backend.processing.filtering import table_filter
+from zeno_backend.processing.metrics.batch import metric_batch
 from zeno_backend.processing.metrics.map import metric_map
 
 router = APIRouter(tags=["zeno"])
@@ -54,26 +55,22 @@ async def get_metrics_filtered(project_uuid: str, req: MetricRequest, request: R
         list[Metric]: metrics that match the metric request.
     """
     await util.project_access_valid(project_uuid, request)
-    return_metrics: list[GroupMetric] = []
     metrics = await select.metrics_by_id(
         [m.metric for m in req.metric_keys], project_uuid
     )
-    for metric_key in req.metric_keys:
-        filter_sql = await table_filter(
-            project_uuid,
-            metric_key.model,
-            metric_key.slice.filter_predicates,
-            req.data_ids,
-        )
-        return_metrics.append(
-            await metric_map(
-                metrics.get(metric_key.metric),
-                project_uuid,
-                metric_key.model,
-                filter_sql,
+    return await metric_batch(
+        project_uuid,
+        [
+            MetricCell(
+                metric=metrics.get(metric_key.metric),
+                model=metric_key.model,
+                filter_predicates=metric_key.slice.filter_predicates,
             )
-        )
-    return return_metrics
+            for metric_key in req.metric_keys
+        ],
+        req.data_ids,
+        req.approximate,
+    )
 
 
 @router.post(
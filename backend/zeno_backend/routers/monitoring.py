@@ -0,0 +1,30 @@
+"""FastAPI server endpoints for monitoring the backend."""
+
+from fastapi import APIRouter, Depends
+
+import zeno_backend.util as util
+from zeno_backend.classes.monitoring import ChartStats, DatabaseStats
+from zeno_backend.database.database import database_stats
+from zeno_backend.processing import chart
+
+router = APIRouter(tags=["zeno"], dependencies=[Depends(util.monitoring_access)])
+
+
+@router.get("/internal/database", response_model=DatabaseStats, tags=["zeno"])
+def get_database_stats():
+    """Get the usage statistics of the database connection pools.
+
+    Returns:
+        DatabaseStats: the statistics of the connection pools and statements.
+    """
+    return database_stats()
+
+
+@router.get("/internal/charts", response_model=list[ChartStats], tags=["zeno"])
+def get_chart_stats():
+    """Get the latency and size of the chart data computations of this process.
+
+    Returns:
+        list[ChartStats]: the statistics of each chart type that was computed.
+    """
+    return list(chart.stats.values())
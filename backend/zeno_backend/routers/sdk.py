@@ -20,8 +20,10 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from zeno_backend.classes.amplitude import AmplitudeHandler
 from zeno_backend.classes.project import Project
+from zeno_backend.classes.upload import UploadSession
 from zeno_backend.database import delete, insert, select, update
-from zeno_backend.database.util import match_instance_view
+from zeno_backend.database.util import match_instance_view, record_batches
+from zeno_backend.processing import precompute
 from zeno_backend.util import user_project_editor
 
 # Bump only for breaking changes
@@ -89,6 +91,24 @@ class APIKeyBearer(HTTPBearer):
 router = APIRouter(tags=["zeno"], dependencies=[Depends(APIKeyBearer())])
 
 
+async def refresh_after_upload(project_uuid: str, system_name: str | None = None):
+    """Invalidate cached data affected by an upload and precompute it again.
+
+    Args:
+        project_uuid (str): the UUID of the project data was uploaded to.
+        system_name (str | None, optional): the name of the uploaded system, None
+            if a dataset was uploaded. Defaults to None.
+    """
+    await update.clear_histograms(project_uuid)
+    await update.clear_chart_data(
+        project_uuid, models=None if system_name is None else [system_name]
+    )
+    await precompute.refresh_histograms(project_uuid)
+    await precompute.refresh_charts(project_uuid)
+    if system_name is None:
+        await precompute.refresh_sort_indexes(project_uuid)
+
+
 @router.get("/project-by-name/{owner_name}/{project_name}")
 async def get_project_by_name(
     owner_name: str, project_name: str, api_key=Depends(APIKeyBearer())
@@ -144,6 +164,7 @@ async def create_project(
         project.uuid = project_uuid
         await update.project(project)
         await update.project_metrics(project)
+        await precompute.refresh_charts(project_uuid)
     else:
         project.uuid = str(uuid.uuid4())
         await insert.project(project, user.id)
@@ -222,7 +243,7 @@ async def upload_dataset(
 
     Args:
         project_uuid (str): the UUID of the project to add data to.
-        file (UploadFile): the dataset to upload. Serialized Arrow RecordBatch.
+        file (UploadFile): the dataset to upload. Arrow IPC file or stream.
         api_key (str, optional): API key.
     """
     user = await select.user_by_api_key(api_key)
@@ -241,12 +262,10 @@ async def upload_dataset(
             detail=("ERROR: Project does not exist."),
         )
 
-    contents = await file.read()
-    reader = pa.ipc.RecordBatchFileReader(contents)
-    batch = reader.get_batch(0)
+    schema, batches = record_batches(file.file)
 
     try:
-        await insert.dataset(project_uuid, batch)
+        await insert.dataset(project_uuid, schema, batches)
     except Exception as e:
         # If one of the batches fails, delete the entire dataset.
         await delete.dataset(project_uuid)
@@ -255,6 +274,8 @@ async def upload_dataset(
             detail=("ERROR: Unable to create dataset table." + str(e)),
         )
 
+    await refresh_after_upload(project_uuid)
+
 
 @router.post("/system-schema")
 async def upload_system_schema(
@@ -321,7 +342,7 @@ async def upload_system(
     Args:
         project_uuid (str): the UUID of the project to add the system to.
         system_name (str): the name of the system.
-        file (UploadFile): the system to upload. Serialized Arrow RecordBatch.
+        file (UploadFile): the system to upload. Arrow IPC file or stream.
         api_key (str, optional): API key.
     """
     user = await select.user_by_api_key(api_key)
@@ -340,12 +361,10 @@ async def upload_system(
             detail=("ERROR: Project does not exist."),
         )
 
-    contents = await file.read()
-    reader = pa.ipc.RecordBatchFileReader(contents)
-    batch = reader.get_batch(0)
+    schema, batches = record_batches(file.file)
 
     try:
-        await insert.system(project_uuid, batch)
+        await insert.system(project_uuid, system_name, schema, batches)
     except Exception as e:
         # If one of the batches fails, delete the entire system.
         await delete.system(project_uuid, system_name)
@@ -354,6 +373,154 @@ async def upload_system(
             detail=("ERROR: Unable to upload system: " + str(e)),
         )
 
+    await refresh_after_upload(project_uuid, system_name)
+
+
+async def project_upload_session(
+    project_uuid: str, session_id: str, api_key: str
+) -> UploadSession:
+    """Get an upload session after checking that the user may upload to it.
+
+    Args:
+        project_uuid (str): the UUID of the project the session uploads to.
+        session_id (str): the id of the upload session.
+        api_key (str): API key of the user making the request.
+
+    Raises:
+        HTTPException: the session does not exist or belongs to another project.
+
+    Returns:
+        UploadSession: the upload session.
+    """
+    user = await select.user_by_api_key(api_key)
+    await user_project_editor(project_uuid, user)
+    session = await select.upload_session(session_id)
+    if session is None or session.project_uuid != project_uuid:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ERROR: Upload session does not exist.",
+        )
+    return session
+
+
+@router.post("/upload/{project_uuid}", response_model=UploadSession)
+async def open_upload_session(
+    project_uuid: str,
+    system_name: str | None = None,
+    api_key=Depends(APIKeyBearer()),
+):
+    """Open a chunked upload of a dataset or system.
+
+    The schema of the dataset or system has to be uploaded first. Chunks can then be
+    uploaded in any order and in parallel, and are only added to the project once
+    the session is committed. Failed chunks can be uploaded again.
+
+    Args:
+        project_uuid (str): the UUID of the project to add data to.
+        system_name (str | None, optional): the name of the system to upload, None
+            to upload a dataset. Defaults to None.
+        api_key (str, optional): API key.
+
+    Returns:
+        UploadSession: the new upload session.
+    """
+    user = await select.user_by_api_key(api_key)
+    await user_project_editor(project_uuid, user)
+    if not await select.project_uuid_exists(project_uuid):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=("ERROR: Project does not exist."),
+        )
+    return await insert.upload_session(project_uuid, system_name)
+
+
+@router.get("/upload/{project_uuid}/{session_id}", response_model=UploadSession)
+async def get_upload_session(
+    project_uuid: str, session_id: str, api_key=Depends(APIKeyBearer())
+):
+    """Get an upload session and the chunks it has received.
+
+    Args:
+        project_uuid (str): the UUID of the project the session uploads to.
+        session_id (str): the id of the upload session.
+        api_key (str, optional): API key.
+
+    Returns:
+        UploadSession: the upload session.
+    """
+    return await project_upload_session(project_uuid, session_id, api_key)
+
+
+@router.put("/upload/{project_uuid}/{session_id}/{chunk}")
+async def upload_chunk(
+    project_uuid: str,
+    session_id: str,
+    chunk: int,
+    file: UploadFile = File(...),
+    api_key=Depends(APIKeyBearer()),
+):
+    """Upload a numbered chunk of an upload session.
+
+    Uploading a chunk again replaces the previously staged data of the chunk.
+
+    Args:
+        project_uuid (str): the UUID of the project the session uploads to.
+        session_id (str): the id of the upload session.
+        chunk (int): the number of the chunk.
+        file (UploadFile): the data of the chunk. Arrow IPC file or stream.
+        api_key (str, optional): API key.
+    """
+    session = await project_upload_session(project_uuid, session_id, api_key)
+    schema, batches = record_batches(file.file)
+    try:
+        await insert.upload_chunk(session, chunk, schema, batches)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=("ERROR: Unable to upload chunk: " + str(e)),
+        )
+
+
+@router.post("/upload/{project_uuid}/{session_id}/commit")
+async def commit_upload_session(
+    project_uuid: str, session_id: str, api_key=Depends(APIKeyBearer())
+):
+    """Add all chunks of an upload session to the project and close the session.
+
+    Args:
+        project_uuid (str): the UUID of the project the session uploads to.
+        session_id (str): the id of the upload session.
+        api_key (str, optional): API key.
+    """
+    session = await project_upload_session(project_uuid, session_id, api_key)
+    try:
+        await insert.commit_upload(session)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=("ERROR: Unable to commit upload: " + str(e)),
+        )
+    await refresh_after_upload(project_uuid, session.system_name)
+
+
+@router.delete("/upload/{project_uuid}/{session_id}")
+async def abort_upload_session(
+    project_uuid: str, session_id: str, api_key=Depends(APIKeyBearer())
+):
+    """Abort an upload session and discard its chunks.
+
+    Args:
+        project_uuid (str): the UUID of the project the session uploads to.
+        session_id (str): the id of the upload session.
+        api_key (str, optional): API key.
+    """
+    await project_upload_session(project_uuid, session_id, api_key)
+    await delete.upload_session(session_id)
+
 
 @router.delete("/system/{project_uuid}/{system_name}")
 async def delete_system(
@@ -369,6 +536,7 @@ async def delete_system(
     user = await select.user_by_api_key(api_key)
     await user_project_editor(project_uuid, user)
     await delete.system(project_uuid, system_name)
+    await precompute.refresh_charts(project_uuid)
 
 
 @router.delete("/systems/{project_uuid}")
@@ -382,6 +550,7 @@ async def delete_all_systems(project_uuid: str, api_key=Depends(APIKeyBearer()))
     user = await select.user_by_api_key(api_key)
     await user_project_editor(project_uuid, user)
     await delete.systems(project_uuid)
+    await precompute.refresh_charts(project_uuid)
 
 
 @router.get("/min-client-version")
@@ -7,6 +7,7 @@ import zeno_backend.database.delete as delete
 import zeno_backend.database.insert as insert
 import zeno_backend.database.select as select
 import zeno_backend.database.update as update
+import zeno_backend.processing.precompute as precompute
 import zeno_backend.util as util
 from zeno_backend.classes.amplitude import AmplitudeHandler
 from zeno_backend.classes.base import (
@@ -217,8 +218,9 @@ async def update_slice(project_uuid: str, slice: Slice, request: Request):
     await util.project_editor(project_uuid, request)
     selected_slice = await select.slice(slice.id)
     if selected_slice.project_uuid == project_uuid:
-        await update.clear_chart_data(project_uuid)
         await update.slice(slice, project_uuid)
+        await update.clear_chart_data(project_uuid, slices=[slice.id])
+        await precompute.refresh_charts(project_uuid)
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -240,8 +242,9 @@ async def delete_slice(project_uuid: str, slice_id: int, request: Request):
     await util.project_editor(project_uuid, request)
     slice = await select.slice(slice_id)
     if slice.project_uuid == project_uuid:
-        await update.clear_chart_data(project_uuid)
         await delete.slice(slice_id)
+        await update.clear_chart_data(project_uuid, slices=[slice_id])
+        await precompute.refresh_charts(project_uuid)
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
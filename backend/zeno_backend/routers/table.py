@@ -1,13 +1,22 @@
 """FastAPI server endpoints for data-table-related queries."""
 
 import pandas as pd
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 import zeno_backend.database.select as select
 import zeno_backend.util as util
 from zeno_backend.classes.table import SliceTableRequest, TableRequest, TagTableRequest
+from zeno_backend.database import access, column_map
+from zeno_backend.database.util import arrow_stream
+from zeno_backend.processing import precompute
 from zeno_backend.processing.filtering import table_filter
 
+# Media type of Arrow IPC streams.
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+# Header holding the token to request the next page of a table with.
+NEXT_PAGE_TOKEN = "X-Next-Page-Token"
+
 router = APIRouter(tags=["zeno"])
 
 
@@ -15,24 +24,56 @@ router = APIRouter(tags=["zeno"])
     "/filtered-table/{project_uuid}",
     response_model=str,
     tags=["zeno"],
+    responses={200: {"content": {ARROW_STREAM: {}}}},
 )
-async def get_filtered_table(project_uuid: str, req: TableRequest, request: Request):
+async def get_filtered_table(
+    project_uuid: str, req: TableRequest, request: Request, response: Response
+):
     """Get the data in a project's table.
 
+    Sorting the table as an editor of the project queues building an index for
+    paging through the table in that order.
+
+    Clients that accept `application/vnd.apache.arrow.stream` get the data as an
+    Arrow IPC stream that is written while the rows are read. The token for the
+    next page is sent in the `X-Next-Page-Token` header, or in the `next_page_token`
+    metadata of the stream's last batch.
+
     Args:
         req (TableRequest): specification of the data request to the table.
         project_uuid (str): project to fetch data for.
         request (Request): http request to get user information from.
+        response (Response): the response to set the page token header of.
 
     Returns:
-        json: json representation of the requested data.
+        json: json representation of the requested data, or an Arrow IPC stream.
     """
     await util.project_access_valid(project_uuid, request)
     filter_sql = await table_filter(
         project_uuid, req.model, req.filter_predicates, req.data_ids
     )
+    sort_column = req.sort[0] or await column_map.id_column(project_uuid)
+    if sort_column is not None and sort_column.id != "":
+        # Only editors start index builds, viewers of public projects cannot.
+        user = await util.get_user_from_token(request)
+        if user is not None and (await access.project_access(project_uuid, user))[1]:
+            await precompute.index_sort_column(project_uuid, sort_column.id)
+
+    if ARROW_STREAM in request.headers.get("accept", ""):
+        stream = arrow_stream(select.table_data_arrow(project_uuid, filter_sql, req))
+        # Run the query before responding, so that errors still get a status code.
+        first = await stream.__anext__()
+
+        async def content():
+            yield first
+            async for chunk in stream:
+                yield chunk
+
+        return StreamingResponse(content(), media_type=ARROW_STREAM)
 
     sql_table = await select.table_data_paginated(project_uuid, filter_sql, req)
+    if sql_table.next_page_token is not None:
+        response.headers[NEXT_PAGE_TOKEN] = sql_table.next_page_token
     table = pd.DataFrame(sql_table.table, columns=sql_table.columns)
 
     return table.to_json(orient="records")
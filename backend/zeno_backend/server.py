@@ -3,18 +3,25 @@
 import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
+from zeno_backend.database import delete
+from zeno_backend.database.database import close_pools, open_pools
+from zeno_backend.database.migrate import migrate
+from zeno_backend.processing import precompute
 from zeno_backend.routers import (
     account,
     chart,
     folder,
+    job,
     metadata,
     metric,
+    monitoring,
     project,
     report,
     sdk,
@@ -39,13 +46,34 @@ class EndpointFilter(logging.Filter):
         return record.getMessage().find("/ping") == -1
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database connection pools while the server is running.
+
+    The schema of the database is brought up to date and expired uploads are
+    dropped when the server starts. Precomputation jobs are stopped before the
+    pools are closed.
+
+    Args:
+        app (FastAPI): the server.
+    """
+    await open_pools()
+    await migrate()
+    await delete.expired_upload_sessions()
+    yield
+    await precompute.job_queue.stop()
+    await close_pools()
+
+
 def get_server() -> FastAPI:
     """Provide the FastAPI server and specifies its inputs.
 
     Returns:
         FastAPI: FastAPI endpoint
     """
-    app = FastAPI(title="Frontend API", separate_input_output_schemas=False)
+    app = FastAPI(
+        title="Frontend API", separate_input_output_schemas=False, lifespan=lifespan
+    )
     # Filter out /endpoint
     logging.getLogger("uvicorn.access").addFilter(EndpointFilter())
 
@@ -62,6 +90,7 @@ def get_server() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Next-Page-Token"],
         )
 
     api_app = FastAPI(
@@ -72,8 +101,10 @@ def get_server() -> FastAPI:
     api_app.include_router(account.router)
     api_app.include_router(chart.router)
     api_app.include_router(folder.router)
+    api_app.include_router(job.router)
     api_app.include_router(metadata.router)
     api_app.include_router(metric.router)
+    api_app.include_router(monitoring.router)
     api_app.include_router(project.router)
     api_app.include_router(report.router)
     api_app.include_router(sdk.router)
@@ -1,42 +1,16 @@
 """Utility functions for Zeno's backend."""
 
 import os
+import secrets
 
-import cognitojwt
 from fastapi import HTTPException, Request, status
-from fastapi_cloudauth.cognito import Cognito
 
-from zeno_backend import util
+from zeno_backend import authentication, util
 from zeno_backend.classes.user import User
-from zeno_backend.database import select
+from zeno_backend.database import access, select
 
-# function to get the user from cognito
-auth = Cognito(
-    region=os.environ["ZENO_USER_POOL_AUTH_REGION"],
-    userPoolId=os.environ["ZENO_USER_POOL_ID"],
-    client_id=os.environ["ZENO_USER_POOL_CLIENT_ID"],
-)
-
-
-def verify_token(token: str) -> bool:
-    """Verify a cognito access token.
-
-    Args:
-        token (str): the token to be verified.
-
-    Returns:
-        bool: whether or not verification succeeded.
-    """
-    try:
-        cognitojwt.decode(
-            token.split(" ")[1],
-            os.environ["ZENO_USER_POOL_AUTH_REGION"],
-            os.environ["ZENO_USER_POOL_ID"],
-            os.environ["ZENO_USER_POOL_CLIENT_ID"],
-        )
-        return True
-    except cognitojwt.CognitoJWTException:
-        return False
+# dependency that verifies the cognito access token of a request
+auth = authentication.auth
 
 
 async def project_access_valid(project: str | None, request: Request):
@@ -56,15 +30,14 @@ async def project_access_valid(project: str | None, request: Request):
         )
 
     if not await select.project_public(project):
-        token = request.headers.get("authorization")
         user = await util.get_user_from_token(request)
-        if token is None or not verify_token(token) or user is None:
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Unauthorized",
             )
-        available_project_ids = [x.uuid for x in await select.projects(user)]
-        if project not in available_project_ids:
+        viewer, _ = await access.project_access(project, user)
+        if not viewer:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Unauthorized",
@@ -81,9 +54,8 @@ async def project_editor(project_uuid: str, request: Request):
     Throws:
         HTTPException: if the project is not found or the user is not an editor.
     """
-    token = request.headers.get("authorization")
     user = await util.get_user_from_token(request)
-    if token is None or not verify_token(token) or user is None:
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized",
@@ -101,10 +73,8 @@ async def user_project_editor(project_uuid: str, user: User):
     Raises:
         HTTPException: if the user is not an editor.
     """
-    available_project_ids = [
-        project.uuid for project in await select.projects(user) if project.editor
-    ]
-    if project_uuid not in available_project_ids:
+    _, editor = await access.project_access(project_uuid, user)
+    if not editor:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized",
@@ -122,9 +92,8 @@ async def report_access_valid(report: int, request: Request):
         bool: whether or not othe project data can be accessed.
     """
     if not await select.report_public(report):
-        token = request.headers.get("authorization")
         user = await util.get_user_from_token(request)
-        if token is None or not verify_token(token) or user is None:
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Unauthorized",
@@ -147,9 +116,8 @@ async def report_editor(report_id: int, request: Request):
     Throws:
         HTTPException: if the report is not found or the user is not an editor.
     """
-    token = request.headers.get("authorization")
     user = await util.get_user_from_token(request)
-    if token is None or not verify_token(token) or user is None:
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized",
@@ -164,6 +132,32 @@ async def report_editor(report_id: int, request: Request):
         )
 
 
+async def monitoring_access(request: Request):
+    """Check whether a request may read the monitoring statistics of the backend.
+
+    Monitoring is disabled unless `ZENO_MONITORING_TOKEN` is set, requests have to
+    send it as their bearer token.
+
+    Args:
+        request (Request): the request to get the token from.
+
+    Throws:
+        HTTPException: if monitoring is disabled or the token is not valid.
+    """
+    token = os.environ.get("ZENO_MONITORING_TOKEN")
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found",
+        )
+    sent = request.headers.get("authorization", "").partition(" ")[2]
+    if not secrets.compare_digest(sent.encode(), token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized",
+        )
+
+
 async def get_user_from_token(request: Request) -> User | None:
     """Get a user from a cognito access token.
 
@@ -176,13 +170,4 @@ async def get_user_from_token(request: Request) -> User | None:
     token = request.headers.get("authorization")
     if token is None:
         return None
-    try:
-        user_dict = cognitojwt.decode(
-            token.split(" ")[1],
-            os.environ["ZENO_USER_POOL_AUTH_REGION"],
-            os.environ["ZENO_USER_POOL_ID"],
-            os.environ["ZENO_USER_POOL_CLIENT_ID"],
-        )
-        return await select.user(user_dict["username"])
-    except cognitojwt.CognitoJWTException:
-        return None
+    return await authentication.user(token.partition(" ")[2])
@@ -17,7 +17,8 @@ CREATE TABLE projects (
     public boolean NOT NULL DEFAULT false,
     description text NOT NULL DEFAULT '',
     created_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+    updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    data_version bigint NOT NULL DEFAULT 0
 );
 
 CREATE TABLE charts (
@@ -27,10 +28,31 @@ CREATE TABLE charts (
     type text NOT NULL,
     parameters text NOT NULL,
     data jsonb,
+    data_generation bigint NOT NULL DEFAULT 0,
+    created_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE upload_sessions (
+    id text PRIMARY KEY,
+    project_uuid text NOT NULL REFERENCES projects(uuid) ON DELETE CASCADE ON UPDATE CASCADE,
+    system_name text,
     created_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE jobs (
+    id text PRIMARY KEY,
+    project_uuid text NOT NULL REFERENCES projects(uuid) ON DELETE CASCADE ON UPDATE CASCADE,
+    type text NOT NULL,
+    status text NOT NULL,
+    error text,
+    created_at timestamp NOT NULL DEFAULT clock_timestamp(),
+    updated_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX jobs_project_uuid_created_at_idx ON jobs (project_uuid, created_at);
+
 CREATE TABLE reports (
     id integer GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     name text NOT NULL,
@@ -90,6 +112,8 @@ CREATE TABLE user_project (
     editor boolean NOT NULL DEFAULT false
 );
 
+CREATE INDEX user_project_project_uuid_user_id_idx ON user_project (project_uuid, user_id);
+
 CREATE TABLE user_organization (
     id integer GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     user_id integer NOT NULL REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE,
@@ -97,6 +121,8 @@ CREATE TABLE user_organization (
     admin boolean NOT NULL DEFAULT false
 );
 
+CREATE INDEX user_organization_user_id_organization_id_idx ON user_organization (user_id, organization_id);
+
 CREATE TABLE organization_project (
     id integer GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     organization_id integer NOT NULL REFERENCES organizations(id) ON DELETE CASCADE ON UPDATE CASCADE,
@@ -104,6 +130,8 @@ CREATE TABLE organization_project (
     editor boolean NOT NULL DEFAULT false
 );
 
+CREATE INDEX organization_project_project_uuid_organization_id_idx ON organization_project (project_uuid, organization_id);
+
 CREATE TABLE report_project (
     id integer GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     report_id integer NOT NULL REFERENCES reports(id) ON DELETE CASCADE ON UPDATE CASCADE,
@@ -1,9 +1,88 @@
 import {
 	MetadataType,
 	type FilterPredicateGroup,
+	type TableRequest,
 	type ZenoColumn,
 	type ZenoService
 } from '$lib/zenoapi';
+import type { ApiRequestOptions } from '$lib/zenoapi/core/ApiRequestOptions';
+import {
+	catchErrorCodes,
+	getHeaders,
+	getRequestBody,
+	getResponseBody
+} from '$lib/zenoapi/core/request';
+
+// Header holding the token to request the next page of a table with.
+const NEXT_PAGE_TOKEN = 'X-Next-Page-Token';
+
+/**
+ * Tokens to request the pages of a table after the pages that were loaded.
+ * A page requested with the token of the previous page costs the same as the
+ * first page, while a page requested with an offset has to skip all rows before it.
+ */
+export class PageTokens {
+	private request = '';
+	private tokens = new Map<number, string>();
+
+	/**
+	 * Get the token of the page starting at an offset, if the page before it was
+	 * loaded with the same request. Tokens of other requests are dropped.
+	 */
+	get(request: string, offset: number): string | undefined {
+		if (request !== this.request) {
+			this.request = request;
+			this.tokens.clear();
+		}
+		return this.tokens.get(offset);
+	}
+
+	/** Keep the token of the page starting at an offset, if the request is current. */
+	set(request: string, offset: number, token: string | null) {
+		if (request === this.request && token !== null) {
+			this.tokens.set(offset, token);
+		}
+	}
+}
+
+async function requestTable(
+	project_uuid: string,
+	requestBody: TableRequest,
+	client: ZenoService
+): Promise<[string, string | null]> {
+	const config = client.httpRequest.config;
+	const options: ApiRequestOptions = {
+		method: 'POST',
+		url: '/filtered-table/{project_uuid}',
+		path: {
+			project_uuid: project_uuid
+		},
+		body: requestBody,
+		mediaType: 'application/json',
+		errors: {
+			422: `Validation Error`
+		}
+	};
+	// The generated client returns either the body or a header, this needs both.
+	const response = await fetch(
+		`${config.BASE}/filtered-table/${(config.ENCODE_PATH || encodeURI)(project_uuid)}`,
+		{
+			method: options.method,
+			headers: await getHeaders(config, options),
+			body: getRequestBody(options),
+			credentials: config.WITH_CREDENTIALS ? config.CREDENTIALS : undefined
+		}
+	);
+	const body = await getResponseBody(response);
+	catchErrorCodes(options, {
+		url: response.url,
+		ok: response.ok,
+		status: response.status,
+		statusText: response.statusText,
+		body
+	});
+	return [body, response.headers.get(NEXT_PAGE_TOKEN)];
+}
 
 export async function getFilteredTable(
 	project_uuid: string,
@@ -15,14 +94,16 @@ export async function getFilteredTable(
 	sort: [ZenoColumn | undefined, boolean],
 	dataIds: string[],
 	client: ZenoService,
-	filterPredicates?: FilterPredicateGroup
+	filterPredicates?: FilterPredicateGroup,
+	pageTokens?: PageTokens
 ) {
 	const requestedColumns = completeColumns.filter(
 		(c) =>
 			c.dataType !== MetadataType.EMBEDDING &&
-			c.model !== undefined &&
-			c.model !== null &&
-			(filterModels.includes(c.model) || c.model === '')
+			(c.model === undefined ||
+				c.model === null ||
+				c.model === '' ||
+				filterModels.includes(c.model))
 	);
 
 	// create diff columns for comparison view
@@ -37,16 +118,26 @@ export async function getFilteredTable(
 		);
 	}
 
-	const res = await client.getFilteredTable(project_uuid, {
+	const tableRequest: TableRequest = {
 		columns: requestedColumns,
 		model: filterModels[0],
 		diffColumn1,
 		diffColumn2,
 		filterPredicates,
-		offset,
+		offset: 0,
 		limit,
 		sort,
-		dataIds
-	});
+		dataIds,
+		excludeEmbeddings: true
+	};
+	// Continue after the previous page if it was loaded, instead of skipping rows.
+	const request = JSON.stringify(tableRequest);
+	const pageToken = pageTokens?.get(request, offset);
+	const [res, nextPageToken] = await requestTable(
+		project_uuid,
+		pageToken === undefined ? { ...tableRequest, offset } : { ...tableRequest, pageToken },
+		client
+	);
+	pageTokens?.set(request, offset + limit, nextPageToken);
 	return JSON.parse(res);
 }
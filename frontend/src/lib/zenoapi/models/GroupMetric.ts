@@ -5,8 +5,15 @@
 
 /**
  * Specification for a metric on a group of datapoints.
+ *
+ * Attributes:
+ * metric (float | None): the value of the metric.
+ * size (int): the number of datapoints in the group.
+ * approximate (bool): whether the size and metric were estimated from a
+ * sample of a large table. Default False.
  */
 export type GroupMetric = {
 	metric?: number | null;
 	size: number;
+	approximate?: boolean;
 };
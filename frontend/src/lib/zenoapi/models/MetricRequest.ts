@@ -13,8 +13,11 @@ import type { MetricKey } from './MetricKey';
  * Attributes:
  * metric_keys (list[MetricKey]): the metric keys to be used for the metric.
  * data_ids (list[str] | None): the data ids to be used for the metric.
+ * approximate (bool): whether the metrics may be estimated from a sample if
+ * the project is large. Default False.
  */
 export type MetricRequest = {
 	metricKeys: Array<MetricKey>;
 	dataIds?: Array<string> | null;
+	approximate?: boolean;
 };
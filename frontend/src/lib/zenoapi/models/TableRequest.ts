@@ -22,6 +22,10 @@ import type { ZenoColumn } from './ZenoColumn';
  * applied to the data.
  * sort (tuple[ZenoColumn | None, bool]): the sort to be used for the table.
  * data_ids (list[str] | None): the data ids to be used for the table.
+ * exclude_embeddings (bool): whether to leave out embedding columns, even if
+ * they are requested. Default False.
+ * page_token (str | None): the token of the previous page to continue after,
+ * used instead of the offset. Default None.
  */
 export type TableRequest = {
 	columns: Array<ZenoColumn>;
@@ -33,4 +37,6 @@ export type TableRequest = {
 	filterPredicates?: FilterPredicateGroup | null;
 	sort: any[];
 	dataIds?: Array<string> | null;
+	excludeEmbeddings?: boolean;
+	pageToken?: string | null;
 };